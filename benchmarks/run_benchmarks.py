@@ -0,0 +1,271 @@
+"""
+Benchmark suite for the schedule stages.
+
+Times each stage separately over sweeps of loan term, repayment frequency and portfolio size, and records the
+best time, throughput and peak memory of every case in a JSON file. When a baseline file exists, the run fails
+if a case got slower than its baseline by more than the margin.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks                    # compare against benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --update-baseline  # store this run as the new baseline
+    python -m benchmarks.run_benchmarks --filter prepare_loan_summary --margin 0.5
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from loan_analysis_toolkit.schedule import (find_relevant_dates, calculate_end_date, calculate_minimum_repayment,
+                                            generate_loan_transactions, create_monthly_summary, prepare_loan_summary)
+from loan_analysis_toolkit.portfolio import simulate_portfolio
+from loan_analysis_toolkit import pricing
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+
+# a case fails when it is slower than its baseline by more than this fraction
+DEFAULT_MARGIN = 0.25
+
+TERM_YEARS = (5, 10, 20, 30, 40)
+# 'annually' is not a valid repayment frequency, as `calculate_minimum_repayment` calls it 'annual'
+REPAYMENT_FREQUENCIES = ('weekly', 'fortnightly', 'monthly', 'quarterly')
+PORTFOLIO_SIZES = (10, 100, 1000)
+# number of rates of the quote grids, priced for 20 principal bands, 36 terms and 5 frequencies
+QUOTE_GRID_RATES = (100, 800)
+# modules whose import time is measured, each in a fresh interpreter
+IMPORTED_MODULES = ('loan_analysis_toolkit', 'loan_analysis_toolkit.schedule')
+
+
+def loan_params(years=30, repayment_frequency='monthly', capture_interest_accrual=False):
+    """ Loan parameters of the benchmark cases. There are no extra repayments, so loans run their full term.
+    """
+    return {'start_date': '2025-01-31',
+            'loan_amount': 600_000,
+            'annual_rate': 5.5,
+            'loan_duration_years': years,
+            'loan_duration_months': 0,
+            'repayment_frequency': repayment_frequency,
+            'initial_offset_amount': 20_000,
+            'offset_contribution_frequency': 'monthly',
+            'offset_contribution_regular_amount': 500,
+            'extra_repayments_frequency': 'annually',
+            'extra_repayments_regular_amount': 0,
+            'capture_interest_accrual': capture_interest_accrual}
+
+
+def _transaction_args(params):
+    """ Arguments of `generate_loan_transactions` for a loan, as built by `create_amortization_schedule`.
+    """
+    start_date = datetime.strptime(params['start_date'], '%Y-%m-%d')
+    end_date = calculate_end_date(start_date, params['loan_duration_years'], params['loan_duration_months'])
+    minimum_repayments = calculate_minimum_repayment(params['loan_amount'], params['annual_rate'],
+                                                     params['loan_duration_years'], params['loan_duration_months'],
+                                                     params['repayment_frequency'])
+    all_dates = find_relevant_dates(start_date, end_date, 'daily')[1:]
+    return (start_date, params['loan_amount'], params['annual_rate'], params['initial_offset_amount'], minimum_repayments,
+            all_dates, find_relevant_dates(start_date, end_date, 'monthly')[1:],
+            find_relevant_dates(start_date, end_date, params['repayment_frequency'])[1:],
+            find_relevant_dates(start_date, end_date, params['offset_contribution_frequency'])[1:],
+            params['offset_contribution_regular_amount'],
+            find_relevant_dates(start_date, end_date, params['extra_repayments_frequency'])[1:],
+            params['extra_repayments_regular_amount'], params['capture_interest_accrual'])
+
+
+def _generate_transactions(*args):
+    return len(generate_loan_transactions(*args, output='buffer'))
+
+
+def _create_monthly_summary(transactions):
+    create_monthly_summary(transactions)
+    return len(transactions)
+
+
+def _prepare_loan_summary(params):
+    return len(prepare_loan_summary(params)['all_transactions'])
+
+
+def _simulate_portfolio(table):
+    simulate_portfolio(table)
+    return len(table)
+
+
+def _quote_grid(principals, annual_rates, term_months):
+    return pricing.quote_grid(principals, annual_rates, term_months, output='numpy').size
+
+
+def _annuity_factor_table(annual_rates, term_months):
+    # the memoized tables are cleared, so every run works the factors out
+    pricing._annuity_factor_table.cache_clear()
+    return pricing.annuity_factor_table(annual_rates, term_months).size
+
+
+def _import_module(module):
+    # the time includes starting the interpreter, which is the same for every version of the package
+    subprocess.run([sys.executable, '-c', f'import {module}'], check=True)
+    return 1
+
+
+def benchmark_cases():
+    """ Yields (name, setup, function, unit) for every case. `setup()` returns the arguments of `function`, which
+    returns the number of units (dates, transactions or loans) it processed.
+    """
+    for module in IMPORTED_MODULES:
+        yield f'import[{module}]', lambda module=module: (module,), _import_module, 'imports'
+
+    for years in TERM_YEARS:
+        def dates_setup(years=years):
+            start_date = datetime(2025, 1, 31)
+            return start_date, calculate_end_date(start_date, years, 0)
+        yield (f'find_relevant_dates[years={years}]', dates_setup,
+               lambda start_date, end_date: len(find_relevant_dates(start_date, end_date, 'daily')), 'dates')
+
+        for capture in (False, True):
+            suffix = f'years={years},accrual={capture}'
+            yield (f'generate_loan_transactions[{suffix}]',
+                   lambda years=years, capture=capture: _transaction_args(loan_params(years, capture_interest_accrual=capture)),
+                   _generate_transactions, 'rows')
+            yield (f'create_monthly_summary[{suffix}]',
+                   lambda years=years, capture=capture: (prepare_loan_summary(loan_params(years, capture_interest_accrual=capture))['all_transactions'],),
+                   _create_monthly_summary, 'rows')
+
+        yield (f'prepare_loan_summary[years={years}]', lambda years=years: (loan_params(years),),
+               _prepare_loan_summary, 'rows')
+
+    for frequency in REPAYMENT_FREQUENCIES:
+        yield (f'generate_loan_transactions[frequency={frequency}]',
+               lambda frequency=frequency: _transaction_args(loan_params(repayment_frequency=frequency)),
+               _generate_transactions, 'rows')
+        yield (f'prepare_loan_summary[frequency={frequency}]',
+               lambda frequency=frequency: (loan_params(repayment_frequency=frequency),),
+               _prepare_loan_summary, 'rows')
+
+    for n_loans in PORTFOLIO_SIZES:
+        def portfolio_setup(n_loans=n_loans):
+            rng = np.random.default_rng(0)
+            table = pd.DataFrame([loan_params(int(years), frequency) for years, frequency in
+                                  zip(rng.choice(TERM_YEARS, n_loans), rng.choice(REPAYMENT_FREQUENCIES, n_loans))])
+            table['loan_amount'] = rng.uniform(100_000, 1_000_000, n_loans).round(2)
+            table['extra_repayments_regular_amount'] = rng.choice([0, 1000, 5000], n_loans)
+            return (table,)
+        yield (f'simulate_portfolio[loans={n_loans}]', portfolio_setup,
+               _simulate_portfolio, 'loans')
+
+    for n_rates in QUOTE_GRID_RATES:
+        def quote_setup(n_rates=n_rates):
+            return np.arange(100_000, 2_000_001, 100_000), np.linspace(2, 10, n_rates), np.arange(60, 481, 12)
+        yield (f'annuity_factor_table[rates={n_rates}]', lambda n_rates=n_rates: quote_setup(n_rates)[1:],
+               _annuity_factor_table, 'factors')
+        yield f'quote_grid[rates={n_rates}]', quote_setup, _quote_grid, 'quotes'
+
+
+def run_case(setup, function, repeat, min_time):
+    """ Times `function` on the arguments from `setup` and measures its peak memory in a separate run.
+
+    Returns:
+        dict: best time in seconds, number of timed runs, throughput in units per second and peak memory in bytes.
+    """
+    args = setup()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeat or time.perf_counter() - started < min_time:
+        run_started = time.perf_counter()
+        units = function(*args)
+        timings.append(time.perf_counter() - run_started)
+        if len(timings) >= 1000:
+            break
+    best = min(timings)
+
+    # memory is measured apart from the timings, as tracing allocations slows the run down
+    tracemalloc.start()
+    try:
+        function(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'runs': len(timings), 'throughput': units / best if best > 0 else float('inf'),
+            'peak_memory_bytes': peak_memory}
+
+
+def run_benchmarks(name_filter=None, repeat=3, min_time=0.2, report=print):
+    """ Runs every case whose name contains `name_filter`.
+
+    Returns:
+        dict: machine description and the results of every case, keyed by case name.
+    """
+    results = {}
+    for name, setup, function, unit in benchmark_cases():
+        if name_filter and name_filter not in name:
+            continue
+        result = run_case(setup, function, repeat, min_time)
+        result['unit'] = unit
+        results[name] = result
+        report(f"{name:<65} {result['seconds'] * 1000:>10.2f} ms {result['throughput']:>14,.0f} {unit}/s "
+               f"{result['peak_memory_bytes'] / 2 ** 20:>8.1f} MiB")
+    return {'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'processor': platform.processor(), 'numpy': np.__version__, 'pandas': pd.__version__},
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'results': results}
+
+
+def compare_to_baseline(results, baseline, margin=DEFAULT_MARGIN):
+    """ Lists the cases that got slower than their baseline by more than `margin` (a fraction, e.g. 0.25 for 25%).
+    Cases missing from either run are ignored.
+
+    Returns:
+        list: (name, baseline seconds, seconds) of every regressed case.
+    """
+    regressions = []
+    for name, result in results['results'].items():
+        if name in baseline['results']:
+            baseline_seconds = baseline['results'][name]['seconds']
+            if result['seconds'] > baseline_seconds * (1 + margin):
+                regressions.append((name, baseline_seconds, result['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the loan schedule stages.")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help="baseline file (default: %(default)s)")
+    parser.add_argument('--update-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--output', type=Path, help="also write the results of this run to this file")
+    parser.add_argument('--margin', type=float, default=DEFAULT_MARGIN,
+                        help="allowed slowdown against the baseline, as a fraction (default: %(default)s)")
+    parser.add_argument('--filter', dest='name_filter', help="only run cases whose name contains this text")
+    parser.add_argument('--repeat', type=int, default=3, help="minimum number of timed runs per case (default: %(default)s)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds of timed runs per case (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.name_filter, args.repeat, args.min_time)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.update_baseline:
+        if args.baseline.exists() and args.name_filter:
+            # keep the baseline of the cases that were not run
+            baseline = json.loads(args.baseline.read_text())
+            baseline['results'].update(results['results'])
+            results = {**results, 'results': baseline['results']}
+        args.baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}. Run with --update-baseline to create it.")
+        return 0
+
+    regressions = compare_to_baseline(results, json.loads(args.baseline.read_text()), args.margin)
+    for name, baseline_seconds, seconds in regressions:
+        print(f"REGRESSION {name}: {seconds * 1000:.2f} ms against a baseline of {baseline_seconds * 1000:.2f} ms "
+              f"(+{seconds / baseline_seconds - 1:.0%}, margin {args.margin:.0%})")
+    if regressions:
+        return 1
+    print(f"All cases within {args.margin:.0%} of the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
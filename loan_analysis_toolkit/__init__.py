@@ -1,11 +1,58 @@
-# from .schedule import create_amortization_schedule
+from importlib import import_module
 
-# __all__ = ["prepare_loan_summary", 
-#            "create_monthly_summary",
-#            "create_amortization_schedule",
-#            "generate_loan_transactions",
-#            "calculate_daily_interest",
-#            "calculate_minimum_repayment"]
+__version__ = '0.2.0'
 
+# public functions and classes, with the module defining them. They are imported on first access (PEP 562), so
+# `import loan_analysis_toolkit` stays fast and only loads NumPy, pandas or pydantic when a feature needs them.
+_EXPORTS = {
+    'prepare_loan_summary': 'schedule',
+    'create_monthly_summary': 'schedule',
+    'create_amortization_schedule': 'schedule',
+    'generate_loan_transactions': 'schedule',
+    'calculate_daily_interest': 'schedule',
+    'calculate_minimum_repayment': 'schedule',
+    'calculate_loan_totals': 'schedule',
+    'iter_loan_transactions': 'schedule',
+    'LoanTotals': 'schedule',
+    'RateChange': 'schedule',
+    'TransactionBuffer': 'transactions',
+    'quote_grid': 'pricing',
+    'annuity_factor_table': 'pricing',
+    'generate_exact_transactions': 'exact',
+    'reconcile_statement': 'reconcile',
+    'simulate_portfolio': 'portfolio',
+    'run_portfolio': 'runner',
+    'aggregate_monthly_cash_flows': 'cashflows',
+    'MonthlyCashFlows': 'cashflows',
+    'ResultCache': 'cache',
+    'prepare_loan_summary_async': 'service',
+    'ScheduleService': 'service',
+    'validate_loan_table': 'validation',
+    'LoanParameterError': 'validation',
+    'goal_seek': 'solver',
+    'GoalSeekResult': 'solver',
+    'create_checkpointed_schedule': 'checkpoints',
+    'CheckpointedSchedule': 'checkpoints',
+    'simulate_rate_paths': 'montecarlo',
+    'simulate_rate_scenarios': 'montecarlo',
+    'collect_metrics': 'instrumentation',
+    'Metrics': 'instrumentation',
+    'CsvSink': 'sinks',
+    'JsonLinesSink': 'sinks',
+    'ParquetSink': 'sinks',
+    'write_transactions': 'sinks',
+}
 
- 
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(import_module(f'.{_EXPORTS[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
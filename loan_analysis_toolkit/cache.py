@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from . import __version__
+from .transactions import TRANSACTION_TYPES, transactions_frame, monthly_summary_frame
+
+# bumped when the layout of cache files changes, so that entries written by another layout are never read
+CACHE_FORMAT_VERSION = 1
+
+# cache files start with the magic bytes and the length of a JSON header listing the columns; each column is stored
+# as raw little-endian values at an offset aligned to _ALIGNMENT bytes, so it can be read from a memory map as is
+_MAGIC = b'LATCACHE'
+_ALIGNMENT = 64
+_SUFFIX = '.latc'
+
+# columns stored for each result, with their dtype
+_TRANSACTION_COLUMNS = {'days': '<i4', 'types': '<i1', 'amounts': '<f8', 'loan_balances': '<f8', 'offset_balances': '<f8'}
+_SUMMARY_COLUMNS = {'months': '<i8', 'total_repayment': '<f8', 'total_interest': '<f8',
+                    'loan_balance_first_day': '<f8', 'offset_balance_last_day': '<f8'}
+
+
+class CacheStats(NamedTuple):
+    """ Statistics of a `ResultCache`, as returned by `ResultCache.stats`.
+    """
+    hits: int  # lookups answered from the cache by this process
+    misses: int  # lookups not found in the cache by this process
+    evictions: int  # entries removed by this process to stay under the size limit
+    entries: int  # entries currently in the cache directory
+    size_bytes: int  # total size of the entries currently in the cache directory
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _result_columns(results):
+    """ Returns the columns stored for the results of `prepare_loan_summary`, as {name: array}.
+    """
+    transactions = results['all_transactions']
+    monthly_summary = results['monthly_summary']
+    return {'days': transactions['Date'].to_numpy().astype('datetime64[D]').astype(np.int32),
+            'types': pd.Categorical(transactions['Transaction Type'], categories=TRANSACTION_TYPES).codes.astype(np.int8),
+            'amounts': transactions['Transaction Amount'].to_numpy(dtype=np.float64),
+            'loan_balances': transactions['Loan Balance'].to_numpy(dtype=np.float64),
+            'offset_balances': transactions['Offset Balance'].to_numpy(dtype=np.float64),
+            'months': monthly_summary['MONTH'].array.asi8,
+            'total_repayment': monthly_summary['Total Repayment'].to_numpy(dtype=np.float64),
+            'total_interest': monthly_summary['Total Interest Charged'].to_numpy(dtype=np.float64),
+            'loan_balance_first_day': monthly_summary['Loan Balance (First Day of Month)'].to_numpy(dtype=np.float64),
+            'offset_balance_last_day': monthly_summary['Offset Balance (Last Day of Month)'].to_numpy(dtype=np.float64)}
+
+
+def _write_entry(file, columns):
+    """ Writes columns to a binary file object in the cache file layout.
+    """
+    header = {}
+    dtypes = {**_TRANSACTION_COLUMNS, **_SUMMARY_COLUMNS}
+    # the header size depends on the offsets it lists, so they are laid out after a generously sized header
+    header_size = _aligned(len(_MAGIC) + 8 + 128 * len(columns))
+    offset = header_size
+    for name, values in columns.items():
+        header[name] = [dtypes[name], len(values), offset]
+        offset = _aligned(offset + len(values) * np.dtype(dtypes[name]).itemsize)
+    header_bytes = json.dumps(header).encode()
+    if len(_MAGIC) + 8 + len(header_bytes) > header_size:
+        raise ValueError("Cache entry header is too large.")
+    file.write(_MAGIC + len(header_bytes).to_bytes(8, 'little') + header_bytes)
+    for name, values in columns.items():
+        file.write(b'\0' * (header[name][2] - file.tell()))
+        file.write(np.ascontiguousarray(values, dtype=dtypes[name]).tobytes())
+
+
+def _read_entry(data):
+    """ Returns the columns of a memory-mapped cache file as {name: array}, without copying them.
+    """
+    if bytes(data[:len(_MAGIC)]) != _MAGIC:
+        raise ValueError("Not a cache entry.")
+    header_length = int.from_bytes(bytes(data[len(_MAGIC):len(_MAGIC) + 8]), 'little')
+    start = len(_MAGIC) + 8
+    header = json.loads(bytes(data[start:start + header_length]))
+    columns = {}
+    for name, (dtype, length, offset) in header.items():
+        dtype = np.dtype(dtype)
+        if offset + length * dtype.itemsize > len(data):
+            raise ValueError("Truncated cache entry.")
+        columns[name] = data[offset:offset + length * dtype.itemsize].view(dtype)
+    return columns
+
+
+class ResultCache:
+    """
+    On-disk cache of `prepare_loan_summary` results, keyed by a hash of the validated loan parameters, the schedule
+    options and the library version.
+
+    Each entry is one file holding the transaction and monthly summary columns as raw arrays, about 29 bytes per
+    transaction. A hit memory-maps the file, so columns are paged in by the OS instead of parsed, and the returned
+    DataFrames are backed by the map (copy-on-write: changing them leaves the file untouched).
+
+    The cache is bounded by `max_bytes`: after a new entry is stored, least recently used entries are removed until
+    the total size is under the limit. Several processes on one host can share a directory: entries are written to
+    a temporary file and renamed into place, so readers see a whole entry or none, and entries removed by another
+    process are treated as misses. Recency is tracked by the modification time of the entry files.
+
+    Args:
+        directory (str | os.PathLike): directory holding the entries. Created if it doesn't exist.
+        max_bytes (int): maximum total size of the entries. Default is 1 GiB.
+    """
+
+    def __init__(self, directory, max_bytes: int = 1 << 30):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative.")
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(loan_params: dict, **options):
+        """ Returns the cache key of validated loan parameters and the options that change the results.
+
+        Args:
+            loan_params (dict): validated loan parameters, e.g. the `model_dump()` of `inputval_prepare_loan_summary`,
+                so that equal loans written differently (e.g. 500000 and 500000.0) share a key.
+            **options: other arguments the results depend on, e.g. the schedule engine.
+
+        Returns:
+            str: a SHA-256 hex digest.
+        """
+        payload = {'loan_params': loan_params, 'options': options, 'version': __version__, 'format': CACHE_FORMAT_VERSION}
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + _SUFFIX)
+
+    def get(self, key: str):
+        """ Looks up the results stored under a key.
+
+        Returns:
+            dict: the results, with the same keys as `prepare_loan_summary`, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            data = np.memmap(path, mode='c')
+            columns = _read_entry(data)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except ValueError:  # empty, truncated or foreign file
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:  # evicted by another process since it was mapped
+            pass
+        self.hits += 1
+
+        all_transactions = transactions_frame(columns['days'].astype(np.int64).view('datetime64[D]'), columns['types'],
+                                              columns['amounts'], columns['loan_balances'], columns['offset_balances'])
+        monthly_summary, total_interest_charged, total_repayments = monthly_summary_frame(
+            columns['months'], columns['total_repayment'], columns['total_interest'],
+            columns['loan_balance_first_day'], columns['offset_balance_last_day'])
+        return {'all_transactions': all_transactions,
+                'monthly_summary': monthly_summary,
+                'total_interest_charged': total_interest_charged,
+                'total_repayments': total_repayments}
+
+    def put(self, key: str, results: dict):
+        """ Stores the results of `prepare_loan_summary` under a key, then evicts least recently used entries if the
+        cache is over its size limit. Results larger than the limit are not stored.
+        """
+        file = tempfile.NamedTemporaryFile(dir=self.directory, prefix='.', suffix='.tmp', delete=False)
+        try:
+            with file:
+                _write_entry(file, _result_columns(results))
+                size = file.tell()
+            if size > self.max_bytes:
+                os.remove(file.name)
+                return
+            os.replace(file.name, self._path(key))
+        except BaseException:
+            self._remove(file.name)
+            raise
+        self._evict(keep=key)
+
+    def _entries(self):
+        """ Returns (last used time, size, path) of every entry, skipping entries removed while listing.
+        """
+        entries = []
+        with os.scandir(self.directory) as listing:
+            for entry in listing:
+                if entry.name.endswith(_SUFFIX):
+                    try:
+                        status = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((status.st_mtime, status.st_size, entry.path))
+        return entries
+
+    def _remove(self, path):
+        """ Removes a file and returns whether it was removed. Files already removed, e.g. by another process, and
+        files that can't be removed, e.g. on Windows while another process has them memory-mapped, are skipped.
+        """
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _evict(self, keep=None):
+        entries = self._entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        keep_path = None if keep is None else self._path(keep)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            if path == keep_path:
+                continue
+            if self._remove(path):
+                self.evictions += 1
+            elif os.path.exists(path):  # in use by another process, so it still takes up space
+                continue
+            size -= entry_size
+
+    def stats(self):
+        """ Returns the hit, miss and eviction counts of this process, and the number and size of the entries on disk.
+        """
+        entries = self._entries()
+        return CacheStats(self.hits, self.misses, self.evictions, len(entries), sum(size for _, size, _ in entries))
+
+    def clear(self):
+        """ Removes every entry from the cache directory.
+        """
+        for _, _, path in self._entries():
+            self._remove(path)
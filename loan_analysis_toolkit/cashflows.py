@@ -0,0 +1,180 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .schedule import create_amortization_schedule, SCHEDULE_ENGINES
+from .runner import _iter_loan_batches, _validate_in_batches, _imap_bounded
+from .transactions import MonthlySummary
+
+# columns of the portfolio monthly totals, after MONTH. 'Loans' is the number of loans with transactions in the month.
+CASH_FLOW_COLUMNS = ('Total Repayment', 'Total Interest Charged', 'Loan Balance (First Day of Month)',
+                     'Offset Balance (Last Day of Month)', 'Loans')
+
+
+def _month_numbers(months):
+    """ Returns months (a Period or datetime column) as the number of months since 1970-01. """
+    months = pd.Series(months)
+    if isinstance(months.dtype, pd.PeriodDtype):
+        return months.array.asi8
+    days = months.to_numpy().astype('datetime64[M]')
+    return days.astype(np.int64)
+
+
+class MonthlyCashFlows:
+    """
+    Running portfolio totals of monthly loan summaries: repayments, interest charged, loan balances on the first
+    day and offset balances on the last day of each month, summed over loans.
+
+    Totals are held in one array per column indexed by month, so memory depends on the number of months covered,
+    not on the number of loans added. Summaries can be added in any order, and totals built separately, e.g. by
+    parallel workers, are combined with `merge`.
+    """
+
+    def __init__(self):
+        self.first_month = None  # number of months since 1970-01 of the first column of `totals`
+        self.totals = np.zeros((len(CASH_FLOW_COLUMNS), 0))
+        self.loans = 0
+
+    def _cover(self, first_month, last_month):
+        """ Widens `totals` so that it covers the months from `first_month` to `last_month`. """
+        if self.first_month is None:
+            self.first_month = first_month
+        start = min(self.first_month, first_month)
+        stop = max(self.first_month + self.totals.shape[1], last_month + 1)
+        if start < self.first_month or stop > self.first_month + self.totals.shape[1]:
+            totals = np.zeros((len(CASH_FLOW_COLUMNS), stop - start))
+            offset = self.first_month - start
+            totals[:, offset:offset + self.totals.shape[1]] = self.totals
+            self.first_month, self.totals = start, totals
+
+    def add_months(self, months, total_repayment, total_interest, loan_balance_first_day, offset_balance_last_day,
+                   loans: int = 1):
+        """ Adds monthly rows to the totals. Rows of the same month are summed.
+
+        Args:
+            months (np.ndarray): months as the number of months since 1970-01.
+            total_repayment, total_interest, loan_balance_first_day, offset_balance_last_day (np.ndarray): the
+                columns of the monthly summary, one value per month.
+            loans (int): number of loans the rows belong to. Default is 1.
+        """
+        months = np.asarray(months, dtype=np.int64)
+        self.loans += loans
+        if not len(months):
+            return
+        self._cover(int(months.min()), int(months.max()))
+        columns = np.stack([np.asarray(total_repayment, dtype=np.float64),
+                            np.asarray(total_interest, dtype=np.float64),
+                            np.asarray(loan_balance_first_day, dtype=np.float64),
+                            np.asarray(offset_balance_last_day, dtype=np.float64),
+                            np.ones(len(months))])
+        position = months - self.first_month
+        if np.all(position[1:] > position[:-1]):
+            # the months of one loan are distinct, so they are added in one vectorized step
+            self.totals[:, position] += columns
+        else:
+            for row, column in zip(self.totals, columns):
+                np.add.at(row, position, column)
+
+    def add(self, monthly_summary):
+        """ Adds the monthly summary of a loan to the totals.
+
+        Args:
+            monthly_summary (pd.DataFrame or MonthlySummary): a summary from `create_monthly_summary` or
+                `prepare_loan_summary`, or the running summary of a `SummarizingTransactionBuffer`. A DataFrame with
+                a `loan_id` column, e.g. a monthly summary part file of `run_portfolio`, may hold several loans.
+        """
+        if isinstance(monthly_summary, MonthlySummary):
+            self.add_months(np.frombuffer(monthly_summary.months, dtype=np.int32), monthly_summary.total_repayment,
+                            monthly_summary.total_interest, monthly_summary.loan_balance_first_day,
+                            monthly_summary.offset_balance_last_day)
+            return
+        loans = monthly_summary['loan_id'].nunique() if 'loan_id' in monthly_summary.columns else 1
+        self.add_months(_month_numbers(monthly_summary['MONTH']),
+                        *(monthly_summary[column].to_numpy() for column in CASH_FLOW_COLUMNS[:-1]), loans=loans)
+
+    def merge(self, other: 'MonthlyCashFlows'):
+        """ Adds the totals of another `MonthlyCashFlows`, e.g. those of another worker, and returns self. """
+        self.loans += other.loans
+        if other.first_month is None or not other.totals.shape[1]:
+            return self
+        self._cover(other.first_month, other.first_month + other.totals.shape[1] - 1)
+        offset = other.first_month - self.first_month
+        self.totals[:, offset:offset + other.totals.shape[1]] += other.totals
+        return self
+
+    def to_frame(self):
+        """ Returns the totals as a DataFrame with a MONTH column (monthly periods) followed by `CASH_FLOW_COLUMNS`,
+        one row per month from the first to the last month with transactions.
+        """
+        months = np.arange(self.totals.shape[1], dtype=np.int64) + (self.first_month or 0)
+        result = pd.DataFrame({'MONTH': pd.PeriodIndex.from_ordinals(months, freq='M')})
+        for name, column in zip(CASH_FLOW_COLUMNS, self.totals):
+            result[name] = column
+        result['Loans'] = result['Loans'].astype(np.int64)
+        return result
+
+
+def _aggregate_chunk(loans, engine):
+    """ Runs the schedules of a chunk of already validated loans and returns their summed monthly cash flows.
+    Runs in a worker process, holding the schedule of one loan at a time.
+    """
+    cash_flows = MonthlyCashFlows()
+    for loan_params in loans:
+        transactions = create_amortization_schedule(loan_params['start_date'], loan_params['loan_amount'],
+                                                    loan_params['annual_rate'], loan_params['loan_duration_years'],
+                                                    loan_params['loan_duration_months'], loan_params['repayment_frequency'],
+                                                    loan_params['initial_offset_amount'],
+                                                    loan_params['offset_contribution_frequency'],
+                                                    loan_params['offset_contribution_regular_amount'],
+                                                    loan_params['extra_repayments_frequency'],
+                                                    loan_params['extra_repayments_regular_amount'],
+                                                    False, engine, output='buffer', monthly_summary=True)
+        cash_flows.add(transactions.monthly_summary)
+    return cash_flows
+
+
+def aggregate_monthly_cash_flows(params_table, engine: str = 'event', workers: int = None, chunk_size: int = 1000):
+    """ Rolls the monthly summaries of every loan of a portfolio up into portfolio totals per month, without keeping
+    the schedule or monthly summary of more than one loan per worker.
+
+    The table is read and validated with `validate_loan_table` in chunks of `chunk_size` loans, and every invalid
+    row is reported before any loan is run. The chunks are then read again and sent to the workers, each of which
+    sums the monthly summaries of its chunk into a `MonthlyCashFlows` as the schedules are generated. At most twice
+    as many chunks as workers are in flight at a time, and the totals of each chunk are merged as soon as it
+    completes. For a `.csv` or `.parquet` file, memory therefore depends on the number of months covered by the
+    portfolio and on `chunk_size`, not on the number of loans. Interest accruals are never captured, as they don't
+    change the monthly totals.
+
+    Args:
+        params_table (pd.DataFrame, pyarrow.Table, list, str or os.PathLike): one row (or dict) per loan with the
+            fields of `prepare_loan_summary`, or a `.csv` or `.parquet` file of them.
+        engine (str): the schedule engine, "daily", "event" or "exact". Default is "event".
+        workers (int): number of worker processes. 1 runs every chunk in the current process. Default is the number of CPUs.
+        chunk_size (int): maximum number of loans per task. Default is 1000.
+
+    Returns:
+        MonthlyCashFlows: the portfolio totals. `to_frame()` returns them as a DataFrame, and totals of several
+        portfolios can be combined with `merge`.
+    """
+    if engine not in SCHEDULE_ENGINES:
+        raise ValueError("Invalid engine. Choose 'daily', 'event' or 'exact'.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be a positive integer.")
+
+    # validate inputs, reporting every invalid row at once
+    _validate_in_batches(params_table, chunk_size)
+
+    chunks = ((batch.drop(columns=['capture_interest_accrual'], errors='ignore').to_dict('records'), engine)
+              for batch in _iter_loan_batches(params_table, chunk_size))
+    cash_flows = MonthlyCashFlows()
+    if workers == 1:
+        for chunk in chunks:
+            cash_flows.merge(_aggregate_chunk(*chunk))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for _, chunk_cash_flows in _imap_bounded(executor, _aggregate_chunk, chunks, 2 * workers):
+                cash_flows.merge(chunk_cash_flows)
+    return cash_flows
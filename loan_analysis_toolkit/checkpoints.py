@@ -0,0 +1,108 @@
+from bisect import bisect_left
+from datetime import datetime
+from .schedule import ScheduleSnapshot, _prepare_event_engine, _iter_transactions_between_events, _validate_loan_params
+
+# loan parameters that can change from a snapshot onwards; the others shape the schedule from settlement day
+RESIMULATION_PARAMETERS = ('offset_contribution_frequency', 'offset_contribution_regular_amount',
+                           'extra_repayments_frequency', 'extra_repayments_regular_amount')
+
+
+class CheckpointedSchedule:
+    """
+    Loan schedule produced by the event-driven engine together with snapshots of the engine state, taken after
+    settlement and at the end of every interest charge day. A what-if change that starts later in the loan is
+    simulated with `resimulate_from`, which reuses the transactions up to a snapshot and only recomputes the rest.
+
+    Args:
+        loan_params (dict): loan parameters, as described in `prepare_loan_summary`.
+        transactions (TransactionBuffer): all transactions of the loan.
+        snapshots (list): `ScheduleSnapshot` objects in date order.
+    """
+
+    def __init__(self, loan_params, transactions, snapshots):
+        self.loan_params = loan_params
+        self.transactions = transactions
+        self.snapshots = snapshots
+        self.start_date = datetime.strptime(loan_params['start_date'], '%Y-%m-%d')
+
+    def to_frame(self):
+        """ Returns the transactions as a DataFrame, as in `prepare_loan_summary`.
+        """
+        return self.transactions.to_frame()
+
+    def snapshot_before(self, divergence_date):
+        """ Returns the latest snapshot taken before `divergence_date`, i.e. the one to resume from for a change that
+        takes effect on that date.
+
+        Args:
+            divergence_date (str or datetime): first date affected by the change, in YYYY-MM-DD format if a string.
+        """
+        if isinstance(divergence_date, str):
+            divergence_date = datetime.strptime(divergence_date, '%Y-%m-%d')
+        day = (divergence_date - self.start_date).days
+        if day < 1:
+            raise ValueError("Divergence date must be after the start date.")
+        position = bisect_left([snapshot.day for snapshot in self.snapshots], day)
+        return self.snapshots[position - 1]
+
+    def resimulate_from(self, snapshot : ScheduleSnapshot, changed_params : dict):
+        """ Simulates the loan again with `changed_params` taking effect after `snapshot`. Transactions and snapshots
+        up to the snapshot are reused, and only the rest of the schedule is recomputed.
+
+        Args:
+            snapshot (ScheduleSnapshot): one of the `snapshots` of this schedule, e.g. from `snapshot_before`.
+            changed_params (dict): new values of 'offset_contribution_frequency', 'offset_contribution_regular_amount',
+                'extra_repayments_frequency' and/or 'extra_repayments_regular_amount'.
+
+        Returns:
+            CheckpointedSchedule: the schedule with the changes, which can itself be resimulated.
+        """
+        invalid = [name for name in changed_params if name not in RESIMULATION_PARAMETERS]
+        if invalid:
+            raise ValueError(f"Cannot resimulate changes to {', '.join(invalid)} from a snapshot. "
+                             "Choose 'offset_contribution_frequency', 'offset_contribution_regular_amount', "
+                             "'extra_repayments_frequency' or 'extra_repayments_regular_amount'.")
+        position = bisect_left([s.day for s in self.snapshots], snapshot.day)
+        if position == len(self.snapshots) or self.snapshots[position] != snapshot:
+            raise ValueError("Snapshot does not belong to this schedule.")
+        loan_params = {**self.loan_params, **changed_params}
+        _validate_loan_params(loan_params)
+
+        start_date, last_day, _, calendars = _prepare_event_engine(loan_params)
+        snapshots = self.snapshots[:position + 1]
+        suffix = next(_iter_transactions_between_events(start_date, snapshot.day + 1, last_day,
+                                                        snapshot.loan_balance, loan_params['annual_rate'],
+                                                        snapshot.offset_balance, snapshot.minimum_repayments, *calendars,
+                                                        loan_params['offset_contribution_regular_amount'],
+                                                        loan_params['extra_repayments_regular_amount'],
+                                                        loan_params.get('capture_interest_accrual', False),
+                                                        monthly_interest=snapshot.accrued_interest, settlement=False,
+                                                        snapshots=snapshots, transaction_count=snapshot.transaction_count))
+        transactions = self.transactions.head(snapshot.transaction_count)
+        transactions.extend(suffix)
+        return CheckpointedSchedule(loan_params, transactions, snapshots)
+
+
+def create_checkpointed_schedule(loan_params : dict):
+    """ Generates the transactions of a loan with the event-driven engine, keeping snapshots of the engine state
+    for `CheckpointedSchedule.resimulate_from`.
+
+    Args:
+        loan_params (dict): loan parameters, as described in `prepare_loan_summary`.
+
+    Returns:
+        CheckpointedSchedule: the transactions and snapshots of the loan.
+    """
+    # validate inputs
+    _validate_loan_params(loan_params)
+
+    start_date, last_day, minimum_repayments, calendars = _prepare_event_engine(loan_params)
+    snapshots = []
+    transactions = next(_iter_transactions_between_events(start_date, 1, last_day,
+                                                          loan_params['loan_amount'], loan_params['annual_rate'],
+                                                          loan_params['initial_offset_amount'], minimum_repayments, *calendars,
+                                                          loan_params['offset_contribution_regular_amount'],
+                                                          loan_params['extra_repayments_regular_amount'],
+                                                          loan_params.get('capture_interest_accrual', False),
+                                                          snapshots=snapshots))
+    return CheckpointedSchedule(loan_params, transactions, snapshots)
@@ -0,0 +1,130 @@
+from array import array
+from bisect import bisect_right
+from datetime import timedelta
+from functools import lru_cache
+import threading
+from dateutil.relativedelta import relativedelta
+
+# steps between two consecutive events, matching `find_relevant_dates`
+FREQUENCY_STEPS = {
+    'daily': timedelta(days=1),
+    'weekly': timedelta(weeks=1),
+    'fortnightly': timedelta(weeks=2),
+    'monthly': relativedelta(months=1),
+    'quarterly': relativedelta(months=3),
+    'annually': relativedelta(years=1),
+}
+
+# maximum number of calendars kept by `get_event_calendar`
+CALENDAR_CACHE_SIZE = 2048
+
+# number of days generated ahead of the requested day, so that lookups don't extend the calendar one event at a time
+_LOOKAHEAD_DAYS = 366
+
+
+class EventCalendar:
+    """
+    Event dates of a loan stored as integer day offsets from the settlement date.
+
+    Offsets are kept in a sorted array and in a bitmask with one bit per day of the loan term, so checking whether
+    a day is an event day is O(1). Calendars created from a frequency are generated lazily: events are only worked
+    out as far as the latest day asked for, so a loan paid off in year 12 never generates the dates of years 13 to 30.
+    Event dates follow `find_relevant_dates`, i.e. each date is obtained by adding the frequency step to the previous one.
+
+    Args:
+        start_date (datetime): The settlement date. It is not an event day.
+        end_date (datetime): The last day of the loan term.
+        frequency (str): The frequency of events ('daily', 'weekly', 'fortnightly', 'monthly', 'quarterly', 'annually').
+            None creates an empty calendar to be filled by `from_dates`.
+    """
+
+    def __init__(self, start_date, end_date, frequency):
+        if frequency is not None and frequency not in FREQUENCY_STEPS:
+            raise ValueError("Invalid frequency. Choose 'daily','weekly', 'fortnightly', 'monthly', 'quarterly', or 'annually'.")
+        self.start_date = start_date
+        self.end_date = end_date
+        self.frequency = frequency
+        self.term_days = (end_date - start_date).days
+        self._offsets = array('q')
+        self._bitmask = bytearray(max(self.term_days, 0) // 8 + 1)
+        self._last_event_date = start_date
+        # every event up to and including this day offset has been generated
+        self._generated_until = 0 if frequency is not None else self.term_days
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dates(cls, start_date, end_date, dates):
+        """ Creates a fully generated calendar from a list of event dates. Dates outside (start_date, end_date] are ignored.
+        """
+        calendar = cls(start_date, end_date, None)
+        offsets = sorted({(d - start_date).days for d in dates})
+        for offset in offsets:
+            if 0 < offset <= calendar.term_days:
+                calendar._add(offset)
+        return calendar
+
+    def _add(self, offset):
+        self._offsets.append(offset)
+        self._bitmask[offset >> 3] |= 1 << (offset & 7)
+
+    def _generate(self, day):
+        """ Generates events until every event up to `day` (plus the lookahead) is known.
+        """
+        with self._lock:
+            target = min(day + _LOOKAHEAD_DAYS, self.term_days)
+            step = FREQUENCY_STEPS[self.frequency]
+            while self._generated_until < target:
+                next_date = self._last_event_date + step
+                if next_date > self.end_date:
+                    self._generated_until = self.term_days
+                    break
+                offset = (next_date - self.start_date).days
+                self._add(offset)
+                self._last_event_date = next_date
+                self._generated_until = offset
+
+    def __contains__(self, day):
+        if day > self._generated_until:
+            self._generate(day)
+        return 0 <= day <= self.term_days and bool(self._bitmask[day >> 3] & (1 << (day & 7)))
+
+    def next_event(self, day):
+        """ Returns the day offset of the first event after `day`, or None if there is no such event in the term.
+        """
+        while day >= self._generated_until < self.term_days:
+            self._generate(day + 1)
+        position = bisect_right(self._offsets, day)
+        if position < len(self._offsets):
+            return self._offsets[position]
+        return None
+
+    def offsets(self):
+        """ Returns the day offsets of all events in the term as an array of int64.
+        """
+        if self._generated_until < self.term_days:
+            self._generate(self.term_days)
+        return self._offsets
+
+    def dates(self):
+        """ Returns all event dates in the term as a list of datetime objects.
+        """
+        return [self.start_date + timedelta(days=offset) for offset in self.offsets()]
+
+
+@lru_cache(maxsize=CALENDAR_CACHE_SIZE)
+def get_event_calendar(start_date, years: int, months: int, frequency: str):
+    """
+    Returns the (shared) event calendar of a loan term. Calendars are memoized in a bounded LRU cache keyed on
+    (start_date, years, months, frequency), since many loans share settlement days and frequencies.
+
+    Args:
+        start_date (datetime): The settlement date.
+        years (int): The loan term in years.
+        months (int): Additional loan term in months.
+        frequency (str): The frequency of events ('daily', 'weekly', 'fortnightly', 'monthly', 'quarterly', 'annually').
+
+    Returns:
+        EventCalendar: The calendar of events after the settlement date.
+    """
+    end_date = start_date + relativedelta(years=years, months=months)
+    return EventCalendar(start_date, end_date, frequency)
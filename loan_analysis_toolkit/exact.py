@@ -0,0 +1,175 @@
+import math
+from fractions import Fraction
+from .instrumentation import record
+from .transactions import (TransactionBuffer, SummarizingTransactionBuffer, TRANSACTION_OUTPUTS, convert_transactions,
+                           day_number, SETTLEMENT, INTEREST_CHARGED,
+                           OFFSET_CONTRIBUTION, REPAYMENT, EXTRA_REPAYMENT)
+
+# rounding rules applied when accrued interest is charged, named after the `decimal` module's rounding modes.
+# Amounts are never negative, so 'down' rounds towards zero and 'up' away from it.
+ROUNDING_RULES = ('half_even', 'half_up', 'half_down', 'down', 'up')
+
+# interest accrues in micro-cents (millionths of a cent) and is rounded to cents when it is charged
+MICRO_CENTS_PER_CENT = 1_000_000
+_MICRO_CENTS_PER_DOLLAR = 100 * MICRO_CENTS_PER_CENT
+
+
+def _divide(numerator: int, denominator: int, rounding: str):
+    """ Returns numerator / denominator rounded to an integer with a rounding rule. Both must be non-negative.
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    if remainder == 0 or rounding == 'down':
+        return quotient
+    if rounding == 'up':
+        return quotient + 1
+    twice_remainder = 2 * remainder
+    if twice_remainder > denominator:
+        return quotient + 1
+    if twice_remainder == denominator and (rounding == 'half_up' or (rounding == 'half_even' and quotient % 2)):
+        return quotient + 1
+    return quotient
+
+
+def to_cents(amount: float):
+    """ Returns a dollar amount as whole cents, e.g. 0.29 -> 29.
+    """
+    return round(amount * 100)
+
+
+def _daily_interest_fraction(annual_rate):
+    """ Returns the numerator and denominator of the daily interest in micro-cents per cent of chargeable balance,
+    rate / 100 / 365 * MICRO_CENTS_PER_CENT, with the rate as an exact fraction.
+    """
+    rate = Fraction(repr(float(annual_rate)))
+    return rate.numerator * MICRO_CENTS_PER_CENT, rate.denominator * 100 * 365
+
+
+def _repayment_cents(repayment: float):
+    """ Returns a repayment rounded up to the next cent, so that the loan is repaid within its term. The small error of
+    the float PMT is rounded away first.
+    """
+    return math.ceil(round(repayment * 100, 6))
+
+
+def _exact_transactions_between_events(start_date, last_day, loan_amount, annual_rate, initial_offset_amount,
+                                       minimum_repayments, interest_calendar, offset_calendar, repayment_calendar,
+                                       extra_calendar, offset_contribution_regular_amount, extra_repayments_regular_amount,
+                                       capture_interest_accrual, rounding='half_even', monthly_summary=False,
+                                       rate_timeline=None):
+    """ Event-driven schedule engine keeping money as integer cents, on `EventCalendar` day offsets.
+
+    Balances and payments are int cents and interest accrues as int micro-cents: the daily interest on the
+    interest-chargeable balance is rounded half-even to a micro-cent, and the interest accrued over a month is
+    rounded to cents with `rounding` when it is charged. The rounding remainder is not carried over, as banks
+    don't charge it. The minimum repayment is rounded up to the next cent. The loan is paid off when its balance
+    reaches exactly zero. The changes of `rate_timeline` apply as in the event-driven engine, and changed repayments
+    are rounded up to the next cent as well.
+
+    Returns:
+        TransactionBuffer: the transactions, with amounts in dollars (cents / 100); `to_cents` recovers exact cents.
+    """
+    if rounding not in ROUNDING_RULES:
+        raise ValueError(f"Invalid rounding. Choose {', '.join(repr(rule) for rule in ROUNDING_RULES)}.")
+    interest_numerator, interest_denominator = _daily_interest_fraction(annual_rate)
+
+    loan_balance = to_cents(loan_amount)
+    offset_balance = to_cents(initial_offset_amount)
+    offset_contribution = to_cents(offset_contribution_regular_amount)
+    extra_repayment_amount = to_cents(extra_repayments_regular_amount)
+    repayment = _repayment_cents(minimum_repayments)
+
+    transactions = SummarizingTransactionBuffer() if monthly_summary else TransactionBuffer()
+    start_day = day_number(start_date)
+    transactions.append(start_day, SETTLEMENT, loan_balance / 100, loan_balance / 100, offset_balance / 100)
+
+    calendars = (interest_calendar, offset_calendar, repayment_calendar, extra_calendar)
+    if rate_timeline is not None:
+        calendars += (rate_timeline.calendar,)
+    accrued_interest = 0  # micro-cents
+    stop_day = 1 if loan_balance <= 0 else last_day
+    previous_day = 0
+    if rate_timeline is not None and previous_day in rate_timeline.changes:
+        annual_rate, new_repayment = rate_timeline.apply(previous_day, loan_balance / 100, repayment / 100)
+        interest_numerator, interest_denominator = _daily_interest_fraction(annual_rate)
+        repayment = _repayment_cents(new_repayment)
+    iterations = 0
+    while previous_day < stop_day:
+        iterations += 1
+        day = stop_day
+        for calendar in calendars:
+            event_day = calendar.next_event(previous_day)
+            if event_day is not None and event_day < day:
+                day = event_day
+        repayment = min(repayment, loan_balance)  # to ensure we don't pay more than the remaining loan balance
+        chargeable = loan_balance - offset_balance
+        daily_interest = _divide(chargeable * interest_numerator, interest_denominator, 'half_even') if chargeable > 0 else 0
+        if capture_interest_accrual:
+            transactions.accrue(start_day + previous_day + 1, daily_interest, day - previous_day, accrued_interest,
+                                loan_balance / 100, offset_balance / 100, scale=_MICRO_CENTS_PER_DOLLAR)
+        accrued_interest += daily_interest * (day - previous_day)
+        previous_day = day
+
+        c_day = start_day + day
+        if day in interest_calendar:
+            interest = _divide(accrued_interest, MICRO_CENTS_PER_CENT, rounding)
+            loan_balance += interest
+            transactions.append(c_day, INTEREST_CHARGED, interest / 100, loan_balance / 100, offset_balance / 100)
+            accrued_interest = 0
+        if day in offset_calendar:
+            offset_balance += offset_contribution
+            transactions.append(c_day, OFFSET_CONTRIBUTION, offset_contribution / 100, loan_balance / 100, offset_balance / 100)
+        if day in repayment_calendar:
+            loan_balance -= repayment
+            transactions.append(c_day, REPAYMENT, repayment / 100, loan_balance / 100, offset_balance / 100)
+        if day in extra_calendar:
+            extra_repayment = min(extra_repayment_amount, loan_balance)  # to ensure we don't pay more than the remaining loan balance
+            loan_balance -= extra_repayment
+            transactions.append(c_day, EXTRA_REPAYMENT, extra_repayment / 100, loan_balance / 100, offset_balance / 100)
+
+        if loan_balance <= 0:
+            break
+
+        if rate_timeline is not None and day in rate_timeline.calendar:
+            annual_rate, new_repayment = rate_timeline.apply(day, loan_balance / 100, repayment / 100)
+            interest_numerator, interest_denominator = _daily_interest_fraction(annual_rate)
+            repayment = _repayment_cents(new_repayment)
+
+    record('schedule', iterations=iterations, rows=len(transactions))
+    return transactions
+
+
+def generate_exact_transactions(loan_params: dict, rounding: str = 'half_even', output: str = 'pandas',
+                                validate: bool = True):
+    """ Generates the transactions of a loan with exact integer-cent arithmetic, e.g. to reconcile them against a bank
+    statement with `reconcile_statement`.
+
+    Balances and payments are kept as integer cents and interest accrues daily in micro-cents, so there is no
+    floating point drift over the term. The interest accrued over a month is rounded to cents with `rounding` when
+    it is charged, and the minimum repayment is rounded up to the next cent. Results differ from the float engines
+    by these roundings only.
+
+    Args:
+        loan_params (dict): loan parameters, as described in `prepare_loan_summary`.
+        rounding (str): rounding rule of interest charges: "half_even" (banker's rounding), "half_up", "half_down",
+            "down" (truncate) or "up". Default is "half_even".
+        output (str): "pandas" returns a DataFrame, "arrow" a pyarrow Table and "buffer" a `TransactionBuffer`. Default is "pandas".
+        validate (bool): whether to validate `loan_params`. Default is True.
+
+    Returns:
+        pd.DataFrame: the transactions, with the columns of `generate_loan_transactions` and amounts in dollars.
+        `round(amount * 100)` gives the exact cents.
+    """
+    from .schedule import _validate_loan_params, _prepare_event_engine
+    if validate:
+        _validate_loan_params(loan_params)
+    if output not in TRANSACTION_OUTPUTS:
+        raise ValueError("Invalid output. Choose 'pandas', 'arrow' or 'buffer'.")
+
+    start_date, last_day, minimum_repayments, calendars = _prepare_event_engine(loan_params)
+    transactions = _exact_transactions_between_events(start_date, last_day, loan_params['loan_amount'],
+                                                      loan_params['annual_rate'], loan_params['initial_offset_amount'],
+                                                      minimum_repayments, *calendars,
+                                                      loan_params['offset_contribution_regular_amount'],
+                                                      loan_params['extra_repayments_regular_amount'],
+                                                      loan_params.get('capture_interest_accrual', False), rounding)
+    return convert_transactions(transactions, output)
@@ -0,0 +1,107 @@
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import threading
+import time
+
+# counters kept for every stage
+STAGE_COUNTERS = ('calls', 'seconds', 'iterations', 'rows', 'bytes_written')
+
+# metrics collected by the innermost `collect_metrics` block of the current thread or task, None when disabled
+_active_metrics = ContextVar('loan_analysis_toolkit_metrics', default=None)
+
+# returned by `stage` when metrics are disabled, so an uninstrumented call only costs a context variable lookup
+_NO_STAGE = nullcontext()
+
+
+class Metrics:
+    """
+    Per-stage wall time and counters of the schedule pipeline: number of calls, seconds, loop iterations, rows
+    emitted and bytes written. Metrics keep adding up across calls, so one object can collect a whole batch job,
+    and objects collected separately (e.g. by worker processes) can be combined with `merge`.
+
+    Stages recorded by `prepare_loan_summary` are 'validation', 'dates' (event calendars and dates), 'schedule'
+    (the daily loop or event-driven engine), 'dataframe', 'monthly_summary', 'csv' and, with a `ResultCache`, 'cache'.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, calls=0, seconds=0.0, iterations=0, rows=0, bytes_written=0):
+        """ Adds to the counters of a stage.
+        """
+        with self._lock:
+            stage = self.stages.setdefault(name, dict.fromkeys(STAGE_COUNTERS, 0))
+            stage['calls'] += calls
+            stage['seconds'] += seconds
+            stage['iterations'] += iterations
+            stage['rows'] += rows
+            stage['bytes_written'] += bytes_written
+
+    @contextmanager
+    def stage(self, name):
+        """ Context manager recording one call of a stage and its wall time.
+        """
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.add(name, calls=1, seconds=time.perf_counter() - started)
+
+    def merge(self, other):
+        """ Adds the counters of another `Metrics` object, or of its `to_dict()` output, to this one.
+        """
+        stages = other.stages if isinstance(other, Metrics) else other
+        for name, counters in stages.items():
+            self.add(name, **counters)
+        return self
+
+    def to_dict(self):
+        """ Returns the counters as {stage: {counter: value}}, e.g. to send them to a metrics pipeline.
+        """
+        with self._lock:
+            return {name: dict(counters) for name, counters in self.stages.items()}
+
+    def to_frame(self):
+        """ Returns the counters as a DataFrame with one row per stage.
+        """
+        import pandas as pd
+        return pd.DataFrame.from_dict(self.to_dict(), orient='index', columns=list(STAGE_COUNTERS)).rename_axis('stage')
+
+
+@contextmanager
+def collect_metrics(metrics : Metrics = None):
+    """ Records the stages of every call made inside the `with` block, in the current thread or asyncio task.
+
+    Args:
+        metrics (Metrics): metrics to add to, e.g. to aggregate several blocks. Default is a new `Metrics` object.
+
+    Returns:
+        Metrics: the metrics, yielded by the `with` statement.
+
+    Example:
+        with collect_metrics() as metrics:
+            prepare_loan_summary(loan_params)
+        print(metrics.to_frame())
+    """
+    metrics = Metrics() if metrics is None else metrics
+    token = _active_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _active_metrics.reset(token)
+
+
+def stage(name):
+    """ Returns a context manager timing a stage when metrics are being collected, and a no-op one otherwise.
+    """
+    metrics = _active_metrics.get()
+    return _NO_STAGE if metrics is None else metrics.stage(name)
+
+
+def record(name, **counters):
+    """ Adds to the counters of a stage when metrics are being collected.
+    """
+    metrics = _active_metrics.get()
+    if metrics is not None:
+        metrics.add(name, **counters)
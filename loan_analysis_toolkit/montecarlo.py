@@ -0,0 +1,171 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .schedule import (calculate_minimum_repayment, calculate_daily_interest, _loan_calendars, _validate_loan_params,
+                       PAYMENTS_PER_YEAR)
+
+
+def simulate_rate_paths(initial_rate : float, n_paths : int, n_months : int, long_term_rate : float = None,
+                        mean_reversion : float = 0.2, volatility : float = 1.0, seed : int = None):
+    """ Simulates monthly interest rate paths with a mean-reverting (Vasicek) model, floored at 0%.
+
+    Args:
+        initial_rate (float): the rate of the first month, in percentage e.g., 5.4
+        n_paths (int): number of paths.
+        n_months (int): number of months per path.
+        long_term_rate (float): the rate paths revert to, in percentage. Default is `initial_rate`.
+        mean_reversion (float): speed of reversion to `long_term_rate`, per year. Default is 0.2.
+        volatility (float): annualised volatility of the rate, in percentage points. Default is 1.0.
+        seed (int): seed of the random number generator, for reproducible paths. Default is None.
+
+    Returns:
+        np.ndarray: annual rates in percentage, of shape (n_paths, n_months).
+    """
+    if long_term_rate is None:
+        long_term_rate = initial_rate
+    rng = np.random.default_rng(seed)
+    dt = 1 / 12
+    shocks = rng.standard_normal((n_paths, n_months - 1)) * volatility * np.sqrt(dt)
+    rates = np.empty((n_paths, n_months))
+    rates[:, 0] = initial_rate
+    for month in range(1, n_months):
+        previous = rates[:, month - 1]
+        rates[:, month] = np.maximum(previous + mean_reversion * (long_term_rate - previous) * dt + shocks[:, month - 1], 0)
+    return rates
+
+
+def simulate_rate_scenarios(loan_params : dict, rate_paths : np.ndarray = None, n_paths : int = 1000, seed : int = None,
+                            percentiles : tuple = (5, 25, 50, 75, 95)):
+    """ Simulates a loan under many interest rate paths at once and summarises the distribution of total interest,
+    total repayments and payoff date.
+
+    Month `m` of a rate path is the rate charged between the m-th and (m+1)-th interest charge days (month 0 starts
+    at settlement). Whenever the rate of a path changes, its minimum repayment is recalculated with
+    `calculate_minimum_repayment` from the loan balance at the end of the interest charge day and the number of
+    repayments left on the repayment calendar, as for the `rate_changes` of `prepare_loan_summary`, so extra
+    repayments made before a rate change lower the repayments rather than shorten the loan. All paths share the
+    loan's event calendars and are stepped together from one event day to the next with array operations, so the
+    cost grows with the number of events rather than with the number of paths times the number of days.
+
+    Args:
+        loan_params (dict): loan parameters, as described in `prepare_loan_summary`.
+        rate_paths (np.ndarray): annual rates in percentage, of shape (n_paths, n_months). If a path is shorter than
+            the loan term, its last rate applies to the remaining months. Default is paths from `simulate_rate_paths`
+            starting at `annual_rate`.
+        n_paths (int): number of paths simulated when `rate_paths` is not given. Default is 1000.
+        seed (int): seed used when `rate_paths` is not given. Default is None.
+        percentiles (tuple): percentiles to summarise. Default is (5, 25, 50, 75, 95).
+
+    Returns a dictionary containing the following keys:
+        paths: pandas dataframe with total_interest_charged, total_repayments, total_extra_repayments, payoff_date
+            (NaT if the loan is not paid off within its term) and remaining_balance (the loan balance left at the end
+            of the term) of each path.
+        percentiles: pandas dataframe indexed by percentile with the same columns. Payoff dates are taken from
+            simulated paths (no interpolation).
+    """
+    # validate inputs
+    _validate_loan_params(loan_params)
+
+    start_date = datetime.strptime(loan_params['start_date'], '%Y-%m-%d')
+    years, months = loan_params['loan_duration_years'], loan_params['loan_duration_months']
+    term_months = years * 12 + months
+    if rate_paths is None:
+        rate_paths = simulate_rate_paths(loan_params['annual_rate'], n_paths, max(term_months, 1), seed=seed)
+    rate_paths = np.asarray(rate_paths, dtype=np.float64)
+    if rate_paths.ndim != 2 or rate_paths.shape[1] == 0:
+        raise ValueError("rate_paths must be a matrix of shape (n_paths, n_months).")
+    n_paths = rate_paths.shape[0]
+
+    calendars = _loan_calendars(start_date, years, months, loan_params['repayment_frequency'],
+                                loan_params['offset_contribution_frequency'], loan_params['extra_repayments_frequency'])
+    interest_days, offset_days, repayment_days, extra_days = (np.asarray(calendar.offsets(), dtype=np.int64)
+                                                              for calendar in calendars)
+    event_days = np.union1d(np.union1d(interest_days, offset_days), np.union1d(repayment_days, extra_days))
+    event_types = zip(event_days.tolist(), np.isin(event_days, interest_days).tolist(), np.isin(event_days, offset_days).tolist(),
+                      np.isin(event_days, repayment_days).tolist(), np.isin(event_days, extra_days).tolist())
+
+    # results per path
+    total_interest_charged = np.zeros(n_paths)
+    total_repayments = np.zeros(n_paths)
+    total_extra_repayments = np.zeros(n_paths)
+    payoff_day = np.full(n_paths, -1, dtype=np.int64)
+
+    # state of the paths still being simulated, compacted as loans are paid off
+    paths = np.arange(n_paths)
+    balance = np.full(n_paths, float(loan_params['loan_amount']))
+    offset = np.full(n_paths, float(loan_params['initial_offset_amount']))
+    rate = rate_paths[:, 0].copy()
+    repayment = calculate_minimum_repayment(principal=balance, annual_rate=rate, years=years, months=months,
+                                            repayment_frequency=loan_params['repayment_frequency'])
+    accrued_interest = np.zeros(n_paths)
+    frequency = loan_params['repayment_frequency']
+    offset_contribution = loan_params['offset_contribution_regular_amount']
+    extra_repayment_amount = loan_params['extra_repayments_regular_amount']
+    month = 0
+    day = 0
+    for next_day, is_interest_day, is_offset_day, is_repayment_day, is_extra_day in event_types:
+        if not len(paths):
+            break
+        repayment = np.minimum(repayment, balance)  # to ensure we don't pay more than the remaining loan balance
+        daily_interest = np.maximum(calculate_daily_interest(balance - offset, rate), 0)  # to ensure interest is not negative
+        accrued_interest += daily_interest * (next_day - day)
+        day = next_day
+
+        # events of the day, in the same order as the daily loop
+        if is_interest_day:
+            balance += accrued_interest
+            total_interest_charged[paths] += accrued_interest
+            accrued_interest[:] = 0
+            month += 1
+        if is_offset_day:
+            offset += offset_contribution
+        if is_repayment_day:
+            balance -= repayment
+            total_repayments[paths] += repayment
+        if is_extra_day:
+            extra_repayment = np.minimum(extra_repayment_amount, balance)  # to ensure we don't pay more than the remaining loan balance
+            balance -= extra_repayment
+            total_extra_repayments[paths] += extra_repayment
+        if is_interest_day:
+            # a new rate applies from the next day, like a `RateChange` dated the day after the interest charge: the
+            # repayment is recalculated from the balance at the end of the day and the repayments left on the calendar
+            new_rate = rate_paths[paths, min(month, rate_paths.shape[1] - 1)]
+            changed = new_rate != rate
+            repayments_left = len(repayment_days) - np.searchsorted(repayment_days, day, side='right')
+            if changed.any() and repayments_left > 0:
+                changed &= balance > 0
+                repayment[changed] = calculate_minimum_repayment(principal=balance[changed], annual_rate=new_rate[changed],
+                                                                 years=0, months=repayments_left * 12 / PAYMENTS_PER_YEAR[frequency],
+                                                                 repayment_frequency=frequency)
+            rate = new_rate
+
+        paid_off = balance <= 0.01  # small threshold to account for floating point precision
+        if paid_off.any():
+            payoff_day[paths[paid_off]] = day
+            keep = ~paid_off
+            paths, balance, offset, rate, repayment, accrued_interest = (
+                paths[keep], balance[keep], offset[keep], rate[keep], repayment[keep], accrued_interest[keep])
+
+    # balance left at the end of the term by paths that are not paid off
+    remaining_balance = np.zeros(n_paths)
+    remaining_balance[paths] = balance
+
+    payoff_date = np.where(payoff_day >= 0, np.datetime64(start_date.date()) + payoff_day, np.datetime64('NaT'))
+    results = pd.DataFrame({'total_interest_charged': total_interest_charged,
+                            'total_repayments': total_repayments,
+                            'total_extra_repayments': total_extra_repayments,
+                            'payoff_date': payoff_date.astype('datetime64[ns]'),
+                            'remaining_balance': remaining_balance})
+
+    # paths not paid off sort after all payoff dates
+    payoff_rank = np.where(payoff_day >= 0, payoff_day, np.iinfo(np.int64).max)
+    payoff_percentiles = np.percentile(payoff_rank, percentiles, method='lower')
+    summary = pd.DataFrame({'total_interest_charged': np.percentile(total_interest_charged, percentiles),
+                            'total_repayments': np.percentile(total_repayments, percentiles),
+                            'total_extra_repayments': np.percentile(total_extra_repayments, percentiles),
+                            'payoff_date': np.where(payoff_percentiles < np.iinfo(np.int64).max,
+                                                    np.datetime64(start_date.date()) + payoff_percentiles,
+                                                    np.datetime64('NaT')).astype('datetime64[ns]'),
+                            'remaining_balance': np.percentile(remaining_balance, percentiles)},
+                           index=pd.Index(percentiles, name='percentile'))
+    return {'paths': results, 'percentiles': summary}
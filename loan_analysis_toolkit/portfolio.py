@@ -0,0 +1,192 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .schedule import calculate_minimum_repayment, calculate_end_date
+from .event_calendar import get_event_calendar
+from .transactions import (TRANSACTION_TYPES, SETTLEMENT, DAILY_ACCRUAL, MONTHLY_ACCRUAL, INTEREST_CHARGED,
+                           OFFSET_CONTRIBUTION, REPAYMENT, EXTRA_REPAYMENT)
+from .validation import validate_loan_table, _as_frame
+
+# sentinel day offset used once a loan has no more events of a given type
+_NO_MORE_EVENTS = np.iinfo(np.int64).max
+
+
+def _stack_event_offsets(offsets_per_loan):
+    """ Flattens the per-loan event offsets into one array, each loan's offsets followed by a sentinel.
+    Returns the flat array and the position of each loan's first event in it.
+    """
+    flat = np.concatenate([np.append(np.asarray(offsets, dtype=np.int64), _NO_MORE_EVENTS) for offsets in offsets_per_loan])
+    lengths = np.array([len(offsets) + 1 for offsets in offsets_per_loan], dtype=np.int64)
+    first_position = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    return flat, first_position
+
+
+def simulate_portfolio(params_table, return_transactions: bool = False):
+    """ Simulates a portfolio of loans together using NumPy arrays instead of one `prepare_loan_summary` call per loan.
+
+    All loans are stepped in lockstep from one event day to the next, where an event day is a day on which any
+    active loan has an interest charge, repayment, offset contribution or extra repayment. Balances, offsets and
+    accrued interest are held in arrays shaped (n_loans,) and loans drop out of the arrays once they are paid off
+    or reach the end of their term. Results match `generate_loan_transactions` for every loan.
+
+    Args:
+        params_table (pd.DataFrame, pyarrow.Table or list): one row (or dict) per loan, with the same fields as
+            `inputval_prepare_loan_summary`. `capture_interest_accrual` is optional and defaults to False. The whole
+            table is validated by `validate_loan_table` before any loan is simulated.
+        return_transactions (bool): whether to also return all transactions in long format. Default is False.
+
+    Returns a dictionary containing the following keys:
+        loan_totals: pandas dataframe with one row per loan (same index as params_table) containing total_interest_charged,
+            total_repayments, total_extra_repayments and payoff_date (NaT if the loan is not paid off within its term).
+        all_transactions: pandas dataframe with a 'Loan' column holding the params_table index, followed by the columns
+            returned by `generate_loan_transactions`. None unless return_transactions is True.
+    """
+    params = _as_frame(params_table).copy()
+    # validate inputs, reporting every invalid row at once
+    validate_loan_table(params)
+    if 'capture_interest_accrual' not in params.columns:
+        params['capture_interest_accrual'] = False
+    params['capture_interest_accrual'] = params['capture_interest_accrual'].where(params['capture_interest_accrual'].notna(), False)
+
+    n_loans = len(params)
+    loan_ids = params.index.to_numpy()
+    loan_amount = params['loan_amount'].to_numpy(dtype=np.float64)
+    initial_offset_amount = params['initial_offset_amount'].to_numpy(dtype=np.float64)
+    offset_contribution_regular_amount = params['offset_contribution_regular_amount'].to_numpy(dtype=np.float64)
+    extra_repayments_regular_amount = params['extra_repayments_regular_amount'].to_numpy(dtype=np.float64)
+    daily_rate = (params['annual_rate'].to_numpy(dtype=np.float64) / 100) / 365
+    capture_interest_accrual = params['capture_interest_accrual'].to_numpy(dtype=bool) & return_transactions
+
+    # per loan dates and repayment amounts; event calendars are shared between loans with the same start date, term and frequency
+    start_dates, term_days, minimum_repayments = [], [], []
+    interest_offsets, offset_offsets, repayment_offsets, extra_offsets = [], [], [], []
+    for row in params.itertuples(index=False):
+        start_date = datetime.strptime(row.start_date, '%Y-%m-%d')
+        end_date = calculate_end_date(start_date, row.loan_duration_years, row.loan_duration_months)
+        start_dates.append(start_date)
+        term_days.append((end_date - start_date).days)
+        minimum_repayments.append(calculate_minimum_repayment(principal=row.loan_amount,
+                                                              annual_rate=row.annual_rate,
+                                                              years=row.loan_duration_years,
+                                                              months=row.loan_duration_months,
+                                                              repayment_frequency=row.repayment_frequency))
+        for offsets_per_loan, frequency in ((interest_offsets, 'monthly'),
+                                            (offset_offsets, row.offset_contribution_frequency),
+                                            (repayment_offsets, row.repayment_frequency),
+                                            (extra_offsets, row.extra_repayments_frequency)):
+            calendar = get_event_calendar(start_date, row.loan_duration_years, row.loan_duration_months, frequency)
+            offsets_per_loan.append(calendar.offsets())
+
+    # results per loan
+    total_interest_charged = np.zeros(n_loans)
+    total_repayments = np.zeros(n_loans)
+    total_extra_repayments = np.zeros(n_loans)
+    payoff_day = np.full(n_loans, -1, dtype=np.int64)
+
+    chunks = []
+
+    def record(loans, days, transaction_type, amounts, balances, offsets):
+        if return_transactions:
+            chunks.append((loans, np.broadcast_to(days, loans.shape), np.full(len(loans), transaction_type, dtype=np.int8),
+                           amounts.copy(), balances.copy(), offsets.copy()))
+
+    record(np.arange(n_loans), 0, SETTLEMENT, loan_amount, loan_amount, initial_offset_amount)
+
+    # state of the loans still being simulated, compacted as loans finish
+    loans = np.flatnonzero(np.array(term_days, dtype=np.int64) >= 1)
+    balance = loan_amount[loans].copy()
+    offset = initial_offset_amount[loans].copy()
+    repayment = np.array(minimum_repayments, dtype=np.float64)[loans]
+    accrued_interest = np.zeros(len(loans))
+    # last day simulated for each loan; a loan that is already paid off stops after the first day
+    last_day = np.array(term_days, dtype=np.int64)[loans]
+    last_day = np.where(balance <= 0.01, 1, last_day)
+    event_streams = []
+    for offsets_per_loan in (interest_offsets, offset_offsets, repayment_offsets, extra_offsets):
+        flat, first_position = _stack_event_offsets(offsets_per_loan) if n_loans else (np.zeros(0, dtype=np.int64),) * 2
+        position = first_position[loans]
+        event_streams.append([flat, position, flat[position]])
+
+    day = 0
+    while len(loans):
+        next_day = min(last_day.min(), *(next_event.min() for _, _, next_event in event_streams))
+        days_elapsed = next_day - day
+
+        interest_chargeable_amount = balance - offset
+        repayment = np.minimum(repayment, balance)  # to ensure we don't pay more than the remaining loan balance
+        daily_interest = np.maximum(interest_chargeable_amount * daily_rate[loans], 0)  # to ensure interest is not negative
+        capture = capture_interest_accrual[loans]
+        if capture.any():
+            capture_loans = loans[capture]
+            for accrual_day in range(day + 1, next_day + 1):
+                accrued_interest[capture] += daily_interest[capture]
+                record(capture_loans, accrual_day, DAILY_ACCRUAL, daily_interest[capture], balance[capture], offset[capture])
+                record(capture_loans, accrual_day, MONTHLY_ACCRUAL, accrued_interest[capture], balance[capture], offset[capture])
+            accrued_interest[~capture] += daily_interest[~capture] * days_elapsed
+        else:
+            accrued_interest += daily_interest * days_elapsed
+        day = next_day
+
+        # events of the day, in the same order as the daily loop
+        (interest_stream, offset_stream, repayment_stream, extra_stream) = event_streams
+        due = interest_stream[2] == day
+        if due.any():
+            balance[due] += accrued_interest[due]
+            total_interest_charged[loans[due]] += accrued_interest[due]
+            record(loans[due], day, INTEREST_CHARGED, accrued_interest[due], balance[due], offset[due])
+            accrued_interest[due] = 0
+        due_offset = offset_stream[2] == day
+        if due_offset.any():
+            offset[due_offset] += offset_contribution_regular_amount[loans[due_offset]]
+            record(loans[due_offset], day, OFFSET_CONTRIBUTION, offset_contribution_regular_amount[loans[due_offset]],
+                   balance[due_offset], offset[due_offset])
+        due_repayment = repayment_stream[2] == day
+        if due_repayment.any():
+            balance[due_repayment] -= repayment[due_repayment]
+            total_repayments[loans[due_repayment]] += repayment[due_repayment]
+            record(loans[due_repayment], day, REPAYMENT, repayment[due_repayment], balance[due_repayment], offset[due_repayment])
+        due_extra = extra_stream[2] == day
+        if due_extra.any():
+            extra_repayment = np.minimum(extra_repayments_regular_amount[loans[due_extra]], balance[due_extra])  # to ensure we don't pay more than the remaining loan balance
+            balance[due_extra] -= extra_repayment
+            total_extra_repayments[loans[due_extra]] += extra_repayment
+            record(loans[due_extra], day, EXTRA_REPAYMENT, extra_repayment, balance[due_extra], offset[due_extra])
+        for stream in event_streams:
+            due_stream = stream[2] == day
+            stream[1][due_stream] += 1
+            stream[2][due_stream] = stream[0][stream[1][due_stream]]
+
+        # mask out loans that are paid off or reached the end of their term
+        paid_off = balance <= 0.01  # small threshold to account for floating point precision
+        payoff_day[loans[paid_off]] = day
+        finished = paid_off | (last_day == day)
+        if finished.any():
+            keep = ~finished
+            loans, balance, offset, repayment, accrued_interest, last_day = (
+                loans[keep], balance[keep], offset[keep], repayment[keep], accrued_interest[keep], last_day[keep])
+            for stream in event_streams:
+                stream[1], stream[2] = stream[1][keep], stream[2][keep]
+
+    start_days = np.array(start_dates, dtype='datetime64[D]')
+    payoff_date = np.where(payoff_day >= 0, start_days + payoff_day, np.datetime64('NaT'))
+    loan_totals = pd.DataFrame({'total_interest_charged': total_interest_charged,
+                                'total_repayments': total_repayments,
+                                'total_extra_repayments': total_extra_repayments,
+                                'payoff_date': payoff_date.astype('datetime64[ns]')},
+                               index=params.index)
+
+    all_transactions = None
+    if return_transactions:
+        loan, days, types, amounts, balances, offsets = (np.concatenate(column) for column in zip(*chunks))
+        # rows were recorded day by day, so a stable sort by loan keeps each loan's rows in transaction order
+        order = np.argsort(loan, kind='stable')
+        loan, days, types = loan[order], days[order], types[order]
+        all_transactions = pd.DataFrame({
+            'Loan': loan_ids[loan],
+            'Date': (start_days[loan] + days).astype('datetime64[ns]'),
+            'Transaction Type': pd.Categorical.from_codes(types, categories=TRANSACTION_TYPES),
+            'Transaction Amount': amounts[order],
+            'Loan Balance': balances[order],
+            'Offset Balance': offsets[order]})
+
+    return {'loan_totals': loan_totals, 'all_transactions': all_transactions}
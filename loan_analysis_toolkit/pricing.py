@@ -0,0 +1,107 @@
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from .schedule import PAYMENTS_PER_YEAR
+
+# repayment frequencies of a quote grid, in the order of its frequency axis
+QUOTE_FREQUENCIES = ('weekly', 'fortnightly', 'monthly', 'quarterly', 'annual')
+
+# number of annuity factor tables kept by `annuity_factor_table`
+FACTOR_TABLE_CACHE_SIZE = 32
+
+
+def payments_per_year_array(frequencies):
+    """ Returns the number of repayments per year of each frequency of an array, looked up in `PAYMENTS_PER_YEAR`.
+    Each distinct frequency is looked up once.
+    """
+    frequencies = np.asarray(frequencies)
+    names, inverse = np.unique(frequencies, return_inverse=True)
+    invalid = [str(name) for name in names if name not in PAYMENTS_PER_YEAR]
+    if invalid:
+        raise ValueError(f"Invalid repayment frequency: {', '.join(invalid)}. Choose 'weekly', 'fortnightly', 'annual', 'monthly', or 'quarterly'.")
+    return np.array([PAYMENTS_PER_YEAR[name] for name in names], dtype=np.int64)[inverse].reshape(frequencies.shape)
+
+
+def annuity_factors(periodic_rate, total_payments_count):
+    """ Returns the repayment per dollar of principal, r(1+r)^n / ((1+r)^n - 1), or 1/n where the rate is zero.
+    Arguments are broadcast against each other.
+
+    Args:
+        periodic_rate (np.ndarray): interest rate per repayment period, as a fraction.
+        total_payments_count (np.ndarray): number of repayments.
+
+    Returns:
+        np.ndarray: the annuity factors.
+    """
+    periodic_rate = np.asarray(periodic_rate, dtype=np.float64)
+    total_payments_count = np.asarray(total_payments_count, dtype=np.float64)
+    growth = (1 + periodic_rate) ** total_payments_count
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(periodic_rate == 0, 1 / total_payments_count, periodic_rate * growth / (growth - 1))
+
+
+@lru_cache(maxsize=FACTOR_TABLE_CACHE_SIZE)
+def _annuity_factor_table(annual_rates, term_months, frequencies):
+    payments_per_year = payments_per_year_array(frequencies)
+    periodic_rate = np.array(annual_rates)[:, None, None] / 100 / payments_per_year
+    total_payments_count = payments_per_year * (np.array(term_months)[:, None] / 12)
+    table = annuity_factors(periodic_rate, total_payments_count)
+    table.flags.writeable = False  # shared between callers
+    return table
+
+
+def annuity_factor_table(annual_rates, term_months, frequencies=QUOTE_FREQUENCIES):
+    """ Returns the annuity factors of every rate, term and frequency of a quote grid. Tables are memoized for the
+    last `FACTOR_TABLE_CACHE_SIZE` distinct grids, so a grid shown again is a lookup instead of a recalculation.
+
+    Args:
+        annual_rates (array-like): annual interest rates in percent, e.g. [5.0, 5.25].
+        term_months (array-like): loan terms in months, e.g. [300, 360].
+        frequencies (sequence): repayment frequencies. Default is `QUOTE_FREQUENCIES`.
+
+    Returns:
+        np.ndarray: read-only array shaped (rates, terms, frequencies) of repayments per dollar of principal.
+    """
+    return _annuity_factor_table(tuple(np.asarray(annual_rates, dtype=np.float64).ravel().tolist()),
+                                 tuple(np.asarray(term_months, dtype=np.float64).ravel().tolist()),
+                                 tuple(frequencies))
+
+
+def quote_grid(principals, annual_rates, term_months, frequencies=QUOTE_FREQUENCIES, output: str = 'pandas'):
+    """ Prices the minimum repayment of every principal, rate, term and frequency of a quote grid at once.
+
+    Repayments are principals times the factors of `annuity_factor_table`, which are memoized, so the PMT formula
+    is only evaluated the first time a rate grid is priced. Repayments equal those of `calculate_minimum_repayment`
+    to within floating point rounding.
+
+    Args:
+        principals (array-like): loan amounts, e.g. the principal bands of a quote screen.
+        annual_rates (array-like): annual interest rates in percent.
+        term_months (array-like): loan terms in months (years * 12 + months).
+        frequencies (sequence): distinct repayment frequencies. Default is `QUOTE_FREQUENCIES`.
+        output (str): "pandas" returns a long DataFrame with principal, annual_rate, term_months, frequency and
+            repayment columns; "numpy" returns the array shaped (principals, rates, terms, frequencies). Default is "pandas".
+
+    Returns:
+        pd.DataFrame or np.ndarray: the repayments per period.
+    """
+    if output not in ('pandas', 'numpy'):
+        raise ValueError("Invalid output. Choose 'pandas' or 'numpy'.")
+    principals = np.asarray(principals, dtype=np.float64).ravel()
+    annual_rates = np.asarray(annual_rates, dtype=np.float64).ravel()
+    term_months = np.asarray(term_months, dtype=np.float64).ravel()
+    frequencies = tuple(frequencies)
+    duplicated = sorted({frequency for frequency in frequencies if frequencies.count(frequency) > 1})
+    if duplicated:
+        raise ValueError(f"Duplicate repayment frequency: {', '.join(map(str, duplicated))}. List each frequency once.")
+    repayments = principals[:, None, None, None] * annuity_factor_table(annual_rates, term_months, frequencies)
+    if output == 'numpy':
+        return repayments
+
+    shape = repayments.shape
+    index = np.indices(shape).reshape(len(shape), -1)
+    return pd.DataFrame({'principal': principals[index[0]],
+                         'annual_rate': annual_rates[index[1]],
+                         'term_months': term_months[index[2]],
+                         'frequency': pd.Categorical.from_codes(index[3], categories=list(frequencies)),
+                         'repayment': repayments.ravel()})
@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import pandas as pd
+from .transactions import TRANSACTION_TYPES
+
+# columns of the report returned by `reconcile_statement`
+RECONCILIATION_COLUMNS = ('Date', 'Transaction Type', 'Statement Amount', 'Expected Amount', 'Difference', 'Issue')
+
+# a transaction's merge key is (day * 8 + type code) << _OCCURRENCE_BITS + its occurrence among transactions of the
+# same date and type, so that keys are unique and duplicates are paired in order
+_OCCURRENCE_BITS = 20
+
+
+def _merge_keys(transactions: pd.DataFrame, type_names=None):
+    """ Returns the transactions sorted by date and type, and their merge keys. Already sorted transactions are
+    not reordered, so this is linear in their number.
+    """
+    types = transactions['Transaction Type']
+    if type_names:
+        types = types.map(lambda name: type_names.get(name, name))
+    codes = pd.Categorical(types, categories=TRANSACTION_TYPES).codes.astype(np.int64)
+    if (codes < 0).any():
+        unknown = sorted(set(types[codes < 0].astype(str)))
+        raise ValueError(f"Unknown transaction types: {', '.join(unknown)}. Map them to {TRANSACTION_TYPES} with `type_names`.")
+    days = pd.to_datetime(transactions['Date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+    base = days * 8 + codes
+    if np.any(base[1:] < base[:-1]):
+        order = np.argsort(base, kind='stable')
+        transactions, base = transactions.iloc[order], base[order]
+    # position of each transaction among the transactions of the same date and type
+    first = np.flatnonzero(np.r_[True, base[1:] != base[:-1]]) if len(base) else np.zeros(0, dtype=np.int64)
+    occurrence = np.arange(len(base)) - np.repeat(first, np.diff(np.r_[first, len(base)]))
+    if len(occurrence) and occurrence.max() >= 1 << _OCCURRENCE_BITS:
+        raise ValueError(f"Too many transactions of the same date and type. At most {1 << _OCCURRENCE_BITS} can be reconciled.")
+    return transactions, (base << _OCCURRENCE_BITS) + occurrence
+
+
+def _cents(values, description):
+    """ Returns amounts in whole cents. Raises a ValueError naming `description` if an amount is missing. """
+    values = np.asarray(values, dtype=np.float64)
+    missing = ~np.isfinite(values)
+    if missing.any():
+        raise ValueError(f"{missing.sum()} missing or infinite amount(s) in {description}.")
+    return np.rint(values * 100).astype(np.int64)
+
+
+def reconcile_statement(statement, transactions: pd.DataFrame, type_names: dict = None, tolerance_cents: int = 0,
+                        compare_balances: bool = False):
+    """ Matches a bank statement against generated transactions by date and transaction type and reports the differences.
+
+    Both sides are sorted by date and type (already sorted input is left as is) and merge-joined in one linear pass.
+    Several transactions of the same date and type are paired in order. Amounts are compared in whole cents, so
+    transactions from `generate_exact_transactions` reconcile exactly against a statement.
+
+    Args:
+        statement (str | os.PathLike | pd.DataFrame): the bank statement, as a CSV file or DataFrame with 'Date',
+            'Transaction Type' and 'Transaction Amount' columns, and 'Loan Balance' to compare balances.
+            Only these columns are read from a CSV file. Every transaction must have an amount; rows without a
+            balance are not compared.
+        transactions (pd.DataFrame): the expected transactions, e.g. from `generate_exact_transactions`. Generate
+            them without interest accruals unless the statement lists accruals too.
+        type_names (dict): maps the statement's transaction type names to the names of `TRANSACTION_TYPES`,
+            e.g. {'Interest': 'Interest Charged'}. Default is None (the statement uses the same names).
+        tolerance_cents (int): largest difference in cents that still counts as a match. Default is 0.
+        compare_balances (bool): whether to also compare the loan balance after each matched transaction. Default is False.
+
+    Returns:
+        pd.DataFrame: one row per difference, in date order, with the date, transaction type, statement amount,
+        expected amount, difference (statement minus expected) and issue: "missing from statement", "not expected",
+        "amount mismatch" or "balance mismatch" (the amounts are then the loan balances). Empty if the statement reconciles.
+    """
+    wanted = ['Date', 'Transaction Type', 'Transaction Amount'] + (['Loan Balance'] if compare_balances else [])
+    if isinstance(statement, (str, os.PathLike)):
+        statement = pd.read_csv(statement, usecols=lambda column: column in wanted)
+    missing = [column for column in wanted if column not in statement.columns]
+    if missing:
+        raise ValueError(f"Missing statement columns: {', '.join(missing)}.")
+
+    statement, statement_keys = _merge_keys(statement, type_names)
+    transactions, expected_keys = _merge_keys(transactions)
+    keys, statement_index, expected_index = pd.Index(statement_keys).join(pd.Index(expected_keys), how='outer',
+                                                                          return_indexers=True)
+    keys = keys.to_numpy()
+    # the indexers are None when the keys of a side are exactly the joined keys
+    statement_index = np.arange(len(keys)) if statement_index is None else statement_index
+    expected_index = np.arange(len(keys)) if expected_index is None else expected_index
+    in_statement, expected = statement_index >= 0, expected_index >= 0
+
+    statement_cents = np.zeros(len(keys), dtype=np.int64)
+    expected_cents = np.zeros(len(keys), dtype=np.int64)
+    statement_cents[in_statement] = _cents(statement['Transaction Amount'].to_numpy(), "the statement's 'Transaction Amount'")[statement_index[in_statement]]
+    expected_cents[expected] = _cents(transactions['Transaction Amount'].to_numpy(), "the transactions' 'Transaction Amount'")[expected_index[expected]]
+    matched = in_statement & expected
+    issue = np.full(len(keys), '', dtype=object)
+    issue[matched & (np.abs(statement_cents - expected_cents) > tolerance_cents)] = 'amount mismatch'
+    if compare_balances:
+        statement_balance = np.zeros(len(keys), dtype=np.int64)
+        expected_balance = np.zeros(len(keys), dtype=np.int64)
+        statement_balances = statement['Loan Balance'].to_numpy(dtype=np.float64)
+        # statement rows without a balance are not compared
+        has_balance = np.zeros(len(keys), dtype=bool)
+        has_balance[in_statement] = ~np.isnan(statement_balances)[statement_index[in_statement]]
+        statement_balance[in_statement] = _cents(np.where(np.isnan(statement_balances), 0, statement_balances), "the statement's 'Loan Balance'")[statement_index[in_statement]]
+        expected_balance[expected] = _cents(transactions['Loan Balance'].to_numpy(), "the transactions' 'Loan Balance'")[expected_index[expected]]
+        balance_mismatch = matched & has_balance & (issue == '') & (np.abs(statement_balance - expected_balance) > tolerance_cents)
+        issue[balance_mismatch] = 'balance mismatch'
+        statement_cents[balance_mismatch] = statement_balance[balance_mismatch]
+        expected_cents[balance_mismatch] = expected_balance[balance_mismatch]
+    issue[in_statement & ~expected] = 'not expected'
+    issue[expected & ~in_statement] = 'missing from statement'
+
+    rows = np.flatnonzero(issue != '')
+    base = keys[rows] >> _OCCURRENCE_BITS
+    statement_amount = np.where(in_statement[rows], statement_cents[rows] / 100, np.nan)
+    expected_amount = np.where(expected[rows], expected_cents[rows] / 100, np.nan)
+    return pd.DataFrame({'Date': (base // 8).astype('datetime64[D]').astype('datetime64[ns]'),
+                         'Transaction Type': pd.Categorical.from_codes(base % 8, categories=TRANSACTION_TYPES),
+                         'Statement Amount': statement_amount,
+                         'Expected Amount': expected_amount,
+                         'Difference': (statement_cents[rows] - expected_cents[rows]) / 100,
+                         'Issue': issue[rows]},
+                        columns=list(RECONCILIATION_COLUMNS))
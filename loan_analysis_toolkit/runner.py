@@ -0,0 +1,239 @@
+import argparse
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, as_completed, wait
+import pandas as pd
+from .schedule import prepare_loan_summary, SCHEDULE_ENGINES
+from .validation import validate_loan_table, LoanParameterError, _as_frame
+
+# sub-directories of the output directory holding one Parquet file per chunk of loans, and the per-loan totals file
+TRANSACTIONS_DIR = 'transactions'
+MONTHLY_SUMMARY_DIR = 'monthly_summary'
+LOAN_TOTALS_FILE = 'loan_totals.parquet'
+
+
+def _iter_loan_batches(params_table, batch_size):
+    """ Yields the loans of a table as DataFrames of at most `batch_size` rows, reading files batch by batch so that
+    only one batch of a `.csv` or `.parquet` file is held at a time. Rows keep their index labels, or are numbered
+    from 0 in input order for files and tables without one.
+
+    Args:
+        params_table (pd.DataFrame, pyarrow.Table, list, str or os.PathLike): one row (or dict) per loan, or a `.csv`
+            or `.parquet` file of them.
+        batch_size (int): maximum number of loans per batch.
+    """
+    if isinstance(params_table, (str, os.PathLike)):
+        extension = os.path.splitext(os.fspath(params_table))[1].lower()
+        if extension == '.csv':
+            # the row index carries on from one chunk to the next
+            yield from pd.read_csv(params_table, dtype={'start_date': str}, chunksize=batch_size)
+        elif extension in ('.parquet', '.pq'):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("pyarrow is required to read Parquet files. Install it with `pip install pyarrow`.") from e
+            start = 0
+            for batch in pq.ParquetFile(params_table).iter_batches(batch_size=batch_size):
+                batch = batch.to_pandas()
+                batch.index = pd.RangeIndex(start, start + len(batch))
+                start += len(batch)
+                yield batch
+        else:
+            raise ValueError("Invalid input file. Use a '.csv' or '.parquet' file.")
+    elif isinstance(params_table, pd.DataFrame):
+        for start in range(0, len(params_table), batch_size):
+            yield params_table.iloc[start:start + batch_size]
+    else:
+        if hasattr(params_table, 'slice'):  # pyarrow Table
+            n_rows = params_table.num_rows
+        else:
+            params_table = list(params_table)
+            n_rows = len(params_table)
+        for start in range(0, n_rows, batch_size):
+            rows = params_table.slice(start, batch_size) if hasattr(params_table, 'slice') else params_table[start:start + batch_size]
+            batch = _as_frame(rows)
+            batch.index = pd.RangeIndex(start, start + len(batch))
+            yield batch
+
+
+def _validate_in_batches(params_table, batch_size, id_column=None):
+    """ Validates a table of loans with `validate_loan_table` one batch at a time, and raises `LoanParameterError`
+    with the invalid values of every batch at once. Loan ids in `id_column`, if the table has it, must be unique.
+    """
+    errors = []
+    loan_ids = set()
+    for batch in _iter_loan_batches(params_table, batch_size):
+        if id_column is not None and id_column in batch.columns:
+            batch_ids = batch[id_column]
+            if batch_ids.duplicated().any() or not loan_ids.isdisjoint(batch_ids):
+                raise ValueError(f"Duplicate loan ids in column '{id_column}'.")
+            loan_ids.update(batch_ids)
+        batch_errors = validate_loan_table(batch, raise_errors=False)
+        if len(batch_errors):
+            errors.append(batch_errors)
+    if errors:
+        raise LoanParameterError(pd.concat(errors, ignore_index=True))
+
+
+def _loan_chunks(input_path, chunk_size, id_column):
+    """ Yields the loans of a file in chunks of at most `chunk_size` (loan id, loan parameters dict) pairs, reading
+    one chunk at a time. Loans are numbered from 0 in input order if the file has no `id_column`.
+    """
+    for batch in _iter_loan_batches(input_path, chunk_size):
+        if id_column in batch.columns:
+            loan_ids = batch[id_column].tolist()
+            batch = batch.drop(columns=id_column)
+        else:
+            loan_ids = batch.index.tolist()
+        if 'capture_interest_accrual' in batch.columns:
+            batch = batch.assign(capture_interest_accrual=batch['capture_interest_accrual'].where(batch['capture_interest_accrual'].notna(), False).astype(bool))
+        yield list(zip(loan_ids, batch.to_dict('records')))
+
+
+def _imap_bounded(executor, function, tasks, window):
+    """ Runs `function(*task)` on `executor` for each task of the iterable `tasks`, and yields (task number, result)
+    pairs as the tasks complete. At most `window` tasks are submitted and not yet yielded at any time, and the next
+    task is only drawn from `tasks` once fewer than `window` are, so tasks are read as the results are consumed.
+    """
+    pending = {}
+    for number, task in enumerate(tasks):
+        pending[executor.submit(function, *task)] = number
+        if len(pending) >= window:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    for future in as_completed(pending):
+        yield pending[future], future.result()
+
+
+def _part_name(chunk_number):
+    return f'part-{chunk_number:05d}.parquet'
+
+
+def _run_chunk(chunk_number, loans, output_dir, engine):
+    """ Runs `prepare_loan_summary` for a chunk of already validated loans and writes their transactions and monthly
+    summaries as one Parquet file each. Runs in a worker process.
+
+    Args:
+        chunk_number (int): number of the chunk, used to name its files.
+        loans (list): (loan id, loan parameters dict) pairs.
+        output_dir (str): directory written by `run_portfolio`.
+        engine (str): the schedule engine, "daily", "event" or "exact".
+
+    Returns:
+        list: (loan id, total interest charged, total repayments, number of transactions) for each loan.
+    """
+    transactions, monthly_summaries, totals = [], [], []
+    for loan_id, loan_params in loans:
+        result = prepare_loan_summary(loan_params, engine=engine, summarize_in_engine=True, validate=False)
+        transactions.append(result['all_transactions'].assign(loan_id=loan_id))
+        monthly_summary = result['monthly_summary']
+        monthly_summaries.append(monthly_summary.assign(MONTH=monthly_summary['MONTH'].dt.to_timestamp(), loan_id=loan_id))
+        totals.append((loan_id, result['total_interest_charged'], result['total_repayments'], len(result['all_transactions'])))
+
+    part = _part_name(chunk_number)
+    for frames, directory in ((transactions, TRANSACTIONS_DIR), (monthly_summaries, MONTHLY_SUMMARY_DIR)):
+        frame = pd.concat(frames, ignore_index=True)
+        # loan id first, so each file reads as a long-format table
+        frame = frame[['loan_id'] + [column for column in frame.columns if column != 'loan_id']]
+        frame.to_parquet(os.path.join(output_dir, directory, part), index=False)
+    return totals
+
+
+def run_portfolio(input_path, output_dir, workers: int = None, chunk_size: int = 100, engine: str = 'event',
+                  id_column: str = 'loan_id', overwrite: bool = False):
+    """ Runs `prepare_loan_summary` for every loan of a CSV or Parquet file on a pool of worker processes and writes
+    the results as Parquet.
+
+    The whole table is validated with `validate_loan_table` before any loan is run, reading it in chunks of
+    `chunk_size` loans. The file is then read again chunk by chunk, and each chunk is sent to a worker as a single
+    task, so the cost of passing data between processes is paid once per chunk. At most twice as many chunks as
+    workers are in flight at a time, so only those chunks of the table are held in memory. Workers write the
+    transactions and monthly summaries of their chunk directly to `output_dir`; only the totals of each loan are
+    sent back. Requires pyarrow.
+
+    The output directory contains:
+        transactions/part-NNNNN.parquet: the transactions of each chunk, with a `loan_id` column followed by the
+            columns of `generate_loan_transactions`.
+        monthly_summary/part-NNNNN.parquet: the monthly summaries of each chunk, with a `loan_id` column followed by
+            the columns of `create_monthly_summary` (MONTH as the first day of the month).
+        loan_totals.parquet: one row per loan, in input order, with loan_id, total_interest_charged, total_repayments
+            and n_transactions.
+    Each directory can be read as one table, e.g. with `pd.read_parquet(os.path.join(output_dir, 'transactions'))`.
+
+    Args:
+        input_path (str | os.PathLike): `.csv` or `.parquet` file with one row per loan and the fields of
+            `prepare_loan_summary`. `capture_interest_accrual` is optional.
+        output_dir (str | os.PathLike): directory to write the results to. Created if it doesn't exist.
+        workers (int): number of worker processes. 1 runs every chunk in the current process. Default is the number of CPUs.
+        chunk_size (int): maximum number of loans per task. Default is 100.
+        engine (str): the schedule engine, "daily", "event" or "exact". See `create_amortization_schedule`. Default is "event".
+        id_column (str): column identifying each loan. If the table has no such column, loans are numbered from 0 in
+            input order. Default is "loan_id".
+        overwrite (bool): whether to replace the results of a previous run in `output_dir`. Otherwise a
+            `FileExistsError` is raised, since leftover part files would be read as part of the new results. Default is False.
+
+    Returns:
+        pd.DataFrame: the per-loan totals, as written to `loan_totals.parquet`.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("pyarrow is required to write portfolio results to Parquet. Install it with `pip install pyarrow`.") from e
+    if engine not in SCHEDULE_ENGINES:
+        raise ValueError("Invalid engine. Choose 'daily', 'event' or 'exact'.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be a positive integer.")
+
+    # validate inputs before any loan is run, reporting every invalid row at once
+    _validate_in_batches(input_path, chunk_size, id_column=id_column)
+
+    output_dir = os.fspath(output_dir)
+    result_paths = [os.path.join(output_dir, name) for name in (TRANSACTIONS_DIR, MONTHLY_SUMMARY_DIR, LOAN_TOTALS_FILE)]
+    existing = [path for path in result_paths if os.path.exists(path)]
+    if existing and not overwrite:
+        raise FileExistsError(f"{output_dir} already contains portfolio results. Pass overwrite=True to replace them.")
+    for path in existing:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    for directory in (TRANSACTIONS_DIR, MONTHLY_SUMMARY_DIR):
+        os.makedirs(os.path.join(output_dir, directory))
+
+    tasks = ((number, chunk, output_dir, engine) for number, chunk in enumerate(_loan_chunks(input_path, chunk_size, id_column)))
+    if workers == 1:
+        totals = dict(enumerate(_run_chunk(*task) for task in tasks))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            totals = dict(_imap_bounded(executor, _run_chunk, tasks, 2 * workers))
+
+    loan_totals = pd.DataFrame([row for number in sorted(totals) for row in totals[number]],
+                               columns=['loan_id', 'total_interest_charged', 'total_repayments', 'n_transactions'])
+    loan_totals.to_parquet(os.path.join(output_dir, LOAN_TOTALS_FILE), index=False)
+    return loan_totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the loan summary of every loan in a CSV or Parquet file and write the results as Parquet.")
+    parser.add_argument('input_path', help="CSV or Parquet file with one row per loan")
+    parser.add_argument('output_dir', help="directory to write the results to")
+    parser.add_argument('--workers', type=int, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--chunk-size', type=int, default=100, help="number of loans per task (default: %(default)s)")
+    parser.add_argument('--engine', choices=SCHEDULE_ENGINES, default='event', help="schedule engine (default: %(default)s)")
+    parser.add_argument('--id-column', default='loan_id', help="column identifying each loan (default: %(default)s)")
+    parser.add_argument('--overwrite', action='store_true', help="replace the results of a previous run")
+    args = parser.parse_args(argv)
+
+    loan_totals = run_portfolio(args.input_path, args.output_dir, workers=args.workers, chunk_size=args.chunk_size,
+                                engine=args.engine, id_column=args.id_column, overwrite=args.overwrite)
+    print(f"Wrote the results of {len(loan_totals)} loans to {args.output_dir}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
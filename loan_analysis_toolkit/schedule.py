@@ -1,7 +1,43 @@
-from datetime import datetime, timedelta
+import os
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, NamedTuple, Optional, Union
 from dateutil.relativedelta import relativedelta
-import pandas as pd
-from .utils import inputval_prepare_loan_summary
+from .event_calendar import EventCalendar, get_event_calendar
+from .instrumentation import stage, record
+from .transactions import (TransactionBuffer, SummarizingTransactionBuffer, MonthlySummary, TRANSACTION_OUTPUTS,
+                           convert_transactions, day_number, monthly_summary_frame,
+                           SETTLEMENT, INTEREST_CHARGED,
+                           OFFSET_CONTRIBUTION, REPAYMENT, EXTRA_REPAYMENT)
+
+# number of repayments per year of each repayment frequency
+PAYMENTS_PER_YEAR = {'annual': 1, 'monthly': 12, 'fortnightly': 26, 'weekly': 52, 'quarterly': 4}
+
+# valid values of the `engine` argument of the schedule functions
+SCHEDULE_ENGINES = ('daily', 'event', 'exact')
+
+# NumPy, pandas and pydantic are imported by the functions that need them, so that importing this module and
+# running the schedule engines with output='buffer' only needs the standard library and dateutil
+if TYPE_CHECKING:
+    import pandas as pd
+    from .cache import ResultCache
+
+
+def __getattr__(name):
+    # the pydantic validation model is imported on first use, as importing pydantic is slow
+    if name == 'inputval_prepare_loan_summary':
+        from .utils import inputval_prepare_loan_summary
+        globals()[name] = inputval_prepare_loan_summary
+        return inputval_prepare_loan_summary
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _validate_loan_params(loan_params : dict):
+    """ Validates loan parameters with the `inputval_prepare_loan_summary` pydantic model, which is imported on first use.
+    Returns the validated model.
+    """
+    validate = globals().get('inputval_prepare_loan_summary') or __getattr__('inputval_prepare_loan_summary')
+    return validate(**loan_params)
 
 
 def calculate_minimum_repayment(principal, annual_rate, years, months, repayment_frequency='annual'):
@@ -10,40 +46,43 @@ def calculate_minimum_repayment(principal, annual_rate, years, months, repayment
     Uses PMT formula to calculate the minimum repayment amount.
     Does not return the toal repayment amount over the life of the loan as 
     it would be inaccurate due to daily compounding of interest.
+    All arguments may be NumPy arrays, which are broadcast against each other; zero rates are handled per element.
     Args:
         principal (float): The loan amount (principal).
         annual_rate (float): The annual interest rate (in percentage, e.g., 5 for 5%).
         years (int): The loan term in years.
-        repayment_frequency (str): The repayment frequency ('annual', 'monthly', 'quarterly').
+        months (int): Additional loan term in months.
+        repayment_frequency (str): The repayment frequency ('annual', 'monthly', 'quarterly'), looked up in `PAYMENTS_PER_YEAR`.
 
     Returns:
-        float: The minimum repayment amount per period.
+        float: The minimum repayment amount per period (an array if any argument is an array).
     """
     # Convert annual interest rate from percentage to decimal
     rate = annual_rate / 100
 
     # total loan duration in years, including months converted to years
-    years += months / 12
+    years = years + months / 12
 
     # Determine the number of payments per year based on the repayment frequency
-    if repayment_frequency == 'annual':
-        payments_per_year = 1
-    elif repayment_frequency == 'monthly':
-        payments_per_year = 12
-    elif repayment_frequency == 'fortnightly':
-        payments_per_year = 26
-    elif repayment_frequency == 'weekly':
-        payments_per_year = 52
-    elif repayment_frequency == 'quarterly':
-        payments_per_year = 4
-    else:
-        raise ValueError("Invalid repayment frequency. Choose 'weekly', 'fortnightly', 'annual', 'monthly', or 'quarterly'.")
+    if isinstance(repayment_frequency, str):
+        payments_per_year = PAYMENTS_PER_YEAR.get(repayment_frequency)
+        if payments_per_year is None:
+            raise ValueError("Invalid repayment frequency. Choose 'weekly', 'fortnightly', 'annual', 'monthly', or 'quarterly'.")
+    else:  # an array of frequencies
+        from .pricing import payments_per_year_array
+        payments_per_year = payments_per_year_array(repayment_frequency)
 
     periodic_rate = rate / payments_per_year
     total_payments_count = payments_per_year * years
 
     # PMT = P * [r(1+r)^n] / [(1+r)^n - 1]
-    if periodic_rate == 0:  # If interest rate is 0%
+    if not isinstance(periodic_rate, (int, float)):  # one repayment per element of an array of rates
+        import numpy as np
+        growth = (1 + periodic_rate) ** total_payments_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            minimum_repayments = np.where(periodic_rate == 0, principal / total_payments_count,
+                                          principal * (periodic_rate * growth) / (growth - 1))
+    elif periodic_rate == 0:  # If interest rate is 0%
         minimum_repayments = principal / total_payments_count
     else:
         minimum_repayments = principal * (periodic_rate * (1 + periodic_rate) ** total_payments_count) / \
@@ -129,7 +168,8 @@ def generate_loan_transactions(start_date, loan_amount, annual_rate,
                                all_dates, interest_charge_dates, repayment_dates, 
                                offset_contribution_dates, offset_contribution_regular_amount,
                                extra_repayments_dates, extra_repayments_regular_amount,
-                               capture_interest_accrual: bool = False):
+                               capture_interest_accrual: bool = False, output: str = 'pandas',
+                               monthly_summary: bool = False, rate_timeline: '_RateTimeline' = None):
     """
     Generate a loan schedule including repayments, interest charges, loan balance and offset.
 
@@ -144,54 +184,330 @@ def generate_loan_transactions(start_date, loan_amount, annual_rate,
         extra_repayments_dates (list): A list of dates when extra repayments are made.
         extra_repayments_regular_amount (float): The regular amount for extra repayments.
         capture_interest_accrual (bool): Whether to capture daily and monthly interest accruals in the transactions. Default is False.
+        output (str): 'pandas' for a DataFrame, 'arrow' for a pyarrow Table or 'buffer' for the underlying `TransactionBuffer`. Default is 'pandas'.
+        monthly_summary (bool): Whether to build the monthly summary while the transactions are generated. It is available as `monthly_summary` on the returned buffer when output is 'buffer'. Default is False.
+        rate_timeline (_RateTimeline): rate changes to apply, as built by `create_amortization_schedule` from its `rate_changes`. Default is None.
 
     Returns:
-        pd.DataFrame: A DataFrame containing the loan schedule.
+        pd.DataFrame: A DataFrame containing the loan schedule. 'Transaction Type' is a categorical.
     """
     monthly_interest = 0
     current_loan_balance = loan_amount
     offset_amount = initial_offset_amount
-    transactions = []
+    transactions = SummarizingTransactionBuffer() if monthly_summary else TransactionBuffer()
     # first entry to transactions is the settlement
     # format: transaction date, transaction type, transaction amount, loan_balance, offset_balance
-    transactions.append([start_date, 'Settlement', loan_amount, loan_amount, offset_amount])
-    
+    transactions.append(day_number(start_date), SETTLEMENT, loan_amount, loan_amount, offset_amount)
     
-    for c_date in all_dates:
+    # event dates are checked every day, so keep them in sets for O(1) lookups
+    interest_charge_dates = set(interest_charge_dates)
+    offset_contribution_dates = set(offset_contribution_dates)
+    repayment_dates = set(repayment_dates)
+    extra_repayments_dates = set(extra_repayments_dates)
+
+    # days at the end of which a rate change applies, compared with the current day instead of looked up
+    start_day = day_number(start_date)
+    change_days = iter(sorted(start_day + day for day in rate_timeline.changes) if rate_timeline is not None else ())
+    next_change_day = next(change_days, None)
+    if next_change_day == start_day:
+        annual_rate, minimum_repayments = rate_timeline.apply(0, current_loan_balance, minimum_repayments)
+        next_change_day = next(change_days, None)
+
+    iterations = 0
+    for iterations, c_date in enumerate(all_dates, 1):
+        c_day = day_number(c_date)
         interest_chargeable_amount = current_loan_balance - offset_amount
         minimum_repayments = min(minimum_repayments, current_loan_balance)  # to ensure we don't pay more than the remaining loan balance
         daily_interest = calculate_daily_interest(interest_chargeable_amount, annual_rate)
         daily_interest = max(daily_interest, 0)  # to ensure interest is not negative
-        monthly_interest += daily_interest
         if capture_interest_accrual:
-            transactions.append([c_date, 'Daily Interest Acrrued', daily_interest, current_loan_balance, offset_amount])
-            transactions.append([c_date, 'Monthly Interest Acrrued', monthly_interest, current_loan_balance, offset_amount])
+            transactions.accrue(c_day, daily_interest, 1, monthly_interest, current_loan_balance, offset_amount)
+        monthly_interest += daily_interest
         if c_date in interest_charge_dates:
             current_loan_balance += monthly_interest
-            transactions.append([c_date, 'Interest Charged', monthly_interest, current_loan_balance, offset_amount])
+            transactions.append(c_day, INTEREST_CHARGED, monthly_interest, current_loan_balance, offset_amount)
             monthly_interest = 0
         # offset contribution needs to happen before interest calculation on that day
         if c_date in offset_contribution_dates:
             # Assuming offset contribution reduces the loan balance directly for interest calculation purposes
             offset_amount += offset_contribution_regular_amount
-            transactions.append([c_date, 'Offset Contribution', offset_contribution_regular_amount, current_loan_balance, offset_amount])
+            transactions.append(c_day, OFFSET_CONTRIBUTION, offset_contribution_regular_amount, current_loan_balance, offset_amount)
         if c_date in repayment_dates:
             current_loan_balance -= minimum_repayments
-            transactions.append([c_date, 'Repayment', minimum_repayments, current_loan_balance, offset_amount])
+            transactions.append(c_day, REPAYMENT, minimum_repayments, current_loan_balance, offset_amount)
         if c_date in extra_repayments_dates:
             extra_repayment = min(extra_repayments_regular_amount, current_loan_balance)  # to ensure we don't pay more than the remaining loan balance
             current_loan_balance -= extra_repayment
-            transactions.append([c_date, 'Extra Repayment', extra_repayment, current_loan_balance, offset_amount])
+            transactions.append(c_day, EXTRA_REPAYMENT, extra_repayment, current_loan_balance, offset_amount)
         
         if current_loan_balance <= 0.01:  # small threshold to account for floating point precision
             current_loan_balance = 0
             break
 
-    # save results to a dataframe
-    df = pd.DataFrame(transactions, 
-                      columns=['Date', 'Transaction Type', 
-                               'Transaction Amount', 'Loan Balance', 'Offset Balance'])
-    return df
+        if c_day == next_change_day:
+            annual_rate, minimum_repayments = rate_timeline.apply(c_day - start_day, current_loan_balance, minimum_repayments)
+            next_change_day = next(change_days, None)
+
+    record('schedule', iterations=iterations, rows=len(transactions))
+    # hand the columns over to a dataframe (or arrow table) without copying them row by row
+    return convert_transactions(transactions, output)
+
+
+def generate_loan_transactions_event_driven(start_date, loan_amount, annual_rate,
+                                            initial_offset_amount, minimum_repayments,
+                                            all_dates, interest_charge_dates, repayment_dates,
+                                            offset_contribution_dates, offset_contribution_regular_amount,
+                                            extra_repayments_dates, extra_repayments_regular_amount,
+                                            capture_interest_accrual: bool = False, output: str = 'pandas',
+                                            monthly_summary: bool = False):
+    """
+    Generate the same loan schedule as `generate_loan_transactions`, but jump from one event date to the next
+    instead of visiting every day.
+
+    Loan balance and offset balance only change on event dates (interest charge, repayment, offset contribution
+    and extra repayment), so the daily interest is constant between two events and the interest accrued over
+    the gap is accumulated in one step. Daily accrual rows are only expanded when `capture_interest_accrual` is True.
+
+    Args:
+        Same as `generate_loan_transactions`. `all_dates` must be the consecutive daily dates of the loan term.
+
+    Returns:
+        pd.DataFrame: A DataFrame containing the loan schedule.
+    """
+    if len(all_dates) == 0:
+        first_day, last_day, end_date = 1, 0, start_date
+    else:
+        first_day, last_day, end_date = (all_dates[0] - start_date).days, (all_dates[-1] - start_date).days, all_dates[-1]
+    calendars = [EventCalendar.from_dates(start_date, end_date, dates)
+                 for dates in (interest_charge_dates, offset_contribution_dates, repayment_dates, extra_repayments_dates)]
+    return _generate_transactions_between_events(start_date, first_day, last_day, loan_amount, annual_rate,
+                                                 initial_offset_amount, minimum_repayments, *calendars,
+                                                 offset_contribution_regular_amount, extra_repayments_regular_amount,
+                                                 capture_interest_accrual, output, monthly_summary)
+
+
+class ScheduleSnapshot(NamedTuple):
+    """ State of the event-driven engine at the end of a day, from which a schedule can be resumed.
+    """
+    day: int  # day offset from settlement; the schedule resumes on the next day
+    loan_balance: float
+    offset_balance: float
+    accrued_interest: float  # interest accrued but not yet charged
+    minimum_repayments: float
+    transaction_count: int  # number of transactions recorded up to and including `day`
+
+
+def _generate_transactions_between_events(start_date, first_day, last_day, loan_amount, annual_rate,
+                                          initial_offset_amount, minimum_repayments,
+                                          interest_calendar, offset_calendar, repayment_calendar, extra_calendar,
+                                          offset_contribution_regular_amount, extra_repayments_regular_amount,
+                                          capture_interest_accrual, output='pandas', monthly_summary=False,
+                                          rate_timeline=None):
+    """ Runs the event-driven engine in one go and converts the transactions to the requested output.
+    """
+    transactions = next(_iter_transactions_between_events(start_date, first_day, last_day, loan_amount, annual_rate,
+                                                          initial_offset_amount, minimum_repayments,
+                                                          interest_calendar, offset_calendar, repayment_calendar, extra_calendar,
+                                                          offset_contribution_regular_amount, extra_repayments_regular_amount,
+                                                          capture_interest_accrual, monthly_summary,
+                                                          rate_timeline=rate_timeline))
+    # hand the columns over to a dataframe (or arrow table) without copying them row by row
+    return convert_transactions(transactions, output)
+
+
+def _iter_transactions_between_events(start_date, first_day, last_day, loan_amount, annual_rate,
+                                      initial_offset_amount, minimum_repayments,
+                                      interest_calendar, offset_calendar, repayment_calendar, extra_calendar,
+                                      offset_contribution_regular_amount, extra_repayments_regular_amount,
+                                      capture_interest_accrual, monthly_summary=False, chunk_size=None,
+                                      monthly_interest=0, settlement=True, snapshots=None, transaction_count=0,
+                                      rate_timeline=None):
+    """ Event-driven schedule engine working on `EventCalendar` day offsets. Days `first_day` to `last_day` (offsets
+    from settlement) are simulated, and the next event is looked up from the calendars, which generate their
+    dates lazily, so no date beyond the payoff day is ever worked out.
+
+    Transactions are yielded as `TransactionBuffer` chunks: a new chunk is started once the current one holds
+    `chunk_size` rows (checked after every simulated day), and the last chunk is yielded when the simulation ends.
+    With `chunk_size=None`, all transactions are yielded in a single chunk.
+
+    To resume a schedule from a `ScheduleSnapshot`, pass its balances as `loan_amount` and `initial_offset_amount`,
+    its accrued interest as `monthly_interest`, its transaction count as `transaction_count` and `settlement=False`.
+    If `snapshots` is a list, a snapshot is appended to it after the settlement and after every interest charge day.
+    The changes of `rate_timeline` (a `_RateTimeline`) are applied at the end of the day before their date; their
+    days are stepped to like event days.
+    """
+    summary = MonthlySummary() if monthly_summary else None
+
+    def new_buffer():
+        return SummarizingTransactionBuffer(summary) if monthly_summary else TransactionBuffer()
+
+    current_loan_balance = loan_amount
+    offset_amount = initial_offset_amount
+    transactions = new_buffer()
+    if settlement:
+        # first entry to transactions is the settlement
+        # format: transaction date, transaction type, transaction amount, loan_balance, offset_balance
+        transactions.append(day_number(start_date), SETTLEMENT, loan_amount, loan_amount, offset_amount)
+        if snapshots is not None:
+            snapshots.append(ScheduleSnapshot(first_day - 1, current_loan_balance, offset_amount, monthly_interest,
+                                              minimum_repayments, transaction_count + 1))
+
+    start_day = day_number(start_date)
+    calendars = (interest_calendar, offset_calendar, repayment_calendar, extra_calendar)
+    if rate_timeline is not None:
+        calendars += (rate_timeline.calendar,)
+        if first_day - 1 in rate_timeline.changes:
+            annual_rate, minimum_repayments = rate_timeline.apply(first_day - 1, current_loan_balance, minimum_repayments)
+    # the last day is visited so that accruals are expanded up to the end of the term, and the first day
+    # is visited when the loan is already paid off so the schedule stops at the same place as the daily loop
+    stop_day = first_day if current_loan_balance <= 0.01 else last_day
+    previous_day = first_day - 1
+    first_transaction_count = transaction_count
+    iterations = 0
+    while previous_day < stop_day:
+        iterations += 1
+        day = stop_day
+        for calendar in calendars:
+            event_day = calendar.next_event(previous_day)
+            if event_day is not None and event_day < day:
+                day = event_day
+        days_elapsed = day - previous_day
+        interest_chargeable_amount = current_loan_balance - offset_amount
+        minimum_repayments = min(minimum_repayments, current_loan_balance)  # to ensure we don't pay more than the remaining loan balance
+        daily_interest = calculate_daily_interest(interest_chargeable_amount, annual_rate)
+        daily_interest = max(daily_interest, 0)  # to ensure interest is not negative
+        if capture_interest_accrual:
+            accrual_day = previous_day + 1
+            while accrual_day <= day:
+                # accruals take two rows a day, and a chunk is handed over on the day it reaches `chunk_size`
+                n_days = day + 1 - accrual_day
+                if chunk_size is not None:
+                    n_days = min(n_days, max(1, (chunk_size - len(transactions) + 1) // 2))
+                transactions.accrue(start_day + accrual_day, daily_interest, n_days, monthly_interest,
+                                    current_loan_balance, offset_amount)
+                for _ in range(n_days):
+                    monthly_interest += daily_interest  # day by day, as the daily engine sums it
+                accrual_day += n_days
+                if chunk_size is not None and len(transactions) >= chunk_size:
+                    transaction_count += len(transactions)
+                    yield transactions
+                    transactions = new_buffer()
+        else:
+            monthly_interest += daily_interest * days_elapsed
+        previous_day = day
+
+        c_day = start_day + day
+        if day in interest_calendar:
+            current_loan_balance += monthly_interest
+            transactions.append(c_day, INTEREST_CHARGED, monthly_interest, current_loan_balance, offset_amount)
+            monthly_interest = 0
+        if day in offset_calendar:
+            offset_amount += offset_contribution_regular_amount
+            transactions.append(c_day, OFFSET_CONTRIBUTION, offset_contribution_regular_amount, current_loan_balance, offset_amount)
+        if day in repayment_calendar:
+            current_loan_balance -= minimum_repayments
+            transactions.append(c_day, REPAYMENT, minimum_repayments, current_loan_balance, offset_amount)
+        if day in extra_calendar:
+            extra_repayment = min(extra_repayments_regular_amount, current_loan_balance)  # to ensure we don't pay more than the remaining loan balance
+            current_loan_balance -= extra_repayment
+            transactions.append(c_day, EXTRA_REPAYMENT, extra_repayment, current_loan_balance, offset_amount)
+
+        if current_loan_balance <= 0.01:  # small threshold to account for floating point precision
+            current_loan_balance = 0
+            break
+
+        if rate_timeline is not None and day in rate_timeline.calendar:
+            annual_rate, minimum_repayments = rate_timeline.apply(day, current_loan_balance, minimum_repayments)
+
+        if snapshots is not None and day in interest_calendar:
+            snapshots.append(ScheduleSnapshot(day, current_loan_balance, offset_amount, monthly_interest,
+                                              minimum_repayments, transaction_count + len(transactions)))
+
+        if chunk_size is not None and len(transactions) >= chunk_size:
+            transaction_count += len(transactions)
+            yield transactions
+            transactions = new_buffer()
+
+    record('schedule', iterations=iterations, rows=transaction_count + len(transactions) - first_transaction_count)
+    if chunk_size is None or len(transactions) > 0:
+        yield transactions
+
+
+def _loan_calendars(start_date, loan_duration_years, loan_duration_months,
+                    repayment_frequency, offset_contribution_frequency, extra_repayments_frequency):
+    """ Returns the interest charge, offset contribution, repayment and extra repayment calendars of a loan.
+    """
+    # event calendars exclude the settlement date, as repayments, offset contributions, interest and extra repayments start after it.
+    # They are shared between loans with the same start date, term and frequency.
+    interest_charge_calendar = get_event_calendar(start_date, loan_duration_years, loan_duration_months, 'monthly') # interest is calculated daily but charged monthly on the same day of the month as settlement date
+    offset_contribution_calendar = get_event_calendar(start_date, loan_duration_years, loan_duration_months, offset_contribution_frequency)
+    repayment_calendar = get_event_calendar(start_date, loan_duration_years, loan_duration_months, repayment_frequency)
+    extra_repayments_calendar = get_event_calendar(start_date, loan_duration_years, loan_duration_months, extra_repayments_frequency)
+    return interest_charge_calendar, offset_contribution_calendar, repayment_calendar, extra_repayments_calendar
+
+
+class RateChange(NamedTuple):
+    """ A change of the interest rate of a loan, effective from `date`: interest accrues at `annual_rate` from that
+    day on, and repayments due on or after it are `repayment`, or the minimum repayment recalculated from the loan
+    balance and the repayments left in the term when `repayment` is None.
+    """
+    date: Union[str, date, datetime]
+    annual_rate: float
+    repayment: Optional[float] = None
+
+
+class _RateTimeline:
+    """ Rate changes of a loan, indexed by the day offset at the end of which each one applies, i.e. the day before
+    its date. The engines step to these days through `calendar` like to any other event, so a change costs one
+    lookup when it applies rather than a check on every day.
+
+    Args:
+        start_date (datetime): the settlement date.
+        end_date (datetime): the last day of the loan term.
+        rate_changes (sequence): `RateChange` or (date, annual_rate[, repayment]) tuples, sorted by date. Changes
+            after the end of the term are ignored.
+        repayment_calendar (EventCalendar): the repayment days of the loan, to count the repayments left at each change.
+        repayment_frequency (str): the repayment frequency of the loan.
+    """
+
+    def __init__(self, start_date, end_date, rate_changes, repayment_calendar, repayment_frequency):
+        self.repayment_frequency = repayment_frequency
+        self.changes = {}  # day offset -> (annual rate, repayment or None, number of repayments left)
+        repayment_days = repayment_calendar.offsets()
+        previous_date = None
+        for change in rate_changes:
+            change = RateChange(*change)
+            change_date = change.date
+            if isinstance(change_date, str):
+                change_date = datetime.strptime(change_date, '%Y-%m-%d')
+            elif not isinstance(change_date, datetime) and isinstance(change_date, date):
+                change_date = datetime(change_date.year, change_date.month, change_date.day)
+            if change_date <= start_date:
+                raise ValueError("Rate changes must be dated after the start date.")
+            if previous_date is not None and change_date <= previous_date:
+                raise ValueError("Rate changes must be sorted by date, with at most one change per date.")
+            if change.annual_rate < 0 or (change.repayment is not None and change.repayment < 0):
+                raise ValueError("Rates and repayments of rate changes must not be negative.")
+            previous_date = change_date
+            if change_date > end_date:
+                continue
+            day = (change_date - start_date).days - 1
+            repayments_left = len(repayment_days) - bisect_left(repayment_days, day + 1)
+            self.changes[day] = (change.annual_rate, change.repayment, repayments_left)
+        self.calendar = EventCalendar.from_dates(start_date, end_date,
+                                                 [start_date + timedelta(days=day) for day in self.changes])
+
+    def apply(self, day, loan_balance, minimum_repayments):
+        """ Returns the annual rate and repayment from the day after `day` on, given the loan balance at the end of `day`.
+        """
+        annual_rate, repayment, repayments_left = self.changes[day]
+        if repayment is None:
+            repayment = minimum_repayments
+            if repayments_left > 0 and loan_balance > 0:
+                repayment = calculate_minimum_repayment(loan_balance, annual_rate, 0,
+                                                        repayments_left * 12 / PAYMENTS_PER_YEAR[self.repayment_frequency],
+                                                        self.repayment_frequency)
+        return annual_rate, repayment
 
 
 def create_amortization_schedule(start_date: str, 
@@ -205,7 +521,11 @@ def create_amortization_schedule(start_date: str,
                                 regular_amount_offset_contribution: float,
                                 extra_repayments_frequency: str,
                                 extra_repayments_regular_amount: float,
-                                capture_interest_accrual: bool = False
+                                capture_interest_accrual: bool = False,
+                                engine: str = 'daily',
+                                output: str = 'pandas',
+                                monthly_summary: bool = False,
+                                rate_changes=None
                                  ):
     """ Generates loan transactions by passing required input to the daily routine.
     Args:
@@ -219,7 +539,16 @@ def create_amortization_schedule(start_date: str,
         offset_contribution_frequency (str): frequency denoting how often the customer puts money to the offset account. Valid values are "weekly", "fortnightly" and "monthly".
         regular_amount_offset_contribution (float): regular contribution amount to the offset account. This is the amount contributed every "offset_contribution_frequency".
         capture_interest_accrual (bool): Whether to capture daily and monthly interest accruals in the transactions. Default is False.
+        engine (str): the schedule engine to use. "daily" loops through every day of the loan term, "event" jumps from one event date to the next and produces the same transactions. "exact" is the event-driven engine with integer-cent arithmetic and half-even rounding of interest charges (see `generate_exact_transactions`). Default is "daily".
+        output (str): "pandas" returns a DataFrame, "arrow" a pyarrow Table and "buffer" the underlying `TransactionBuffer`. Default is "pandas".
+        monthly_summary (bool): whether the engine builds the monthly summary while it runs. It is available as `monthly_summary` on the returned buffer when output is "buffer". Default is False.
+        rate_changes (sequence): changes of the interest rate during the term, as `RateChange` or (date, annual_rate) or (date, annual_rate, repayment) tuples sorted by date, with dates as YYYY-MM-DD strings or datetimes. A change is effective from its date: interest accrues at the new rate from that day, and repayments due from that day are the given repayment or, when it is None or left out, the minimum repayment recalculated from the loan balance and the number of repayments left in the term. All changes are applied in the one simulation. Default is None (the rate is fixed).
     """
+    if engine not in SCHEDULE_ENGINES:
+        raise ValueError("Invalid engine. Choose 'daily', 'event' or 'exact'.")
+    if output not in TRANSACTION_OUTPUTS:
+        raise ValueError("Invalid output. Choose 'pandas', 'arrow' or 'buffer'.")
+
     # Convert start_date string to datetime object
     start_date = datetime.strptime(start_date, '%Y-%m-%d')
     end_date = calculate_end_date(start_date, loan_duration_years, loan_duration_months)
@@ -229,64 +558,251 @@ def create_amortization_schedule(start_date: str,
                                                      months=loan_duration_months, 
                                                      repayment_frequency=repayment_frequency)
 
-
-    repayment_dates = find_relevant_dates(start_date, end_date, repayment_frequency)
-    repayment_dates.pop(0)  # remove the first date as repayment starts after settlement date
-    offset_contribution_dates = find_relevant_dates(start_date, end_date, offset_contribution_frequency)
-    offset_contribution_dates.pop(0)  # remove the first date as offset contribution starts after settlement date
-    interest_charge_dates = find_relevant_dates(start_date, end_date, 'monthly') # interest is calculated daily but charged monthly on the same day of the month as settlement date
-    interest_charge_dates.pop(0)  # remove the first date as interest starts accruing after settlement date
-    extra_repayments_dates = find_relevant_dates(start_date, end_date, extra_repayments_frequency)
-    extra_repayments_dates.pop(0)  # remove the first date as extra repayments starts after settlement date
-    # generate all dates between start and end date for daily interest calculation  
-    all_dates = find_relevant_dates(start_date, end_date, 'daily') # daily dates for iterating through the schedule
-    all_dates.pop(0)  # remove the first date as interest starts accruing after settlement date
-   
-
-    loan_transactions = generate_loan_transactions(start_date, loan_amount, annual_rate,
-                                                   initial_offset_amount, minimum_repayments,
-                                                   all_dates, interest_charge_dates, repayment_dates, 
-                                                   offset_contribution_dates, 
-                                                   regular_amount_offset_contribution,
-                                                   extra_repayments_dates, 
-                                                   extra_repayments_regular_amount,
-                                                   capture_interest_accrual)
+    with stage('dates'):
+        (interest_charge_calendar, offset_contribution_calendar,
+         repayment_calendar, extra_repayments_calendar) = _loan_calendars(start_date, loan_duration_years, loan_duration_months,
+                                                                          repayment_frequency, offset_contribution_frequency,
+                                                                          extra_repayments_frequency)
+        rate_timeline = None
+        if rate_changes:
+            rate_timeline = _RateTimeline(start_date, end_date, rate_changes, repayment_calendar, repayment_frequency)
+        if engine == 'daily':
+            # generate all dates between start and end date for daily interest calculation
+            all_dates = find_relevant_dates(start_date, end_date, 'daily') # daily dates for iterating through the schedule
+            all_dates.pop(0)  # remove the first date as interest starts accruing after settlement date
+            interest_charge_dates = interest_charge_calendar.dates()
+            repayment_dates = repayment_calendar.dates()
+            offset_contribution_dates = offset_contribution_calendar.dates()
+            extra_repayments_dates = extra_repayments_calendar.dates()
+
+    if engine == 'exact':
+        from .exact import _exact_transactions_between_events
+        with stage('schedule'):
+            transactions = _exact_transactions_between_events(start_date, (end_date - start_date).days,
+                                                              loan_amount, annual_rate,
+                                                              initial_offset_amount, minimum_repayments,
+                                                              interest_charge_calendar, offset_contribution_calendar,
+                                                              repayment_calendar, extra_repayments_calendar,
+                                                              regular_amount_offset_contribution,
+                                                              extra_repayments_regular_amount,
+                                                              capture_interest_accrual, monthly_summary=monthly_summary,
+                                                              rate_timeline=rate_timeline)
+        return convert_transactions(transactions, output)
+
+    if engine == 'event':
+        with stage('schedule'):
+            loan_transactions = _generate_transactions_between_events(start_date, 1, (end_date - start_date).days,
+                                                                      loan_amount, annual_rate,
+                                                                      initial_offset_amount, minimum_repayments,
+                                                                      interest_charge_calendar, offset_contribution_calendar,
+                                                                      repayment_calendar, extra_repayments_calendar,
+                                                                      regular_amount_offset_contribution,
+                                                                      extra_repayments_regular_amount,
+                                                                      capture_interest_accrual, output, monthly_summary,
+                                                                      rate_timeline)
+        return loan_transactions
+
+    with stage('schedule'):
+        loan_transactions = generate_loan_transactions(start_date, loan_amount, annual_rate,
+                                                       initial_offset_amount, minimum_repayments,
+                                                       all_dates, interest_charge_dates, repayment_dates,
+                                                       offset_contribution_dates,
+                                                       regular_amount_offset_contribution,
+                                                       extra_repayments_dates,
+                                                       extra_repayments_regular_amount,
+                                                       capture_interest_accrual, output, monthly_summary,
+                                                       rate_timeline)
     
     return loan_transactions
 
 
-def create_monthly_summary(transactions: pd.DataFrame):
+def _prepare_event_engine(loan_params : dict):
+    """ Works out the settlement date, last day offset, minimum repayment and event calendars of validated loan
+    parameters, as needed by the event-driven engines.
+    """
+    start_date = datetime.strptime(loan_params['start_date'], '%Y-%m-%d')
+    end_date = calculate_end_date(start_date, loan_params['loan_duration_years'], loan_params['loan_duration_months'])
+    minimum_repayments = calculate_minimum_repayment(principal=loan_params['loan_amount'],
+                                                     annual_rate=loan_params['annual_rate'],
+                                                     years=loan_params['loan_duration_years'],
+                                                     months=loan_params['loan_duration_months'],
+                                                     repayment_frequency=loan_params['repayment_frequency'])
+    calendars = _loan_calendars(start_date, loan_params['loan_duration_years'], loan_params['loan_duration_months'],
+                                loan_params['repayment_frequency'], loan_params['offset_contribution_frequency'],
+                                loan_params['extra_repayments_frequency'])
+    return start_date, (end_date - start_date).days, minimum_repayments, calendars
+
+
+def iter_loan_transactions(loan_params : dict, chunk_size : int = 10_000, output : str = 'pandas', validate : bool = True):
+    """ Generates the transactions of a loan in chunks, so that memory stays bounded however long the schedule is.
+    Uses the event-driven engine and produces the same transactions as `prepare_loan_summary`.
+
+    Args:
+        loan_params (dict): loan parameters, as described in `prepare_loan_summary`.
+        chunk_size (int): number of transactions after which a chunk is handed over. A chunk may exceed it by the
+            transactions of one day. Default is 10,000.
+        output (str): "pandas" yields DataFrames, "arrow" pyarrow Tables and "buffer" `TransactionBuffer` objects. Default is "pandas".
+        validate (bool): whether to validate `loan_params`. Pass False for parameters that were already validated. Default is True.
+
+    Returns:
+        generator: chunks of transactions, in date order, with the columns of `generate_loan_transactions`.
+    """
+    # validate inputs before anything is generated
+    if validate:
+        _validate_loan_params(loan_params)
+    if output not in TRANSACTION_OUTPUTS:
+        raise ValueError("Invalid output. Choose 'pandas', 'arrow' or 'buffer'.")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    start_date, last_day, minimum_repayments, calendars = _prepare_event_engine(loan_params)
+    chunks = _iter_transactions_between_events(start_date, 1, last_day,
+                                               loan_params['loan_amount'], loan_params['annual_rate'],
+                                               loan_params['initial_offset_amount'], minimum_repayments, *calendars,
+                                               loan_params['offset_contribution_regular_amount'],
+                                               loan_params['extra_repayments_regular_amount'],
+                                               loan_params.get('capture_interest_accrual', False),
+                                               chunk_size=chunk_size)
+    return (convert_transactions(chunk, output) for chunk in chunks)
+
+
+class LoanTotals(NamedTuple):
+    """ Totals of a loan, as returned by `calculate_loan_totals`.
+    """
+    total_interest_charged: float
+    total_repayments: float
+    total_extra_repayments: float
+    payoff_date: Optional[datetime]  # None if the loan is not paid off within its term
+
+
+def _totals_between_events(first_day, last_day, loan_amount, annual_rate, initial_offset_amount, minimum_repayments,
+                           interest_calendar, offset_calendar, repayment_calendar, extra_calendar,
+                           offset_contribution_regular_amount, extra_repayments_regular_amount):
+    """ Runs the event-driven engine with scalar accumulators only, without recording any transaction.
+
+    Returns:
+        tuple: total interest charged, total repayments, total extra repayments and the payoff day offset
+        (None if the loan is not paid off by `last_day`).
+    """
+    total_interest = 0
+    total_repayments = 0
+    total_extra_repayments = 0
+    monthly_interest = 0
+    current_loan_balance = loan_amount
+    offset_amount = initial_offset_amount
+
+    stop_day = first_day if current_loan_balance <= 0.01 else last_day
+    previous_day = first_day - 1
+    # next event of each calendar, advanced only when it is reached; days past the last event never match
+    no_event = last_day + 1
+    next_interest = interest_calendar.next_event(previous_day) or no_event
+    next_offset = offset_calendar.next_event(previous_day) or no_event
+    next_repayment = repayment_calendar.next_event(previous_day) or no_event
+    next_extra = extra_calendar.next_event(previous_day) or no_event
+    while previous_day < stop_day:
+        day = min(next_interest, next_offset, next_repayment, next_extra, stop_day)
+        minimum_repayments = min(minimum_repayments, current_loan_balance)  # to ensure we don't pay more than the remaining loan balance
+        daily_interest = max(calculate_daily_interest(current_loan_balance - offset_amount, annual_rate), 0)
+        monthly_interest += daily_interest * (day - previous_day)
+        previous_day = day
+
+        if day == next_interest:
+            current_loan_balance += monthly_interest
+            total_interest += monthly_interest
+            monthly_interest = 0
+            next_interest = interest_calendar.next_event(day) or no_event
+        if day == next_offset:
+            offset_amount += offset_contribution_regular_amount
+            next_offset = offset_calendar.next_event(day) or no_event
+        if day == next_repayment:
+            current_loan_balance -= minimum_repayments
+            total_repayments += minimum_repayments
+            next_repayment = repayment_calendar.next_event(day) or no_event
+        if day == next_extra:
+            extra_repayment = min(extra_repayments_regular_amount, current_loan_balance)  # to ensure we don't pay more than the remaining loan balance
+            current_loan_balance -= extra_repayment
+            total_extra_repayments += extra_repayment
+            next_extra = extra_calendar.next_event(day) or no_event
+
+        if current_loan_balance <= 0.01:  # small threshold to account for floating point precision
+            return total_interest, total_repayments, total_extra_repayments, day
+
+    return total_interest, total_repayments, total_extra_repayments, None
+
+
+def calculate_loan_totals(loan_params : dict, validate : bool = True):
+    """ Calculates the totals of a loan without building its transactions or monthly summary.
+    This is the fast path for callers that only need the totals of `prepare_loan_summary`: the event-driven engine
+    runs with scalar accumulators, so nothing proportional to the loan term is allocated.
+
+    Args:
+        loan_params (dict): loan parameters, as described in `prepare_loan_summary`. `capture_interest_accrual` has no effect.
+        validate (bool): whether to validate `loan_params`. Pass False for parameters that were already validated,
+            e.g. when evaluating many variations of one loan. Default is True.
+
+    Returns:
+        LoanTotals: total interest charged, total repayments (excluding extra repayments), total extra repayments
+        and the payoff date (None if the loan is not paid off within its term).
+    """
+    # validate inputs
+    if validate:
+        _validate_loan_params(loan_params)
+
+    start_date, last_day, minimum_repayments, calendars = _prepare_event_engine(loan_params)
+    total_interest, total_repayments, total_extra_repayments, payoff_day = _totals_between_events(
+        1, last_day, loan_params['loan_amount'], loan_params['annual_rate'], loan_params['initial_offset_amount'],
+        minimum_repayments, *calendars,
+        loan_params['offset_contribution_regular_amount'], loan_params['extra_repayments_regular_amount'])
+    payoff_date = None if payoff_day is None else start_date + timedelta(days=payoff_day)
+    return LoanTotals(total_interest, total_repayments, total_extra_repayments, payoff_date)
+
+
+def create_monthly_summary(transactions: 'pd.DataFrame'):
     """ Creates a monthly summary of repayments made, interest charged, outstanding loan amount and offset account balance.
+    All months are summarised in one vectorized pass over the transaction columns.
     """
-    df = transactions.copy()
-    df['Date'] = pd.to_datetime(df['Date'])
-    df['Year-Month'] = df['Date'].dt.to_period('M')
-    # Group by 'Date' and calculate the required columns
-    result = df.groupby('Year-Month').agg(
-        TOTAL_REPAYMENT=('Transaction Amount', lambda x: x[df.loc[x.index, 'Transaction Type'] == 'Repayment'].sum()),
-        TOTAL_INTEREST=('Transaction Amount', lambda x: x[df.loc[x.index, 'Transaction Type'] == 'Interest Charged'].sum()),
-        LOAN_BALANCE_FIRSTDAY=('Loan Balance', 'first'),
-        OFFSET_BALANCE_LASTDAY=('Offset Balance', 'last')
-    ).reset_index()
-    # Fill NaN values with 0 for TOTAL_REPAYMENT and TOTAL_INTEREST
-    result['TOTAL_REPAYMENT'] = result['TOTAL_REPAYMENT'].fillna(0)
-    result['TOTAL_INTEREST'] = result['TOTAL_INTEREST'].fillna(0)
-    result['LOAN_BALANCE_FIRSTDAY'] = result['LOAN_BALANCE_FIRSTDAY'].fillna(0)
-    result['OFFSET_BALANCE_LASTDAY'] = result['OFFSET_BALANCE_LASTDAY'].fillna(0)
-
-    # compute summary metrices
-    total_interest_paid = result['TOTAL_INTEREST'].sum()
-    total_payments_made = result['TOTAL_REPAYMENT'].sum()
-
-
-    result.columns = ['MONTH', 'Total Repayment', 'Total Interest Charged', 
-                      'Loan Balance (First Day of Month)', 
-                      'Offset Balance (Last Day of Month)']
-    
-    return result, total_interest_paid, total_payments_made
+    import numpy as np
+    import pandas as pd
+    dates = pd.to_datetime(transactions['Date']).to_numpy()
+    months = dates.astype('datetime64[M]').astype(np.int64)
+    is_repayment = (transactions['Transaction Type'] == 'Repayment').to_numpy()
+    is_interest = (transactions['Transaction Type'] == 'Interest Charged').to_numpy()
+    amounts = transactions['Transaction Amount'].to_numpy(dtype=np.float64)
+    loan_balances = transactions['Loan Balance'].to_numpy(dtype=np.float64)
+    offset_balances = transactions['Offset Balance'].to_numpy(dtype=np.float64)
+
+    # transactions are normally in date order already; otherwise sort them by month, keeping their order within a month
+    if np.any(months[1:] < months[:-1]):
+        order = np.argsort(months, kind='stable')
+        months, is_repayment, is_interest = months[order], is_repayment[order], is_interest[order]
+        amounts, loan_balances, offset_balances = amounts[order], loan_balances[order], offset_balances[order]
+
+    # position of each transaction's month in the summary, and first/last transaction of every month
+    new_month = np.ones(len(months), dtype=bool)
+    new_month[1:] = months[1:] != months[:-1]
+    month_index = np.cumsum(new_month) - 1
+    first_rows = np.flatnonzero(new_month)
+    last_rows = np.append(first_rows[1:] - 1, len(months) - 1) if len(months) else first_rows
+    n_months = len(first_rows)
+
+    return monthly_summary_frame(months[first_rows],
+                                 np.bincount(month_index, weights=np.where(is_repayment, amounts, 0), minlength=n_months),
+                                 np.bincount(month_index, weights=np.where(is_interest, amounts, 0), minlength=n_months),
+                                 loan_balances[first_rows],
+                                 offset_balances[last_rows])
+
+
+def _write_csv(df, path):
+    """ Writes a dataframe to a CSV file without the index, recording the 'csv' stage.
+    """
+    with stage('csv'):
+        df.to_csv(path, index=False)
+        record('csv', rows=len(df), bytes_written=os.path.getsize(path))
 
 
-def prepare_loan_summary(loan_params : dict, store_results : bool = False):
+def prepare_loan_summary(loan_params : dict, store_results : bool = False, engine : str = 'daily',
+                         summarize_in_engine : bool = False, output_dir : str = '.', validate : bool = True,
+                         cache : 'ResultCache' = None, rate_changes=None):
     """ Create a loan summary from loan details.
     This function takes a dictionary with following keys (all mandatory):
         start_date (string) : the settlement date, or start date of the loan. Must be a string in YYYY-MM-DD format.
@@ -302,6 +818,14 @@ def prepare_loan_summary(loan_params : dict, store_results : bool = False):
         extra_repayments_regular_amount (float): regular extra repayment amount. This is the amount contributed every "extra_repayments_frequency".
         capture_interest_accrual (bool): Whether to capture daily and monthly interest accruals in the transactions. Default is False.
     Args:
+        loan_params (dict): loan parameters described above.
+        store_results (bool): whether to save the transactions and monthly summary as CSV files in `output_dir`. Default is False.
+        engine (str): the schedule engine, "daily", "event" or "exact". See `create_amortization_schedule`. Default is "daily".
+        summarize_in_engine (bool): whether the schedule engine builds the monthly summary while it runs, instead of a second pass over the transactions with `create_monthly_summary`. Default is False.
+        output_dir (str): directory where `store_results` writes `loan_transactions.csv` and `loan_schedule_summary.csv`. Default is the working directory.
+        validate (bool): whether to validate `loan_params`. Pass False for parameters that were already validated, e.g. by `validate_loan_table`. Default is True.
+        cache (ResultCache): cache to look the results up in and store them to. Parameters are always validated when a cache is used, as the cache key is built from the validated parameters. Default is None (no caching).
+        rate_changes (sequence): changes of the interest rate during the term, applied in the same simulation. See `create_amortization_schedule`. Default is None (the rate is fixed).
 
     Returns a dictionary containing the following keys:
         all_transactions: pandas dataframe containing all transactions on the loan account.
@@ -310,7 +834,31 @@ def prepare_loan_summary(loan_params : dict, store_results : bool = False):
         total_repayments: total repayment made by the customers over the life of the loan, in dollars.
     """
     # validate inputs
-    inputval_prepare_loan_summary(**loan_params)
+    if validate or cache is not None:
+        with stage('validation'):
+            validated_params = _validate_loan_params(loan_params)
+
+    # return cached results of the same loan and options
+    if cache is not None:
+        with stage('cache'):
+            options = {}
+            if rate_changes:
+                # key on the normalized timeline, so that equivalent changes share an entry
+                start_date = datetime.strptime(loan_params['start_date'], '%Y-%m-%d')
+                years, months = loan_params['loan_duration_years'], loan_params['loan_duration_months']
+                timeline = _RateTimeline(start_date, calculate_end_date(start_date, years, months), rate_changes,
+                                         get_event_calendar(start_date, years, months, loan_params['repayment_frequency']),
+                                         loan_params['repayment_frequency'])
+                if timeline.changes:
+                    options['rate_changes'] = [[day, float(rate), None if repayment is None else float(repayment)]
+                                               for day, (rate, repayment, _) in timeline.changes.items()]
+            cache_key = cache.key(validated_params.model_dump(), engine=engine, summarize_in_engine=summarize_in_engine, **options)
+            results = cache.get(cache_key)
+        if results is not None:
+            if store_results:
+                _write_csv(results['all_transactions'], os.path.join(output_dir, 'loan_transactions.csv'))
+                _write_csv(results['monthly_summary'], os.path.join(output_dir, "loan_schedule_summary.csv"))
+            return results
 
     # extract loan parameters
     start_date = loan_params.get('start_date')
@@ -327,20 +875,29 @@ def prepare_loan_summary(loan_params : dict, store_results : bool = False):
     capture_interest_accrual = loan_params.get('capture_interest_accrual', False)
     
     # generate all loan transactions
-    all_transactions = create_amortization_schedule(start_date, loan_amount, 
-                                                    annual_rate, loan_duration_years, loan_duration_months,
-                                                    repayment_frequency, initial_offset_amount, 
-                                                    offset_contribution_frequency, offset_contribution_regular_amount,
-                                                    extra_repayments_frequency, extra_repayments_regular_amount,
-                                                    capture_interest_accrual)
+    transactions = create_amortization_schedule(start_date, loan_amount, 
+                                                annual_rate, loan_duration_years, loan_duration_months,
+                                                repayment_frequency, initial_offset_amount, 
+                                                offset_contribution_frequency, offset_contribution_regular_amount,
+                                                extra_repayments_frequency, extra_repayments_regular_amount,
+                                                capture_interest_accrual, engine,
+                                                output='buffer', monthly_summary=summarize_in_engine,
+                                                rate_changes=rate_changes)
+    with stage('dataframe'):
+        all_transactions = transactions.to_frame()
     if store_results:
-        all_transactions.to_csv('loan_transactions.csv', index=False)
+        _write_csv(all_transactions, os.path.join(output_dir, 'loan_transactions.csv'))
 
     # generate monthly summary table
-    monthly_summary, total_interest_charged, total_repayments = create_monthly_summary(all_transactions)
+    with stage('monthly_summary'):
+        if summarize_in_engine:
+            monthly_summary, total_interest_charged, total_repayments = transactions.monthly_summary.summary()
+        else:
+            monthly_summary, total_interest_charged, total_repayments = create_monthly_summary(all_transactions)
+        record('monthly_summary', rows=len(monthly_summary))
     # Save the result to a new CSV file
     if store_results:
-        monthly_summary.to_csv("loan_schedule_summary.csv", index=False)
+        _write_csv(monthly_summary, os.path.join(output_dir, "loan_schedule_summary.csv"))
 
     # return results
     results = {'all_transactions' : all_transactions,
@@ -348,4 +905,7 @@ def prepare_loan_summary(loan_params : dict, store_results : bool = False):
                'total_interest_charged' : total_interest_charged,
                'total_repayments' : total_repayments
                }
+    if cache is not None:
+        with stage('cache'):
+            cache.put(cache_key, results)
     return results
@@ -0,0 +1,262 @@
+import argparse
+import asyncio
+import functools
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+from .cache import ResultCache
+from .schedule import prepare_loan_summary, _validate_loan_params, SCHEDULE_ENGINES
+
+# largest request body accepted by the HTTP server, in bytes
+MAX_BODY_BYTES = 64 * 1024
+
+
+class ServiceBusy(RuntimeError):
+    """
+    Raised by `ScheduleService` when `max_pending` computations are already queued or running, so callers can
+    shed load (the HTTP server answers 503) instead of queueing without bound.
+    """
+
+
+class ScheduleService:
+    """
+    Runs `prepare_loan_summary` for asyncio code without blocking the event loop.
+
+    The CPU work runs in an executor: a thread pool, a process pool, or the event loop's default executor. Requests
+    for the same validated parameters and options that arrive while a computation is in flight share that
+    computation and receive the same results dict, so callers must not modify it. At most `max_pending` distinct
+    computations are queued or running at a time; further requests raise `ServiceBusy`.
+
+    Args:
+        executor (concurrent.futures.Executor): where computations run. The service doesn't shut it down.
+            Default is None, the event loop's default executor.
+        max_pending (int): maximum number of distinct computations queued or running. Default is 64.
+    """
+
+    def __init__(self, executor=None, max_pending: int = 64):
+        if max_pending < 1:
+            raise ValueError("max_pending must be a positive integer.")
+        self.executor = executor
+        self.max_pending = max_pending
+        self._in_flight = {}
+        self.requests = 0
+        self.computations = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    async def prepare_loan_summary(self, loan_params: dict, engine: str = 'daily', summarize_in_engine: bool = False):
+        """ Returns the results of `prepare_loan_summary(loan_params, engine=engine, summarize_in_engine=summarize_in_engine)`.
+
+        Parameters are validated in the calling task, so invalid parameters fail without using the executor.
+        Cancelling the call doesn't cancel a computation shared with other callers.
+        """
+        validated_params = _validate_loan_params(loan_params).model_dump()
+        key = ResultCache.key(validated_params, engine=engine, summarize_in_engine=summarize_in_engine)
+        self.requests += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            if len(self._in_flight) >= self.max_pending:
+                self.rejected += 1
+                raise ServiceBusy(f"{self.max_pending} schedule computations are already pending.")
+            call = functools.partial(prepare_loan_summary, validated_params, engine=engine,
+                                     summarize_in_engine=summarize_in_engine, validate=False)
+            future = asyncio.get_running_loop().run_in_executor(self.executor, call)
+            self._in_flight[key] = future
+            future.add_done_callback(functools.partial(self._forget, key))
+            self.computations += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            future.exception()  # marks the exception as retrieved when every caller was cancelled
+
+    def stats(self):
+        """ Returns the number of requests, computations started, requests coalesced into a pending computation,
+        requests rejected as busy, and computations pending now.
+        """
+        return {'requests': self.requests,
+                'computations': self.computations,
+                'coalesced': self.coalesced,
+                'rejected': self.rejected,
+                'pending': len(self._in_flight)}
+
+
+_default_service = None
+
+
+async def prepare_loan_summary_async(loan_params: dict, engine: str = 'daily', summarize_in_engine: bool = False,
+                                     service: ScheduleService = None):
+    """ Async version of `prepare_loan_summary`, running the computation in an executor so the event loop stays responsive.
+    Identical requests in flight at the same time are computed once. See `ScheduleService`.
+
+    Args:
+        loan_params (dict): loan parameters, as described in `prepare_loan_summary`.
+        engine (str): the schedule engine, "daily", "event" or "exact". Default is "daily".
+        summarize_in_engine (bool): see `prepare_loan_summary`. Default is False.
+        service (ScheduleService): service to run the computation on, e.g. one with a process pool. Default is a
+            shared service using the event loop's default executor.
+
+    Returns:
+        dict: the results of `prepare_loan_summary`. Results may be shared with other callers and must not be modified.
+    """
+    global _default_service
+    if service is None:
+        if _default_service is None:
+            _default_service = ScheduleService()
+        service = _default_service
+    return await service.prepare_loan_summary(loan_params, engine=engine, summarize_in_engine=summarize_in_engine)
+
+
+def summary_to_json(results: dict):
+    """ Returns the totals and monthly summary of `prepare_loan_summary` results as a JSON-serializable dict,
+    with months as 'YYYY-MM' strings.
+    """
+    monthly_summary = results['monthly_summary']
+    return {'total_interest_charged': float(results['total_interest_charged']),
+            'total_repayments': float(results['total_repayments']),
+            'monthly_summary': monthly_summary.assign(MONTH=monthly_summary['MONTH'].astype(str)).to_dict(orient='records')}
+
+
+class _HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+async def _route(service, method, target, body, engine):
+    """ Returns the status and JSON payload of one request.
+    """
+    url = urlsplit(target)
+    if url.path == '/summary':
+        if method != 'POST':
+            raise _HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST.")
+        try:
+            loan_params = json.loads(body)
+        except ValueError:
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object of loan parameters.")
+        if not isinstance(loan_params, dict):
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object of loan parameters.")
+        request_engine = parse_qs(url.query).get('engine', [engine])[-1]
+        if request_engine not in SCHEDULE_ENGINES:
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "Invalid engine. Choose 'daily', 'event' or 'exact'.")
+        try:
+            results = await service.prepare_loan_summary(loan_params, engine=request_engine, summarize_in_engine=True)
+        except ServiceBusy as e:
+            raise _HttpError(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+        except (ValueError, TypeError) as e:  # invalid parameters, including pydantic validation errors
+            raise _HttpError(HTTPStatus.BAD_REQUEST, str(e))
+        return HTTPStatus.OK, summary_to_json(results)
+    if url.path == '/stats':
+        if method != 'GET':
+            raise _HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Use GET.")
+        return HTTPStatus.OK, service.stats()
+    raise _HttpError(HTTPStatus.NOT_FOUND, f"Unknown path {url.path}.")
+
+
+async def _handle_connection(service, engine, reader, writer):
+    """ Serves the HTTP/1.1 requests of one connection, keeping it open between requests unless asked to close it.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = headers.get('connection', '').lower() != 'close'
+            try:
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    keep_alive = False
+                    raise _HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line.")
+                method, target, version = parts
+                keep_alive = keep_alive and version == 'HTTP/1.1'
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    keep_alive = False
+                    raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE if length > 0 else HTTPStatus.BAD_REQUEST,
+                                     f"Request body must be at most {MAX_BODY_BYTES} bytes.")
+                body = await reader.readexactly(length) if length else b''
+                status, payload = await _route(service, method, target, body, engine)
+            except _HttpError as e:
+                status, payload = e.status, {'error': str(e)}
+            data = json.dumps(payload).encode()
+            writer.write((f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                          f"Content-Type: application/json\r\n"
+                          f"Content-Length: {len(data)}\r\n"
+                          f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1') + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service: ScheduleService = None, host: str = '127.0.0.1', port: int = 8000, engine: str = 'event'):
+    """ Starts a local HTTP server answering schedule requests with JSON.
+
+    Endpoints:
+        POST /summary: the body is a JSON object of loan parameters, as described in `prepare_loan_summary`. Returns
+            total_interest_charged, total_repayments and monthly_summary (a list of monthly rows). `?engine=daily`
+            selects the schedule engine. Invalid parameters return 400, and 503 is returned when the service is busy.
+        GET /stats: the counters of `ScheduleService.stats`.
+
+    Args:
+        service (ScheduleService): service computing the schedules. Default is a service using the event loop's default executor.
+        host (str): address to listen on. Default is "127.0.0.1".
+        port (int): port to listen on; 0 picks a free port. Default is 8000.
+        engine (str): the schedule engine used unless a request asks for another one. Default is "event".
+
+    Returns:
+        asyncio.Server: the started server.
+    """
+    service = ScheduleService() if service is None else service
+    return await asyncio.start_server(functools.partial(_handle_connection, service, engine), host, port)
+
+
+async def _serve(args):
+    if args.processes:
+        executor = ProcessPoolExecutor(max_workers=args.workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.workers)
+    with executor:
+        server = await start_server(ScheduleService(executor, max_pending=args.max_pending), args.host, args.port, args.engine)
+        print(f"Serving loan schedules on http://{args.host}:{server.sockets[0].getsockname()[1]}")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve loan schedules over HTTP as JSON.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8000, help="port to listen on (default: %(default)s)")
+    parser.add_argument('--workers', type=int, help="number of worker threads or processes (default: chosen by the executor)")
+    parser.add_argument('--processes', action='store_true', help="run schedules in a process pool instead of a thread pool")
+    parser.add_argument('--max-pending', type=int, default=64, help="maximum number of pending computations (default: %(default)s)")
+    parser.add_argument('--engine', choices=SCHEDULE_ENGINES, default='event', help="default schedule engine (default: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import os
+import pandas as pd
+
+
+class TransactionSink:
+    """
+    Base class of the sinks that write chunks of transactions as they arrive, e.g. from `iter_loan_transactions`.
+
+    A sink writes to a path, which it opens and closes itself, or to a file object supplied by the caller, which is
+    left open. Sinks can be used as context managers. Subclasses implement `_write`, and `_close` if the output
+    needs a footer.
+
+    Args:
+        path_or_buffer (str | os.PathLike | file object): where to write the transactions.
+    """
+
+    # mode used to open paths; file objects must be opened in the same mode
+    mode = 'w'
+
+    def __init__(self, path_or_buffer):
+        if isinstance(path_or_buffer, (str, os.PathLike)):
+            self.file = open(path_or_buffer, self.mode, **({'newline': ''} if self.mode == 'w' else {}))
+            self._owns_file = True
+        else:
+            self.file = path_or_buffer
+            self._owns_file = False
+        self.rows_written = 0
+        self.closed = False
+
+    def write(self, batch: pd.DataFrame):
+        """ Writes one chunk of transactions.
+
+        Args:
+            batch (pd.DataFrame): transactions with the columns of `generate_loan_transactions`.
+        """
+        if self.closed:
+            raise ValueError("Cannot write to a closed sink.")
+        self._write(batch)
+        self.rows_written += len(batch)
+
+    def close(self):
+        """ Finishes the output and closes the file if the sink opened it. Closing twice has no effect.
+        """
+        if self.closed:
+            return
+        self._close()
+        self.closed = True
+        if self._owns_file:
+            self.file.close()
+
+    def _write(self, batch):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvSink(TransactionSink):
+    """
+    Writes transactions as CSV, in the same format as the `loan_transactions.csv` file of `prepare_loan_summary`
+    (without the index). The header is written with the first chunk.
+    """
+
+    def _write(self, batch):
+        batch.to_csv(self.file, index=False, header=self.rows_written == 0)
+
+
+class JsonLinesSink(TransactionSink):
+    """
+    Writes transactions as JSON lines, one object per transaction, with dates in ISO format.
+    """
+
+    def _write(self, batch):
+        if len(batch) == 0:
+            return
+        text = batch.to_json(orient='records', lines=True, date_format='iso')
+        self.file.write(text if text.endswith('\n') else text + '\n')
+
+
+class ParquetSink(TransactionSink):
+    """
+    Writes transactions as a Parquet file, one row group per chunk. Requires pyarrow.
+    """
+
+    mode = 'wb'
+
+    def __init__(self, path_or_buffer):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("pyarrow is required to write transactions to Parquet. Install it with `pip install pyarrow`.") from e
+        super().__init__(path_or_buffer)
+        self._pa = pa
+        self._pq = pq
+        self._writer = None
+
+    def _write(self, batch):
+        table = self._pa.Table.from_pandas(batch, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.file, table.schema)
+        self._writer.write_table(table)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def write_transactions(batches, sink: TransactionSink):
+    """ Writes chunks of transactions to a sink as they arrive, then closes the sink.
+
+    Args:
+        batches (iterable): chunks of transactions as DataFrames, e.g. from `iter_loan_transactions`.
+        sink (TransactionSink): where to write them.
+
+    Returns:
+        int: the number of transactions written.
+    """
+    with sink:
+        for batch in batches:
+            sink.write(batch)
+    return sink.rows_written
@@ -0,0 +1,160 @@
+import time
+from datetime import datetime
+from typing import NamedTuple
+from .schedule import calculate_loan_totals, LoanTotals, _validate_loan_params
+
+# loan parameters that `goal_seek` can solve for; more of any of them pays the loan off sooner
+SOLVABLE_PARAMETERS = ('extra_repayments_regular_amount', 'offset_contribution_regular_amount', 'initial_offset_amount')
+
+
+class GoalSeekResult(NamedTuple):
+    """ Result of `goal_seek`.
+    """
+    value: float  # solved value of the parameter
+    totals: LoanTotals  # totals of the loan with the solved value
+    iterations: int
+    evaluations: int  # number of schedules run, i.e. evaluations not found in the cache
+    elapsed_seconds: float
+    converged: bool
+
+
+def goal_seek(loan_params : dict, parameter : str, target_payoff_date=None, target_total_interest : float = None,
+              bounds : tuple = None, tolerance : float = 0.01, max_iterations : int = 100, cache : dict = None):
+    """ Finds the value of a loan parameter that pays the loan off by a target date, or that brings the total
+    interest charged down to a target amount. Only loan totals are evaluated (see `calculate_loan_totals`).
+
+    A payoff date target is solved by bisection, as the payoff date moves in whole days, and returns the smallest
+    value (within `tolerance`) paying the loan off on or before the target. A total interest target is solved with
+    Brent's method.
+
+    Args:
+        loan_params (dict): loan parameters, as described in `prepare_loan_summary`.
+        parameter (str): the parameter to solve for: 'extra_repayments_regular_amount', 'offset_contribution_regular_amount'
+            or 'initial_offset_amount'. Its value in `loan_params` is ignored.
+        target_payoff_date (str or datetime): the date by which the loan should be paid off, in YYYY-MM-DD format if a string.
+        target_total_interest (float): the total interest to be charged over the life of the loan.
+            Exactly one of `target_payoff_date` and `target_total_interest` must be given.
+        bounds (tuple): the (lower, upper) values of the parameter to search between. Default is (0, loan_amount).
+        tolerance (float): the solution is within this distance of the exact value, in dollars. Default is 0.01.
+        max_iterations (int): maximum number of iterations. Default is 100.
+        cache (dict): evaluations to reuse, keyed on parameter values. Pass the same dict to several solves of the
+            same loan and parameter to share evaluations between them. Default is a new cache for this solve.
+
+    Returns:
+        GoalSeekResult: the solved value and the corresponding loan totals, with the number of iterations,
+        the number of schedules evaluated, the time taken and whether the solver converged.
+    """
+    if parameter not in SOLVABLE_PARAMETERS:
+        raise ValueError("Invalid parameter. Choose 'extra_repayments_regular_amount', 'offset_contribution_regular_amount' or 'initial_offset_amount'.")
+    if (target_payoff_date is None) == (target_total_interest is None):
+        raise ValueError("Provide exactly one of target_payoff_date and target_total_interest.")
+    if bounds is None:
+        bounds = (0, loan_params['loan_amount'])
+    lower, upper = bounds
+    if not 0 <= lower < upper:
+        raise ValueError("Invalid bounds. Lower bound must be non-negative and less than upper bound.")
+
+    started = time.perf_counter()
+    # the parameters are validated once, rather than on every evaluation
+    _validate_loan_params({**loan_params, parameter: upper})
+    cache = {} if cache is None else cache
+    evaluations = 0
+
+    def totals(value):
+        nonlocal evaluations
+        if value not in cache:
+            cache[value] = calculate_loan_totals({**loan_params, parameter: value}, validate=False)
+            evaluations += 1
+        return cache[value]
+
+    if target_payoff_date is not None:
+        if isinstance(target_payoff_date, str):
+            target_payoff_date = datetime.strptime(target_payoff_date, '%Y-%m-%d')
+
+        def paid_off_by_target(value):
+            payoff_date = totals(value).payoff_date
+            return payoff_date is not None and payoff_date <= target_payoff_date
+
+        if not paid_off_by_target(upper):
+            raise ValueError("Target payoff date cannot be reached within bounds.")
+        value, iterations, converged = _bisect(paid_off_by_target, lower, upper, tolerance, max_iterations)
+    else:
+        def interest_above_target(value):
+            return totals(value).total_interest_charged - target_total_interest
+
+        f_lower, f_upper = interest_above_target(lower), interest_above_target(upper)
+        if f_lower * f_upper > 0:
+            raise ValueError("Target total interest cannot be reached within bounds.")
+        value, iterations, converged = _brent(interest_above_target, lower, upper, f_lower, f_upper,
+                                              tolerance, max_iterations)
+
+    return GoalSeekResult(value, totals(value), iterations, evaluations, time.perf_counter() - started, converged)
+
+
+def _bisect(predicate, lower, upper, tolerance, max_iterations):
+    """ Finds the smallest value in [lower, upper] for which a monotonic `predicate` holds, given that it holds at
+    `upper`. Returns the value, the number of iterations and whether the bracket shrank to `tolerance`.
+    """
+    if predicate(lower):
+        return lower, 0, True
+    for iteration in range(1, max_iterations + 1):
+        middle = (lower + upper) / 2
+        if predicate(middle):
+            upper = middle
+        else:
+            lower = middle
+        if upper - lower <= tolerance:
+            return upper, iteration, True
+    return upper, max_iterations, False
+
+
+def _brent(f, lower, upper, f_lower, f_upper, tolerance, max_iterations):
+    """ Brent's method for a root of `f` bracketed by [lower, upper], following the Brent-Dekker algorithm used by
+    `scipy.optimize.brentq`. Returns the root, the number of iterations and whether it converged.
+    """
+    if f_lower == 0:
+        return lower, 0, True
+    if f_upper == 0:
+        return upper, 0, True
+    x_previous, f_previous = lower, f_lower
+    x_current, f_current = upper, f_upper
+    x_block, f_block = lower, f_lower
+    step_previous = step_current = upper - lower
+    for iteration in range(1, max_iterations + 1):
+        if f_previous * f_current < 0:
+            x_block, f_block = x_previous, f_previous
+            step_previous = step_current = x_current - x_previous
+        if abs(f_block) < abs(f_current):
+            # keep the best estimate in x_current
+            x_previous, x_current, x_block = x_current, x_block, x_current
+            f_previous, f_current, f_block = f_current, f_block, f_current
+
+        delta = tolerance / 2
+        step_bisect = (x_block - x_current) / 2
+        if f_current == 0 or abs(step_bisect) < delta:
+            return x_current, iteration, True
+
+        if abs(step_previous) > delta and abs(f_current) < abs(f_previous):
+            if x_previous == x_block:
+                # secant step
+                step_try = -f_current * (x_current - x_previous) / (f_current - f_previous)
+            else:
+                # inverse quadratic interpolation
+                d_previous = (f_previous - f_current) / (x_previous - x_current)
+                d_block = (f_block - f_current) / (x_block - x_current)
+                step_try = -f_current * (f_block * d_block - f_previous * d_previous) / \
+                           (d_block * d_previous * (f_block - f_previous))
+            if 2 * abs(step_try) < min(abs(step_previous), 3 * abs(step_bisect) - delta):
+                step_previous, step_current = step_current, step_try
+            else:
+                step_previous = step_current = step_bisect
+        else:
+            step_previous = step_current = step_bisect
+
+        x_previous, f_previous = x_current, f_current
+        if abs(step_current) > delta:
+            x_current += step_current
+        else:
+            x_current += delta if step_bisect > 0 else -delta
+        f_current = f(x_current)
+    return x_current, max_iterations, False
@@ -0,0 +1,427 @@
+from array import array
+from datetime import date, datetime
+
+TRANSACTION_COLUMNS = ['Date', 'Transaction Type', 'Transaction Amount', 'Loan Balance', 'Offset Balance']
+
+# transaction types in the order they are recorded on a given day; the position is the type code
+TRANSACTION_TYPES = ['Settlement', 'Daily Interest Acrrued', 'Monthly Interest Acrrued', 'Interest Charged',
+                     'Offset Contribution', 'Repayment', 'Extra Repayment']
+SETTLEMENT, DAILY_ACCRUAL, MONTHLY_ACCRUAL, INTEREST_CHARGED, OFFSET_CONTRIBUTION, REPAYMENT, EXTRA_REPAYMENT = range(7)
+
+# valid values of the `output` argument of the schedule engines
+TRANSACTION_OUTPUTS = ('pandas', 'arrow', 'buffer')
+
+# proleptic Gregorian ordinal of 1970-01-01, used to store dates as datetime64[D] day numbers
+EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+
+class TransactionBuffer:
+    """
+    Compact, columnar store for loan transactions.
+
+    Each column is a typed array that grows as rows are appended: dates as int32 day numbers (datetime64[D]),
+    transaction types as int8 codes into `TRANSACTION_TYPES`, and amounts and balances as float64. This takes
+    about 29 bytes per row, against a few hundred for a list of Python objects, and the columns are handed
+    to pandas or Arrow without a row-by-row copy.
+
+    Interest accruals are not stored as rows: `accrue` records them in an `AccrualLedger`, and the 'Daily Interest
+    Acrrued' and 'Monthly Interest Acrrued' rows are only built when the transactions are converted. `len` counts
+    them as two rows per accrual day.
+
+    Once converted with `to_frame` or `to_arrow`, the returned objects share memory with the buffer, so no more
+    rows can be appended to it. This does not hold for buffers with interest accruals, whose accrual rows are
+    interleaved into new arrays on conversion.
+    """
+
+    def __init__(self):
+        self.days = array('i')
+        self.types = array('b')
+        self.amounts = array('d')
+        self.loan_balances = array('d')
+        self.offset_balances = array('d')
+        self.monthly_summary = None
+        self.accruals = None
+
+    def __len__(self):
+        return len(self.types) + (2 * len(self.accruals) if self.accruals is not None else 0)
+
+    def append(self, day, transaction_type, transaction_amount, loan_balance, offset_balance):
+        """ Appends one transaction.
+
+        Args:
+            day (int): The transaction date as a number of days since 1970-01-01 (see `day_number`).
+            transaction_type (int): The type code, i.e. the position of the type in `TRANSACTION_TYPES`.
+            transaction_amount (float): The transaction amount.
+            loan_balance (float): The loan balance after the transaction.
+            offset_balance (float): The offset balance after the transaction.
+        """
+        self.days.append(day)
+        self.types.append(transaction_type)
+        self.amounts.append(transaction_amount)
+        self.loan_balances.append(loan_balance)
+        self.offset_balances.append(offset_balance)
+
+    def accrue(self, day, daily_interest, n_days, accrued_interest, loan_balance, offset_balance, scale=1):
+        """ Records the interest accrued on `n_days` consecutive days from `day`, `daily_interest` on each day.
+        Accruals of a day come before its other transactions, and accrual days must follow each other. The accrued
+        interest and balances are only kept for the first accrual of the buffer, to build the running totals and
+        balances of the days before the buffer's first transaction.
+
+        Args:
+            day (int): the first accrual day, as a number of days since 1970-01-01.
+            daily_interest (float): interest accrued on each of the days, in units of `scale`.
+            n_days (int): number of days.
+            accrued_interest (float): interest accrued but not charged before `day`, in units of `scale`.
+            loan_balance (float): the loan balance on the days.
+            offset_balance (float): the offset balance on the days.
+            scale (int): units of interest per dollar, e.g. micro-cents for the exact engine. Default is 1.
+        """
+        if self.accruals is None:
+            self.accruals = AccrualLedger(day, accrued_interest, loan_balance, offset_balance, scale)
+        self.accruals.accrue(day, daily_interest, n_days)
+
+    def head(self, n):
+        """ Returns a new buffer holding a copy of the first `n` transactions. The two accrual rows of a day are
+        kept or dropped together.
+        """
+        head = TransactionBuffer()
+        n_days = 0
+        if self.accruals is not None and len(self.accruals):
+            import numpy as np
+            days, accrual_days = np.frombuffer(self.days, dtype=np.int32), self.accruals.days()
+            # position of each transaction and of the first accrual row of each day in the interleaved rows
+            positions = np.arange(len(days)) + 2 * np.searchsorted(accrual_days, days, side='right')
+            accrual_positions = 2 * np.arange(len(accrual_days)) + np.searchsorted(days, accrual_days, side='left')
+            n, n_days = int(np.count_nonzero(positions < n)), int(np.count_nonzero(accrual_positions + 1 < n))
+            head.accruals = self.accruals.head(n_days)
+        head.days = self.days[:n]
+        head.types = self.types[:n]
+        head.amounts = self.amounts[:n]
+        head.loan_balances = self.loan_balances[:n]
+        head.offset_balances = self.offset_balances[:n]
+        return head
+
+    def extend(self, other):
+        """ Appends all transactions of another buffer.
+        """
+        self.days.extend(other.days)
+        self.types.extend(other.types)
+        self.amounts.extend(other.amounts)
+        self.loan_balances.extend(other.loan_balances)
+        self.offset_balances.extend(other.offset_balances)
+        if other.accruals is not None and len(other.accruals):
+            if self.accruals is None or not len(self.accruals):
+                self.accruals = other.accruals.head(len(other.accruals))
+            else:
+                self.accruals.extend(other.accruals)
+
+    def _event_columns(self):
+        import numpy as np
+        return (np.frombuffer(self.days, dtype=np.int32).astype(np.int64),
+                np.frombuffer(self.types, dtype=np.int8),
+                np.frombuffer(self.amounts, dtype=np.float64),
+                np.frombuffer(self.loan_balances, dtype=np.float64),
+                np.frombuffer(self.offset_balances, dtype=np.float64))
+
+    def columns(self):
+        """ Returns the columns as NumPy arrays: dates (datetime64[D]), type codes (int8), transaction amounts,
+        loan balances and offset balances (float64). Without interest accruals, all but the dates share memory with
+        the buffer; with them, the accrual rows are interleaved into new arrays.
+        """
+        days, *columns = self._event_columns()
+        if self.accruals is not None and len(self.accruals):
+            days, *columns = self.accruals.interleave(days, *columns)
+        return (days.view('datetime64[D]'), *columns)
+
+    def accrual_frame(self):
+        """ Returns the interest accruals as a DataFrame with one row per day: 'Date', 'Daily Interest Accrued',
+        'Monthly Interest Accrued' (accrued since the last interest charge), 'Loan Balance' and 'Offset Balance'.
+        Builds the same values as the accrual rows of `to_frame`, without interleaving them with the transactions.
+        """
+        import pandas as pd
+        if self.accruals is None:
+            return pd.DataFrame(columns=['Date', 'Daily Interest Accrued', 'Monthly Interest Accrued', 'Loan Balance', 'Offset Balance'])
+        days, types, _, loan_balances, offset_balances = self._event_columns()
+        accrual_loan_balances, accrual_offset_balances = self.accruals.balances(days, loan_balances, offset_balances)
+        return pd.DataFrame({'Date': self.accruals.days().astype('datetime64[D]').astype('datetime64[ns]'),
+                             'Daily Interest Accrued': self.accruals.daily_interest(),
+                             'Monthly Interest Accrued': self.accruals.running_totals(days, types),
+                             'Loan Balance': accrual_loan_balances,
+                             'Offset Balance': accrual_offset_balances})
+
+    def to_frame(self):
+        """ Returns the transactions as a DataFrame with the columns of `generate_loan_transactions`.
+        'Transaction Type' is a categorical. Without interest accruals, the amount and balance columns share memory
+        with the buffer; with them, the accrual rows are interleaved into new arrays.
+        """
+        return transactions_frame(*self.columns())
+
+    def to_arrow(self):
+        """ Returns the transactions as a `pyarrow.Table`, with dates as date32 and the transaction type dictionary encoded.
+        Requires pyarrow.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("pyarrow is required to export transactions as an Arrow table. Install it with `pip install pyarrow`.") from e
+        days, types, amounts, loan_balances, offset_balances = self.columns()
+        return pa.table({'Date': pa.array(days, type=pa.date32()),
+                         'Transaction Type': pa.DictionaryArray.from_arrays(pa.array(types, type=pa.int8()),
+                                                                            pa.array(TRANSACTION_TYPES)),
+                         'Transaction Amount': pa.array(amounts),
+                         'Loan Balance': pa.array(loan_balances),
+                         'Offset Balance': pa.array(offset_balances)})
+
+
+class AccrualLedger:
+    """
+    Daily interest accruals of a schedule over consecutive days, stored as one float64 per day instead of two
+    transaction rows repeating the date and balances: about 8 bytes per day against 58.
+
+    The interest accrued since the last charge ('Monthly Interest Acrrued') and the balances of each day are not
+    stored. They are worked out from the transactions of the buffer holding the ledger when the accrual rows are
+    built: the running total is the cumulative sum of the daily accruals since the last interest charge, and the
+    balances are those after the last transaction before the day.
+
+    Args:
+        first_day (int): the first accrual day, as a number of days since 1970-01-01.
+        accrued_interest (float): interest accrued but not charged before `first_day`, in units of `scale`.
+        loan_balance (float): loan balance before `first_day`.
+        offset_balance (float): offset balance before `first_day`.
+        scale (int): units of interest per dollar. Daily accruals are integer micro-cents for the exact engine,
+            which keeps their cumulative sums exact. Default is 1 (dollars).
+    """
+
+    def __init__(self, first_day, accrued_interest=0.0, loan_balance=0.0, offset_balance=0.0, scale=1):
+        self.first_day = first_day
+        self.daily = array('d')
+        self.accrued_interest = accrued_interest
+        self.loan_balance = loan_balance
+        self.offset_balance = offset_balance
+        self.scale = scale
+
+    def __len__(self):
+        return len(self.daily)
+
+    def accrue(self, day, daily_interest, n_days=1):
+        """ Appends `n_days` days accruing `daily_interest` each, from `day`. """
+        if day != self.first_day + len(self.daily):
+            raise ValueError("Accrual days must follow each other.")
+        if n_days == 1:
+            self.daily.append(daily_interest)
+        else:
+            self.daily.extend(array('d', [daily_interest]) * n_days)
+
+    def head(self, n_days):
+        """ Returns a new ledger holding a copy of the first `n_days` days. """
+        head = AccrualLedger(self.first_day, self.accrued_interest, self.loan_balance, self.offset_balance, self.scale)
+        head.daily = self.daily[:n_days]
+        return head
+
+    def extend(self, other):
+        """ Appends the days of a ledger starting on the day after the last day of this one. """
+        if other.first_day != self.first_day + len(self.daily) or other.scale != self.scale:
+            raise ValueError("Accrual days must follow each other.")
+        self.daily.extend(other.daily)
+
+    def days(self):
+        """ Returns the accrual days as numbers of days since 1970-01-01 (int64). """
+        import numpy as np
+        return np.arange(self.first_day, self.first_day + len(self.daily), dtype=np.int64)
+
+    def daily_interest(self):
+        """ Returns the interest accrued on each day, in dollars. """
+        import numpy as np
+        daily = np.frombuffer(self.daily, dtype=np.float64)
+        return daily if self.scale == 1 else daily / self.scale
+
+    def running_totals(self, days, types):
+        """ Returns the interest accrued since the last interest charge at the end of each day, in dollars.
+
+        Args:
+            days (np.ndarray): day numbers of the transactions of the buffer holding the ledger.
+            types (np.ndarray): their type codes.
+        """
+        import numpy as np
+        daily = np.frombuffer(self.daily, dtype=np.float64)
+        # an interest charge resets the running total from the next day on
+        charge_days = days[types == INTEREST_CHARGED]
+        segments = np.searchsorted(charge_days, self.days(), side='left')
+        starts = np.flatnonzero(np.r_[True, segments[1:] != segments[:-1]])
+        totals = np.empty(len(daily))
+        for start, stop in zip(starts, np.r_[starts[1:], len(daily)]):
+            opening = self.accrued_interest if start == 0 and segments[0] == 0 else 0.0
+            # summed one day at a time in day order, as the engines accrue it
+            totals[start:stop] = np.cumsum(np.r_[opening, daily[start:stop]])[1:]
+        return totals if self.scale == 1 else totals / self.scale
+
+    def balances(self, days, loan_balances, offset_balances):
+        """ Returns the loan and offset balances of each day: those after the last transaction before the day. """
+        import numpy as np
+        last = np.searchsorted(days, self.days(), side='left') - 1
+        before = last < 0
+        last[before] = 0
+        if not len(days):
+            return np.full(len(last), float(self.loan_balance)), np.full(len(last), float(self.offset_balance))
+        return (np.where(before, self.loan_balance, loan_balances[last]),
+                np.where(before, self.offset_balance, offset_balances[last]))
+
+    def interleave(self, days, types, amounts, loan_balances, offset_balances):
+        """ Returns the columns of transactions (day numbers, type codes, amounts, loan and offset balances) with a
+        'Daily Interest Acrrued' and a 'Monthly Interest Acrrued' row added before the transactions of every accrual day.
+        """
+        import numpy as np
+        accrual_days = self.days()
+        n_rows = len(days) + 2 * len(accrual_days)
+        # both sides are in day order, so the position of each row in the result is known without sorting
+        positions = np.arange(len(days)) + 2 * np.searchsorted(accrual_days, days, side='right')
+        daily_positions = 2 * np.arange(len(accrual_days)) + np.searchsorted(days, accrual_days, side='left')
+        accrual_loan_balances, accrual_offset_balances = self.balances(days, loan_balances, offset_balances)
+        columns = []
+        for column, daily_value, monthly_value in (
+                (days, accrual_days, accrual_days),
+                (types, DAILY_ACCRUAL, MONTHLY_ACCRUAL),
+                (amounts, self.daily_interest(), self.running_totals(days, types)),
+                (loan_balances, accrual_loan_balances, accrual_loan_balances),
+                (offset_balances, accrual_offset_balances, accrual_offset_balances)):
+            result = np.empty(n_rows, dtype=column.dtype)
+            result[positions] = column
+            result[daily_positions] = daily_value
+            result[daily_positions + 1] = monthly_value
+            columns.append(result)
+        return tuple(columns)
+
+
+class SummarizingTransactionBuffer(TransactionBuffer):
+    """
+    Transaction buffer that also builds the monthly summary while transactions are appended, so the transactions
+    don't need a second pass through `create_monthly_summary`. Transactions must be appended in date order.
+
+    Args:
+        monthly_summary (MonthlySummary): summary to add the transactions to, e.g. to carry on the summary of a
+            previous chunk of transactions. A new summary is started by default.
+    """
+
+    def __init__(self, monthly_summary=None):
+        super().__init__()
+        self.monthly_summary = MonthlySummary() if monthly_summary is None else monthly_summary
+
+    def append(self, day, transaction_type, transaction_amount, loan_balance, offset_balance):
+        super().append(day, transaction_type, transaction_amount, loan_balance, offset_balance)
+        self.monthly_summary.add(day, transaction_type, transaction_amount, loan_balance, offset_balance)
+
+    def accrue(self, day, daily_interest, n_days, accrued_interest, loan_balance, offset_balance, scale=1):
+        super().accrue(day, daily_interest, n_days, accrued_interest, loan_balance, offset_balance, scale)
+        # accruals don't change the totals, but start the months they fall in; the first day of each is enough
+        last_day = day + n_days - 1
+        while True:
+            self.monthly_summary.add(day, DAILY_ACCRUAL, daily_interest, loan_balance, offset_balance)
+            if self.monthly_summary._next_month_day > last_day:
+                break
+            day = self.monthly_summary._next_month_day
+
+
+class MonthlySummary:
+    """
+    Running monthly rollup of transactions: total repayment, total interest charged, loan balance of the first
+    transaction and offset balance of the last transaction of every month. Transactions must be added in date order.
+    """
+
+    def __init__(self):
+        self.months = array('i')
+        self.total_repayment = array('d')
+        self.total_interest = array('d')
+        self.loan_balance_first_day = array('d')
+        self.offset_balance_last_day = array('d')
+        # day number of the first day of the month after the current one
+        self._next_month_day = None
+
+    def add(self, day, transaction_type, transaction_amount, loan_balance, offset_balance):
+        """ Adds one transaction to the rollup. Arguments are the same as `TransactionBuffer.append`.
+        """
+        if self._next_month_day is None or day >= self._next_month_day:
+            self._start_month(day, loan_balance)
+        if transaction_type == REPAYMENT:
+            self.total_repayment[-1] += transaction_amount
+        elif transaction_type == INTEREST_CHARGED:
+            self.total_interest[-1] += transaction_amount
+        self.offset_balance_last_day[-1] = offset_balance
+
+    def _start_month(self, day, loan_balance):
+        c_date = date.fromordinal(day + EPOCH_ORDINAL)
+        self.months.append((c_date.year - 1970) * 12 + c_date.month - 1)
+        self.total_repayment.append(0.0)
+        self.total_interest.append(0.0)
+        self.loan_balance_first_day.append(loan_balance)
+        self.offset_balance_last_day.append(0.0)
+        next_month = date(c_date.year + c_date.month // 12, c_date.month % 12 + 1, 1)
+        self._next_month_day = next_month.toordinal() - EPOCH_ORDINAL
+
+    def summary(self):
+        """ Returns the same (monthly summary, total interest charged, total repayments) tuple as `create_monthly_summary`.
+        """
+        import numpy as np
+        return monthly_summary_frame(np.frombuffer(self.months, dtype=np.int32),
+                                     np.frombuffer(self.total_repayment, dtype=np.float64),
+                                     np.frombuffer(self.total_interest, dtype=np.float64),
+                                     np.frombuffer(self.loan_balance_first_day, dtype=np.float64),
+                                     np.frombuffer(self.offset_balance_last_day, dtype=np.float64))
+
+
+def monthly_summary_frame(months, total_repayment, total_interest, loan_balance_first_day, offset_balance_last_day):
+    """ Builds the monthly summary dataframe and totals returned by `create_monthly_summary`.
+
+    Args:
+        months (np.ndarray): months as the number of months since 1970-01.
+        total_repayment (np.ndarray): total repayment of each month.
+        total_interest (np.ndarray): total interest charged in each month.
+        loan_balance_first_day (np.ndarray): loan balance of the first transaction of each month.
+        offset_balance_last_day (np.ndarray): offset balance of the last transaction of each month.
+
+    Returns:
+        tuple: the monthly summary dataframe, total interest charged and total repayments.
+    """
+    import numpy as np
+    import pandas as pd
+    result = pd.DataFrame({'MONTH': pd.PeriodIndex.from_ordinals(np.asarray(months, dtype=np.int64), freq='M'),
+                           'Total Repayment': total_repayment,
+                           'Total Interest Charged': total_interest,
+                           'Loan Balance (First Day of Month)': loan_balance_first_day,
+                           'Offset Balance (Last Day of Month)': offset_balance_last_day})
+    # compute summary metrices
+    total_interest_paid = result['Total Interest Charged'].sum()
+    total_payments_made = result['Total Repayment'].sum()
+    return result, total_interest_paid, total_payments_made
+
+
+def transactions_frame(days, types, amounts, loan_balances, offset_balances):
+    """ Builds the transactions dataframe of `generate_loan_transactions` from its columns, as returned by
+    `TransactionBuffer.columns`. The amount and balance columns are not copied.
+    """
+    import pandas as pd
+    return pd.DataFrame({'Date': days.astype('datetime64[ns]'),
+                         'Transaction Type': pd.Categorical.from_codes(types, categories=TRANSACTION_TYPES),
+                         'Transaction Amount': amounts,
+                         'Loan Balance': loan_balances,
+                         'Offset Balance': offset_balances},
+                        copy=False)
+
+
+def day_number(c_date):
+    """ Returns the number of days between 1970-01-01 and `c_date`, as stored by `TransactionBuffer`.
+    """
+    return c_date.toordinal() - EPOCH_ORDINAL
+
+
+def convert_transactions(transactions: TransactionBuffer, output: str = 'pandas'):
+    """ Converts a transaction buffer to the requested output: 'pandas' for a DataFrame, 'arrow' for a pyarrow Table
+    or 'buffer' for the buffer itself.
+    """
+    if output == 'pandas':
+        return transactions.to_frame()
+    elif output == 'arrow':
+        return transactions.to_arrow()
+    elif output == 'buffer':
+        return transactions
+    else:
+        raise ValueError("Invalid output. Choose 'pandas', 'arrow' or 'buffer'.")
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+# frequencies accepted by the schedule engines. Repayments also need a number of payments per year, which
+# `calculate_minimum_repayment` does not define for 'daily', and names 'annual' rather than 'annually'.
+REPAYMENT_FREQUENCIES = ('weekly', 'fortnightly', 'monthly', 'quarterly')
+CONTRIBUTION_FREQUENCIES = ('daily', 'weekly', 'fortnightly', 'monthly', 'quarterly', 'annually')
+
+# loan parameters and their kind, in the order of `inputval_prepare_loan_summary`
+LOAN_PARAMETERS = {
+    'start_date': 'date',
+    'loan_amount': 'amount',
+    'annual_rate': 'amount',
+    'loan_duration_years': 'integer',
+    'loan_duration_months': 'integer',
+    'repayment_frequency': REPAYMENT_FREQUENCIES,
+    'initial_offset_amount': 'amount',
+    'offset_contribution_frequency': CONTRIBUTION_FREQUENCIES,
+    'offset_contribution_regular_amount': 'amount',
+    'extra_repayments_frequency': CONTRIBUTION_FREQUENCIES,
+    'extra_repayments_regular_amount': 'amount',
+    'capture_interest_accrual': 'bool',
+}
+
+# columns of the errors table returned by `validate_loan_table`
+ERROR_COLUMNS = ('row', 'parameter', 'value', 'message')
+
+
+class LoanParameterError(ValueError):
+    """
+    Raised by `validate_loan_table` when rows of a loan parameter table are invalid. The `errors` attribute holds
+    every error found, as returned by `validate_loan_table(..., raise_errors=False)`.
+    """
+
+    # number of errors listed in the message
+    max_listed = 20
+
+    def __init__(self, errors: pd.DataFrame):
+        self.errors = errors
+        lines = [f"row {row!r}, {parameter}={value!r}: {message}"
+                 for row, parameter, value, message in errors.head(self.max_listed).itertuples(index=False)]
+        if len(errors) > self.max_listed:
+            lines.append(f"... and {len(errors) - self.max_listed} more")
+        super().__init__(f"{len(errors)} invalid loan parameter(s) in {errors['row'].nunique()} row(s):\n" + "\n".join(lines))
+
+
+def _as_frame(params_table):
+    if hasattr(params_table, 'to_pandas'):  # pyarrow Table or RecordBatch
+        return params_table.to_pandas()
+    return pd.DataFrame(params_table)
+
+
+def _python_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _is_number(column: pd.Series):
+    """ Whether each value is a real number; booleans and numeric strings are not. """
+    if pd.api.types.is_bool_dtype(column):
+        return pd.Series(False, index=column.index)
+    if pd.api.types.is_numeric_dtype(column):
+        return pd.Series(True, index=column.index)
+    return column.map(lambda value: isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)))
+
+
+def _check_column(name, column: pd.Series, kind):
+    """ Yields (invalid mask, message) pairs for one column. A value is reported once, for its first failed check. """
+    if kind == 'date':
+        if pd.api.types.is_object_dtype(column) or pd.api.types.is_string_dtype(column):
+            strings = column.where(column.map(type) == str)
+        else:
+            strings = pd.Series(None, index=column.index, dtype=object)
+        dates = pd.to_datetime(strings, format='%Y-%m-%d', errors='coerce')
+        yield dates.isna().to_numpy(), "must be a date string in YYYY-MM-DD format"
+    elif kind == 'bool':
+        if pd.api.types.is_bool_dtype(column):
+            return
+        # the parameter is optional, so missing values stand for False
+        valid = column.isna() | column.map(lambda value: isinstance(value, (bool, np.bool_)) or (type(value) is int and value in (0, 1)))
+        yield ~valid.to_numpy(dtype=bool), "must be True or False"
+    elif kind in ('amount', 'integer'):
+        is_number = _is_number(column).to_numpy(dtype=bool)
+        values = pd.to_numeric(column.where(is_number), errors='coerce').to_numpy(dtype=np.float64)
+        finite = np.isfinite(values)
+        yield ~(is_number & finite), "must be a finite number"
+        with np.errstate(invalid='ignore'):
+            if kind == 'integer':
+                yield finite & (values != np.floor(values)), "must be a whole number"
+            yield finite & (values < 0), "must not be negative"
+    else:
+        names = ', '.join(f"'{frequency}'" for frequency in kind)
+        yield ~column.isin(kind).to_numpy(), f"Invalid {name.replace('_', ' ')}. Choose {names}."
+
+
+def validate_loan_table(params_table, raise_errors: bool = True):
+    """ Validates a whole table of loan parameters at once, before any loan is simulated.
+
+    Each column is checked in one vectorized pass for its type (dates as YYYY-MM-DD strings, finite numbers, whole
+    numbers of years and months, booleans), its range (no negative amounts, rates or terms, and a term of at least
+    one month) and, for frequencies, the allowed values. Every invalid value of every row is reported, so a batch
+    can be fixed in one go instead of failing on its first bad loan.
+
+    Args:
+        params_table (pd.DataFrame, pyarrow.Table or list): one row (or dict) per loan, with the fields of
+            `inputval_prepare_loan_summary`. `capture_interest_accrual` is optional, and missing values of it mean False.
+        raise_errors (bool): whether to raise `LoanParameterError` when a row is invalid. Default is True.
+
+    Returns:
+        pd.DataFrame: one row per invalid value, with the row index label, parameter, value and error message,
+        in table order. Empty if every row is valid.
+    """
+    params = _as_frame(params_table)
+    missing = [name for name in LOAN_PARAMETERS if name not in params.columns and name != 'capture_interest_accrual']
+    if missing:
+        raise ValueError(f"Missing loan parameters: {', '.join(missing)}.")
+
+    positions, parameters, messages = [], [], []
+    invalid_anywhere = {}
+    for order, (name, kind) in enumerate(LOAN_PARAMETERS.items()):
+        if name not in params.columns:
+            continue
+        reported = np.zeros(len(params), dtype=bool)
+        for invalid, message in _check_column(name, params[name], kind):
+            invalid = invalid & ~reported
+            reported |= invalid
+            rows = np.flatnonzero(invalid)
+            positions.append(rows)
+            parameters.append(np.full(len(rows), order))
+            messages.extend([(name, message)] * len(rows))
+        invalid_anywhere[name] = reported
+
+    # a loan needs at least one month to be amortized over, unless its years or months are already invalid
+    years = pd.to_numeric(params['loan_duration_years'], errors='coerce').to_numpy(dtype=np.float64)
+    months = pd.to_numeric(params['loan_duration_months'], errors='coerce').to_numpy(dtype=np.float64)
+    too_short = ((years * 12 + months) < 1) & ~invalid_anywhere['loan_duration_years'] & ~invalid_anywhere['loan_duration_months']
+    rows = np.flatnonzero(too_short)
+    positions.append(rows)
+    parameters.append(np.full(len(rows), list(LOAN_PARAMETERS).index('loan_duration_months')))
+    messages.extend([('loan_duration_months', "Invalid loan term. Loan must run for at least one month.")] * len(rows))
+
+    positions = np.concatenate(positions)
+    # table order, then parameter order within a row
+    order = np.lexsort((np.concatenate(parameters), positions))
+    positions = positions[order]
+    names = [messages[i][0] for i in order]
+    errors = pd.DataFrame({'row': params.index[positions],
+                           'parameter': names,
+                           'value': [_python_value(params[name].iat[position]) for name, position in zip(names, positions)],
+                           'message': [messages[i][1] for i in order]},
+                          columns=list(ERROR_COLUMNS))
+    if raise_errors and len(errors):
+        raise LoanParameterError(errors)
+    return errors
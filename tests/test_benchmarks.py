@@ -0,0 +1,32 @@
+import json
+from benchmarks.run_benchmarks import run_benchmarks, compare_to_baseline, main
+
+
+def test_run_benchmarks_records_every_measure():
+    results = run_benchmarks("find_relevant_dates[years=5]", repeat=1, min_time=0, report=lambda line: None)
+    result = results["results"]["find_relevant_dates[years=5]"]
+
+    assert list(results["results"]) == ["find_relevant_dates[years=5]"]
+    assert result["seconds"] > 0
+    assert result["throughput"] > 0
+    assert result["peak_memory_bytes"] > 0
+    assert result["unit"] == "dates"
+
+
+def test_compare_to_baseline():
+    baseline = {"results": {"a": {"seconds": 1.0}, "b": {"seconds": 1.0}, "c": {"seconds": 1.0}}}
+    results = {"results": {"a": {"seconds": 1.2}, "b": {"seconds": 1.3}, "d": {"seconds": 5.0}}}
+
+    assert compare_to_baseline(results, baseline, margin=0.25) == [("b", 1.0, 1.3)]
+    assert compare_to_baseline(results, baseline, margin=0.5) == []
+
+
+def test_main_fails_on_regression(tmp_path):
+    baseline_path = tmp_path / "baseline.json"
+    args = ["--baseline", str(baseline_path), "--filter", "find_relevant_dates[years=5]", "--repeat", "1", "--min-time", "0"]
+
+    assert main(args + ["--update-baseline"]) == 0
+    baseline = json.loads(baseline_path.read_text())
+    baseline["results"]["find_relevant_dates[years=5]"]["seconds"] = 1e-9
+    baseline_path.write_text(json.dumps(baseline))
+    assert main(args) == 1
@@ -0,0 +1,51 @@
+import pytest
+from datetime import datetime
+from loan_analysis_toolkit.schedule import calculate_loan_totals, prepare_loan_summary, LoanTotals
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False
+    }
+
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"repayment_frequency": "weekly", "extra_repayments_frequency": "monthly", "extra_repayments_regular_amount": 800},
+    {"start_date": "2024-02-29", "loan_duration_years": 25, "loan_duration_months": 7, "repayment_frequency": "monthly"},
+    {"initial_offset_amount": 0, "offset_contribution_regular_amount": 0, "extra_repayments_regular_amount": 0},
+])
+def test_totals_match_prepare_loan_summary(valid_loan_params, overrides):
+    loan_params = {**valid_loan_params, **overrides}
+    totals = calculate_loan_totals(loan_params)
+    results = prepare_loan_summary(loan_params)
+    transactions = results["all_transactions"]
+    extra_repayments = transactions.loc[transactions["Transaction Type"] == "Extra Repayment", "Transaction Amount"]
+
+    assert isinstance(totals, LoanTotals)
+    assert totals.total_interest_charged == pytest.approx(results["total_interest_charged"], abs=1e-6)
+    assert totals.total_repayments == pytest.approx(results["total_repayments"], abs=1e-6)
+    assert totals.total_extra_repayments == pytest.approx(extra_repayments.sum(), abs=1e-6)
+    if transactions["Loan Balance"].iloc[-1] == 0:
+        assert totals.payoff_date == transactions["Date"].iloc[-1]
+    else:
+        assert totals.payoff_date is None
+
+
+def test_totals_payoff_date(valid_loan_params):
+    totals = calculate_loan_totals(valid_loan_params)
+
+    assert totals.payoff_date == datetime(2042, 12, 9)
+    assert calculate_loan_totals({**valid_loan_params, "capture_interest_accrual": True}) == totals
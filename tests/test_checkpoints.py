@@ -0,0 +1,73 @@
+import pytest
+import pandas as pd
+from loan_analysis_toolkit.checkpoints import create_checkpointed_schedule
+from loan_analysis_toolkit.schedule import prepare_loan_summary
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": True
+    }
+
+
+def test_checkpointed_schedule_matches_prepare_loan_summary(valid_loan_params):
+    schedule = create_checkpointed_schedule(valid_loan_params)
+    expected = prepare_loan_summary(valid_loan_params, engine="event")["all_transactions"]
+
+    pd.testing.assert_frame_equal(schedule.to_frame(), expected)
+    assert schedule.snapshots[0].day == 0
+    assert all(snapshot.accrued_interest == 0 for snapshot in schedule.snapshots)
+    for snapshot in schedule.snapshots[1:]:
+        assert expected["Loan Balance"].iloc[snapshot.transaction_count - 1] == snapshot.loan_balance
+
+
+def test_resimulate_without_changes(valid_loan_params):
+    schedule = create_checkpointed_schedule(valid_loan_params)
+    resimulated = schedule.resimulate_from(schedule.snapshot_before("2033-01-01"), {})
+
+    pd.testing.assert_frame_equal(resimulated.to_frame(), schedule.to_frame())
+    assert resimulated.snapshots == schedule.snapshots
+
+
+def test_resimulate_from_settlement_matches_full_run(valid_loan_params):
+    changes = {"extra_repayments_frequency": "monthly", "extra_repayments_regular_amount": 200}
+    schedule = create_checkpointed_schedule(valid_loan_params)
+    resimulated = schedule.resimulate_from(schedule.snapshots[0], changes)
+    expected = prepare_loan_summary({**valid_loan_params, **changes}, engine="event")["all_transactions"]
+
+    pd.testing.assert_frame_equal(resimulated.to_frame(), expected)
+
+
+def test_resimulate_change_from_later_date(valid_loan_params):
+    schedule = create_checkpointed_schedule(valid_loan_params)
+    snapshot = schedule.snapshot_before("2028-01-31")
+    resimulated = schedule.resimulate_from(snapshot, {"offset_contribution_regular_amount": 2000})
+    before, after = schedule.to_frame(), resimulated.to_frame()
+    contributions = after[(after["Transaction Type"] == "Offset Contribution") & (after["Date"] >= "2028-01-31")]
+
+    assert snapshot.day < (pd.Timestamp("2028-01-31") - pd.Timestamp("2023-01-31")).days
+    pd.testing.assert_frame_equal(after.iloc[:snapshot.transaction_count], before.iloc[:snapshot.transaction_count])
+    assert (contributions["Transaction Amount"] == 2000).all()
+    assert after["Date"].iloc[-1] < before["Date"].iloc[-1]
+
+
+def test_resimulate_invalid_inputs(valid_loan_params):
+    schedule = create_checkpointed_schedule(valid_loan_params)
+    other = create_checkpointed_schedule({**valid_loan_params, "annual_rate": 6.0})
+
+    with pytest.raises(ValueError, match="Cannot resimulate changes to annual_rate"):
+        schedule.resimulate_from(schedule.snapshots[3], {"annual_rate": 6.0})
+    with pytest.raises(ValueError, match="does not belong"):
+        schedule.resimulate_from(other.snapshots[3], {})
@@ -0,0 +1,58 @@
+import pytest
+import pandas as pd
+from loan_analysis_toolkit.schedule import create_monthly_summary, prepare_loan_summary
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": True
+    }
+
+
+def test_create_monthly_summary():
+    transactions = pd.DataFrame([
+        ["2023-01-01", "Settlement", 1000.0, 1000.0, 50.0],
+        ["2023-01-15", "Repayment", 100.0, 900.0, 50.0],
+        ["2023-02-01", "Interest Charged", 5.0, 905.0, 50.0],
+        ["2023-02-15", "Repayment", 100.0, 805.0, 50.0],
+        ["2023-02-20", "Offset Contribution", 20.0, 805.0, 70.0],
+        ["2023-04-01", "Interest Charged", 4.0, 809.0, 70.0],
+    ], columns=["Date", "Transaction Type", "Transaction Amount", "Loan Balance", "Offset Balance"])
+    monthly_summary, total_interest, total_repayments = create_monthly_summary(transactions)
+
+    assert list(monthly_summary.columns) == ["MONTH", "Total Repayment", "Total Interest Charged",
+                                             "Loan Balance (First Day of Month)", "Offset Balance (Last Day of Month)"]
+    assert list(monthly_summary["MONTH"].astype(str)) == ["2023-01", "2023-02", "2023-04"]
+    assert list(monthly_summary["Total Repayment"]) == [100.0, 100.0, 0.0]
+    assert list(monthly_summary["Total Interest Charged"]) == [0.0, 5.0, 4.0]
+    assert list(monthly_summary["Loan Balance (First Day of Month)"]) == [1000.0, 905.0, 809.0]
+    assert list(monthly_summary["Offset Balance (Last Day of Month)"]) == [50.0, 70.0, 70.0]
+    assert total_interest == 9.0
+    assert total_repayments == 200.0
+
+    # rows out of date order are grouped by month, keeping their order within the month
+    shuffled, _, _ = create_monthly_summary(transactions.iloc[[2, 3, 0, 5, 1, 4]])
+    assert list(shuffled["MONTH"].astype(str)) == ["2023-01", "2023-02", "2023-04"]
+    assert list(shuffled["Loan Balance (First Day of Month)"]) == [1000.0, 905.0, 809.0]
+
+
+def test_summarize_in_engine_matches_create_monthly_summary(valid_loan_params):
+    for engine in ["daily", "event"]:
+        two_pass = prepare_loan_summary(valid_loan_params, engine=engine)
+        one_pass = prepare_loan_summary(valid_loan_params, engine=engine, summarize_in_engine=True)
+
+        pd.testing.assert_frame_equal(two_pass["monthly_summary"], one_pass["monthly_summary"])
+        assert two_pass["total_interest_charged"] == one_pass["total_interest_charged"]
+        assert two_pass["total_repayments"] == one_pass["total_repayments"]
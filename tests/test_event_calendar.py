@@ -0,0 +1,51 @@
+import pytest
+from datetime import datetime
+from loan_analysis_toolkit.schedule import find_relevant_dates, calculate_end_date
+from loan_analysis_toolkit.event_calendar import EventCalendar, get_event_calendar
+
+
+@pytest.mark.parametrize("frequency", ["daily", "weekly", "fortnightly", "monthly", "quarterly", "annually"])
+@pytest.mark.parametrize("start_date", [datetime(2023, 1, 31), datetime(2024, 2, 29), datetime(2025, 10, 5)])
+def test_calendar_matches_find_relevant_dates(start_date, frequency):
+    end_date = calculate_end_date(start_date, 7, 5)
+    expected = find_relevant_dates(start_date, end_date, frequency)[1:]
+    calendar = EventCalendar(start_date, end_date, frequency)
+
+    assert calendar.dates() == expected
+    expected_offsets = {(d - start_date).days for d in expected}
+    assert [day for day in range(-1, calendar.term_days + 2) if day in calendar] == sorted(expected_offsets)
+
+
+def test_calendar_is_generated_lazily():
+    start_date = datetime(2023, 1, 31)
+    calendar = EventCalendar(start_date, calculate_end_date(start_date, 30, 0), "monthly")
+
+    assert calendar.next_event(0) == 28
+    assert calendar.next_event(28) == 56
+    assert len(calendar._offsets) < 20
+    assert len(calendar.offsets()) == 360
+    assert calendar.next_event(calendar.term_days) is None
+
+
+def test_calendar_from_dates():
+    start_date = datetime(2023, 1, 1)
+    dates = [datetime(2023, 1, 10), datetime(2023, 1, 3), datetime(2022, 12, 1), datetime(2024, 1, 1)]
+    calendar = EventCalendar.from_dates(start_date, datetime(2023, 6, 1), dates)
+
+    assert list(calendar.offsets()) == [2, 9]
+    assert 9 in calendar and 8 not in calendar
+    assert calendar.next_event(2) == 9
+
+
+def test_get_event_calendar_is_memoized():
+    first = get_event_calendar(datetime(2023, 1, 1), 30, 0, "fortnightly")
+    second = get_event_calendar(datetime(2023, 1, 1), 30, 0, "fortnightly")
+    other = get_event_calendar(datetime(2023, 1, 1), 25, 0, "fortnightly")
+
+    assert first is second
+    assert first is not other
+
+
+def test_calendar_invalid_frequency():
+    with pytest.raises(ValueError, match="Invalid frequency"):
+        get_event_calendar(datetime(2023, 1, 1), 30, 0, "hourly")
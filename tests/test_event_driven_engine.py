@@ -0,0 +1,66 @@
+import pytest
+import pandas as pd
+from loan_analysis_toolkit.schedule import create_amortization_schedule, prepare_loan_summary
+
+
+def schedule_args(**overrides):
+    args = {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "regular_amount_offset_contribution": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False,
+    }
+    args.update(overrides)
+    return args
+
+
+def assert_same_schedule(daily, event):
+    assert len(daily) == len(event)
+    assert (daily["Date"] == event["Date"]).all()
+    assert (daily["Transaction Type"] == event["Transaction Type"]).all()
+    for column in ["Transaction Amount", "Loan Balance", "Offset Balance"]:
+        assert event[column].to_numpy() == pytest.approx(daily[column].to_numpy(), abs=0.005)
+
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"repayment_frequency": "monthly", "extra_repayments_frequency": "weekly", "extra_repayments_regular_amount": 200},
+    {"repayment_frequency": "weekly", "loan_duration_years": 5, "loan_duration_months": 7},
+    {"initial_offset_amount": 600000},
+    {"annual_rate": 0},
+    {"loan_amount": 0},
+])
+def test_event_engine_matches_daily_engine(overrides):
+    daily = create_amortization_schedule(**schedule_args(**overrides), engine="daily")
+    event = create_amortization_schedule(**schedule_args(**overrides), engine="event")
+    assert_same_schedule(daily, event)
+
+
+def test_event_engine_expands_interest_accrual():
+    daily = create_amortization_schedule(**schedule_args(capture_interest_accrual=True, loan_duration_years=2))
+    event = create_amortization_schedule(**schedule_args(capture_interest_accrual=True, loan_duration_years=2),
+                                         engine="event")
+    assert_same_schedule(daily, event)
+
+
+def test_prepare_loan_summary_event_engine():
+    loan_params = schedule_args()
+    loan_params["offset_contribution_regular_amount"] = loan_params.pop("regular_amount_offset_contribution")
+    daily = prepare_loan_summary(loan_params)
+    event = prepare_loan_summary(loan_params, engine="event")
+    assert event["total_interest_charged"] == pytest.approx(daily["total_interest_charged"], abs=0.01)
+    assert event["total_repayments"] == pytest.approx(daily["total_repayments"], abs=0.01)
+    pd.testing.assert_frame_equal(daily["monthly_summary"], event["monthly_summary"], atol=0.01)
+
+
+def test_invalid_engine():
+    with pytest.raises(ValueError, match="Invalid engine"):
+        create_amortization_schedule(**schedule_args(), engine="weekly")
@@ -0,0 +1,69 @@
+import pytest
+import pandas as pd
+from loan_analysis_toolkit.exact import generate_exact_transactions, to_cents, _divide
+from loan_analysis_toolkit.schedule import prepare_loan_summary
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.34,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False
+    }
+
+
+@pytest.mark.parametrize("rounding, expected", [("half_even", [2, 2, 4, 0]), ("half_up", [3, 2, 4, 0]),
+                                                ("half_down", [2, 2, 3, 0]), ("down", [2, 1, 3, 0]), ("up", [3, 2, 4, 1])])
+def test_divide(rounding, expected):
+    assert [_divide(numerator, denominator, rounding) for numerator, denominator in [(5, 2), (5, 3), (7, 2), (1, 3)]] == expected
+
+
+def test_balances_are_exact_cents(valid_loan_params):
+    transactions = generate_exact_transactions(valid_loan_params)
+    cents = {name: [to_cents(amount) for amount in group["Transaction Amount"]]
+             for name, group in transactions.groupby("Transaction Type", observed=True)}
+
+    # every movement is a whole number of cents and they add up to the final balance without drift
+    assert to_cents(valid_loan_params["loan_amount"]) + sum(cents["Interest Charged"]) \
+        - sum(cents["Repayment"]) - sum(cents["Extra Repayment"]) == to_cents(transactions["Loan Balance"].iloc[-1]) == 0
+    assert all(abs(amount * 100 - round(amount * 100)) < 1e-6 for amount in transactions["Loan Balance"])
+
+
+def test_close_to_float_engine(valid_loan_params):
+    exact = generate_exact_transactions(valid_loan_params)
+    expected = prepare_loan_summary(valid_loan_params, engine="event")["all_transactions"]
+
+    assert list(exact["Date"]) == list(expected["Date"])
+    assert list(exact["Transaction Type"]) == list(expected["Transaction Type"])
+    exact_interest = exact.loc[exact["Transaction Type"] == "Interest Charged", "Transaction Amount"].sum()
+    float_interest = expected.loc[expected["Transaction Type"] == "Interest Charged", "Transaction Amount"].sum()
+    assert exact_interest == pytest.approx(float_interest, abs=10)
+
+
+def test_rounding_rules(valid_loan_params):
+    def total_interest(rounding):
+        transactions = generate_exact_transactions(valid_loan_params, rounding=rounding)
+        return to_cents(transactions.loc[transactions["Transaction Type"] == "Interest Charged", "Transaction Amount"].sum())
+
+    assert total_interest("down") < total_interest("half_even") < total_interest("up")
+    with pytest.raises(ValueError, match="Invalid rounding"):
+        generate_exact_transactions(valid_loan_params, rounding="bankers")
+
+
+def test_exact_engine_in_prepare_loan_summary(valid_loan_params):
+    valid_loan_params["capture_interest_accrual"] = True
+    results = prepare_loan_summary(valid_loan_params, engine="exact", summarize_in_engine=True)
+
+    pd.testing.assert_frame_equal(results["all_transactions"], generate_exact_transactions(valid_loan_params))
+    assert results["total_interest_charged"] == pytest.approx(
+        results["all_transactions"].query("`Transaction Type` == 'Interest Charged'")["Transaction Amount"].sum())
@@ -0,0 +1,60 @@
+import pytest
+from datetime import datetime
+from loan_analysis_toolkit.schedule import calculate_loan_totals
+from loan_analysis_toolkit.solver import goal_seek
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "fortnightly",
+        "extra_repayments_regular_amount": 0,
+        "capture_interest_accrual": False
+    }
+
+
+def test_goal_seek_payoff_date(valid_loan_params):
+    result = goal_seek(valid_loan_params, "extra_repayments_regular_amount", target_payoff_date="2043-01-31")
+    slightly_less = calculate_loan_totals({**valid_loan_params, "extra_repayments_regular_amount": result.value - 0.02})
+
+    assert result.converged
+    assert result.totals.payoff_date <= datetime(2043, 1, 31)
+    assert slightly_less.payoff_date > datetime(2043, 1, 31)
+    assert result.evaluations <= result.iterations + 2
+
+
+@pytest.mark.parametrize("parameter", ["initial_offset_amount", "offset_contribution_regular_amount"])
+def test_goal_seek_total_interest(valid_loan_params, parameter):
+    target = calculate_loan_totals(valid_loan_params).total_interest_charged - 100000
+    result = goal_seek(valid_loan_params, parameter, target_total_interest=target, bounds=(0, 100000))
+
+    assert result.converged
+    assert result.totals.total_interest_charged == pytest.approx(target, abs=1)
+    assert result.totals == calculate_loan_totals({**valid_loan_params, parameter: result.value})
+
+
+def test_goal_seek_reuses_cache(valid_loan_params):
+    cache = {}
+    first = goal_seek(valid_loan_params, "extra_repayments_regular_amount", target_payoff_date="2043-01-31", cache=cache)
+    second = goal_seek(valid_loan_params, "extra_repayments_regular_amount", target_payoff_date="2043-01-31", cache=cache)
+
+    assert second.value == first.value
+    assert second.evaluations == 0
+
+
+def test_goal_seek_invalid_inputs(valid_loan_params):
+    with pytest.raises(ValueError, match="Invalid parameter"):
+        goal_seek(valid_loan_params, "loan_amount", target_total_interest=1000)
+    with pytest.raises(ValueError, match="exactly one"):
+        goal_seek(valid_loan_params, "initial_offset_amount")
+    with pytest.raises(ValueError, match="cannot be reached"):
+        goal_seek(valid_loan_params, "extra_repayments_regular_amount", target_payoff_date="2023-03-01", bounds=(0, 100))
@@ -0,0 +1,53 @@
+import pytest
+from loan_analysis_toolkit.instrumentation import Metrics, collect_metrics
+from loan_analysis_toolkit.schedule import prepare_loan_summary
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": True
+    }
+
+
+@pytest.mark.parametrize("engine", ["daily", "event"])
+def test_prepare_loan_summary_stages(valid_loan_params, engine, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with collect_metrics() as metrics:
+        results = prepare_loan_summary(valid_loan_params, store_results=True, engine=engine)
+    stages = metrics.to_dict()
+
+    assert set(stages) == {"validation", "dates", "schedule", "dataframe", "monthly_summary", "csv"}
+    assert all(stage["calls"] == 1 for name, stage in stages.items() if name != "csv")
+    assert stages["csv"]["calls"] == 2
+    assert stages["schedule"]["rows"] == len(results["all_transactions"])
+    assert stages["schedule"]["iterations"] > 0
+    assert stages["monthly_summary"]["rows"] == len(results["monthly_summary"])
+    assert stages["csv"]["bytes_written"] == sum(path.stat().st_size for path in tmp_path.glob("*.csv"))
+    assert all(stage["seconds"] >= 0 for stage in stages.values())
+
+
+def test_metrics_aggregate_across_calls(valid_loan_params):
+    metrics = Metrics()
+    with collect_metrics(metrics):
+        prepare_loan_summary(valid_loan_params)
+    with collect_metrics(metrics):
+        prepare_loan_summary(valid_loan_params)
+    # calls outside a collect_metrics block are not recorded
+    prepare_loan_summary(valid_loan_params)
+
+    assert metrics.to_dict()["schedule"]["calls"] == 2
+    merged = Metrics().merge(metrics).merge(metrics.to_dict())
+    assert merged.to_dict()["schedule"]["rows"] == 2 * metrics.to_dict()["schedule"]["rows"]
+    assert list(metrics.to_frame().columns) == ["calls", "seconds", "iterations", "rows", "bytes_written"]
@@ -0,0 +1,66 @@
+import json
+import subprocess
+import sys
+import pytest
+import loan_analysis_toolkit
+
+HEAVY_MODULES = ("numpy", "pandas", "pydantic")
+
+LOAN_PARAMS = {
+    "start_date": "2024-01-31",
+    "loan_amount": 300000,
+    "annual_rate": 5.5,
+    "loan_duration_years": 10,
+    "loan_duration_months": 0,
+    "repayment_frequency": "monthly",
+    "initial_offset_amount": 10000,
+    "offset_contribution_frequency": "monthly",
+    "offset_contribution_regular_amount": 500,
+    "extra_repayments_frequency": "monthly",
+    "extra_repayments_regular_amount": 1000,
+    "capture_interest_accrual": False,
+}
+
+
+def loaded_heavy_modules(code):
+    """ Runs `code` in a fresh interpreter and returns the heavy modules it loaded.
+    """
+    script = f"import sys\n{code}\nimport json\nprint(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("code", [
+    "import loan_analysis_toolkit",
+    "import loan_analysis_toolkit.schedule",
+    f"from loan_analysis_toolkit import calculate_loan_totals\ncalculate_loan_totals({LOAN_PARAMS!r}, validate=False)",
+    f"from loan_analysis_toolkit import iter_loan_transactions\n"
+    f"rows = sum(len(chunk) for chunk in iter_loan_transactions({LOAN_PARAMS!r}, chunk_size=100, output='buffer', validate=False))\n"
+    f"assert rows > 0",
+])
+def test_core_path_does_not_import_heavy_modules(code):
+    assert loaded_heavy_modules(code) == []
+
+
+def test_validation_loads_pydantic_on_first_use():
+    code = f"from loan_analysis_toolkit import calculate_loan_totals\ncalculate_loan_totals({LOAN_PARAMS!r})"
+    assert "pydantic" in loaded_heavy_modules(code)
+
+
+def test_lazy_exports_resolve():
+    from loan_analysis_toolkit.schedule import prepare_loan_summary
+    from loan_analysis_toolkit.solver import goal_seek
+
+    assert loan_analysis_toolkit.prepare_loan_summary is prepare_loan_summary
+    assert loan_analysis_toolkit.goal_seek is goal_seek
+    assert set(loan_analysis_toolkit.__all__) <= set(dir(loan_analysis_toolkit))
+    for name in loan_analysis_toolkit.__all__:
+        assert getattr(loan_analysis_toolkit, name) is not None
+    with pytest.raises(AttributeError):
+        loan_analysis_toolkit.not_a_function
+
+
+def test_validate_false_gives_same_totals():
+    from loan_analysis_toolkit import calculate_loan_totals
+
+    assert calculate_loan_totals(LOAN_PARAMS, validate=False) == calculate_loan_totals(LOAN_PARAMS)
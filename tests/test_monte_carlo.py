@@ -0,0 +1,86 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from loan_analysis_toolkit.montecarlo import simulate_rate_paths, simulate_rate_scenarios
+from loan_analysis_toolkit.schedule import calculate_loan_totals, prepare_loan_summary
+from loan_analysis_toolkit.event_calendar import get_event_calendar
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False
+    }
+
+
+def test_constant_rate_paths_match_loan_totals(valid_loan_params):
+    results = simulate_rate_scenarios(valid_loan_params, rate_paths=np.full((3, 360), 5.0))
+    totals = calculate_loan_totals(valid_loan_params)
+
+    assert np.allclose(results["paths"]["total_interest_charged"], totals.total_interest_charged, atol=1e-6)
+    assert np.allclose(results["paths"]["total_repayments"], totals.total_repayments, atol=1e-6)
+    assert (results["paths"]["payoff_date"] == pd.Timestamp(totals.payoff_date)).all()
+    assert (results["paths"]["remaining_balance"] == 0).all()
+
+
+def test_rate_change_recalculates_repayments(valid_loan_params):
+    rate_paths = np.full((3, 360), 5.0)
+    rate_paths[1, 120:] = 7.0
+    rate_paths[2, 12:] = 3.0
+    paths = simulate_rate_scenarios(valid_loan_params, rate_paths=rate_paths)["paths"]
+
+    assert paths["total_interest_charged"][1] > paths["total_interest_charged"][0] > paths["total_interest_charged"][2]
+    # repayments are recalculated over the remaining term, so loans are paid off before the term ends
+    assert paths["payoff_date"].notna().all()
+    assert (paths["payoff_date"] <= pd.Timestamp("2053-01-31")).all()
+
+
+def test_simulated_rate_paths(valid_loan_params):
+    first = simulate_rate_paths(5.0, 100, 360, seed=42)
+    second = simulate_rate_paths(5.0, 100, 360, seed=42)
+
+    assert first.shape == (100, 360)
+    assert np.array_equal(first, second)
+    assert (first[:, 0] == 5.0).all() and (first >= 0).all()
+
+    results = simulate_rate_scenarios(valid_loan_params, n_paths=200, seed=42, percentiles=(10, 50, 90))
+    percentiles = results["percentiles"]
+    assert list(percentiles.index) == [10, 50, 90]
+    assert percentiles["total_interest_charged"].is_monotonic_increasing
+    assert percentiles["total_interest_charged"][50] == pytest.approx(results["paths"]["total_interest_charged"].median())
+
+
+def test_invalid_rate_paths(valid_loan_params):
+    with pytest.raises(ValueError, match="rate_paths"):
+        simulate_rate_scenarios(valid_loan_params, rate_paths=np.full(360, 5.0))
+
+
+@pytest.mark.parametrize("start_date, frequency", [("2023-01-31", "fortnightly"), ("2023-03-30", "weekly"),
+                                                   ("2023-01-15", "monthly")])
+def test_rate_path_matches_rate_changes(valid_loan_params, start_date, frequency):
+    loan_params = {**valid_loan_params, "start_date": start_date, "repayment_frequency": frequency}
+    rate_path = np.full(360, 5.0)
+    rate_path[7:] = 6.25
+    rate_path[100:] = 4.5
+    rate_path[250:] = 7.0
+    paths = simulate_rate_scenarios(loan_params, rate_paths=rate_path[np.newaxis])["paths"]
+
+    # month m of the path applies from the day after the m-th interest charge day
+    interest_days = get_event_calendar(datetime.strptime(start_date, "%Y-%m-%d"), 30, 0, "monthly").dates()
+    rate_changes = [(interest_days[month - 1] + timedelta(days=1), rate_path[month]) for month in (7, 100, 250)]
+    expected = prepare_loan_summary(loan_params, engine="event", rate_changes=rate_changes)
+
+    assert paths["total_interest_charged"][0] == pytest.approx(expected["total_interest_charged"], abs=0.01)
+    assert paths["total_repayments"][0] == pytest.approx(expected["total_repayments"], abs=0.01)
@@ -0,0 +1,125 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import pandas as pd
+from loan_analysis_toolkit.cashflows import MonthlyCashFlows, aggregate_monthly_cash_flows, CASH_FLOW_COLUMNS
+from loan_analysis_toolkit.runner import _imap_bounded
+from loan_analysis_toolkit.schedule import prepare_loan_summary
+from loan_analysis_toolkit.validation import LoanParameterError
+
+
+@pytest.fixture
+def loan_book():
+    base = {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 10,
+        "loan_duration_months": 0,
+        "repayment_frequency": "monthly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False
+    }
+    return [{**base, "annual_rate": 4.0 + i / 2, "repayment_frequency": frequency, "start_date": start_date,
+             "loan_duration_years": years}
+            for i, (frequency, start_date, years) in enumerate([("monthly", "2023-01-31", 10),
+                                                               ("fortnightly", "2024-06-15", 5),
+                                                               ("weekly", "2022-03-01", 8),
+                                                               ("quarterly", "2023-11-30", 3),
+                                                               ("monthly", "2025-02-28", 4)])]
+
+
+def expected_totals(loan_book):
+    summaries = [prepare_loan_summary(loan, engine="event")["monthly_summary"] for loan in loan_book]
+    expected = pd.concat(summaries).groupby("MONTH")[list(CASH_FLOW_COLUMNS[:-1])].sum()
+    expected["Loans"] = pd.concat(summaries).groupby("MONTH").size()
+    return expected
+
+
+def test_aggregate_matches_concatenated_monthly_summaries(loan_book):
+    result = aggregate_monthly_cash_flows(loan_book, workers=1).to_frame()
+    expected = expected_totals(loan_book)
+
+    assert result["MONTH"].is_monotonic_increasing
+    assert result["MONTH"].iloc[0] == expected.index.min() and result["MONTH"].iloc[-1] == expected.index.max()
+    result = result.set_index("MONTH").loc[expected.index]
+    for column in CASH_FLOW_COLUMNS:
+        assert result[column].to_numpy() == pytest.approx(expected[column].to_numpy())
+
+
+def test_parallel_chunks_merge_to_the_same_totals(loan_book):
+    serial = aggregate_monthly_cash_flows(loan_book, workers=1)
+    parallel = aggregate_monthly_cash_flows(pd.DataFrame(loan_book), workers=2, chunk_size=2)
+
+    assert parallel.loans == serial.loans == 5
+    pd.testing.assert_frame_equal(parallel.to_frame(), serial.to_frame(), check_exact=False)
+
+
+def test_merge_and_add_in_any_order(loan_book):
+    summaries = [prepare_loan_summary(loan, engine="event")["monthly_summary"] for loan in loan_book]
+    forward, backward = MonthlyCashFlows(), MonthlyCashFlows()
+    for summary in summaries:
+        forward.add(summary)
+    backward.merge(MonthlyCashFlows())  # empty totals change nothing
+    for summary in reversed(summaries):
+        part = MonthlyCashFlows()
+        part.add(summary)
+        backward.merge(part)
+    pd.testing.assert_frame_equal(forward.to_frame(), backward.to_frame(), check_exact=False)
+
+    # a long-format frame of several loans, like a monthly summary part file of run_portfolio
+    long_format = pd.concat([summary.assign(MONTH=summary["MONTH"].dt.to_timestamp(), loan_id=number)
+                             for number, summary in enumerate(summaries)])
+    combined = MonthlyCashFlows()
+    combined.add(long_format)
+    assert combined.loans == 5
+    pd.testing.assert_frame_equal(combined.to_frame(), forward.to_frame(), check_exact=False)
+    # memory only depends on the months covered
+    assert forward.totals.shape == (len(CASH_FLOW_COLUMNS), len(forward.to_frame()))
+
+
+def test_aggregate_validates_the_whole_table(loan_book):
+    loan_book[1]["repayment_frequency"] = "daily"
+    with pytest.raises(LoanParameterError):
+        aggregate_monthly_cash_flows(loan_book, workers=1)
+    with pytest.raises(ValueError, match="engine"):
+        aggregate_monthly_cash_flows(loan_book, engine="fast")
+    assert MonthlyCashFlows().to_frame().empty
+
+
+def test_aggregate_reads_files_in_chunks(loan_book, tmp_path):
+    expected = aggregate_monthly_cash_flows(loan_book, workers=1).to_frame()
+    pd.DataFrame(loan_book).to_csv(tmp_path / "loans.csv", index=False)
+    pd.testing.assert_frame_equal(aggregate_monthly_cash_flows(tmp_path / "loans.csv", workers=2, chunk_size=2).to_frame(),
+                                  expected, check_exact=False)
+
+    loan_book[3]["annual_rate"] = -1.0
+    pd.DataFrame(loan_book).to_csv(tmp_path / "invalid.csv", index=False)
+    with pytest.raises(LoanParameterError) as error:
+        aggregate_monthly_cash_flows(tmp_path / "invalid.csv", workers=1, chunk_size=2)
+    # rows are numbered across chunks
+    assert error.value.errors["row"].tolist() == [3]
+
+
+def test_in_flight_chunks_stay_bounded():
+    submitted, merged, in_flight = [0], [0], []
+
+    def tasks():
+        for number in range(50):
+            in_flight.append(submitted[0] - merged[0])
+            submitted[0] += 1
+            yield (number,)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = []
+        for number, result in _imap_bounded(executor, lambda number: time.sleep(0.001) or number * 2, tasks(), 4):
+            merged[0] += 1
+            results.append((number, result))
+
+    # the next chunk is only read once a result of a full window was merged
+    assert max(in_flight) == 3
+    assert sorted(results) == [(number, number * 2) for number in range(50)]
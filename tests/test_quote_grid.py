@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from loan_analysis_toolkit.pricing import quote_grid, annuity_factor_table, payments_per_year_array
+from loan_analysis_toolkit.schedule import calculate_minimum_repayment
+
+
+def test_quote_grid_matches_calculate_minimum_repayment():
+    grid = quote_grid([300000, 650000], [0.0, 4.5, 6.25], [120, 365])
+
+    assert len(grid) == 2 * 3 * 2 * 5
+    for row in grid.itertuples(index=False):
+        expected = calculate_minimum_repayment(row.principal, row.annual_rate, 0, row.term_months, row.frequency)
+        assert row.repayment == pytest.approx(expected, rel=1e-12)
+
+
+def test_annuity_factor_table_is_memoized():
+    rates = np.arange(2.0, 9.0, 0.05)
+    first = annuity_factor_table(rates, [240, 300, 360])
+    again = annuity_factor_table(list(rates), (240, 300, 360))
+
+    assert again is first
+    assert first.shape == (len(rates), 3, 5)
+    assert not first.flags.writeable
+    assert quote_grid([1], rates, [240, 300, 360], output="numpy")[0] == pytest.approx(first)
+
+
+def test_calculate_minimum_repayment_broadcasts():
+    rates = np.array([[0.0], [5.0]])
+    frequencies = np.array(["weekly", "monthly", "annual"])
+    repayments = calculate_minimum_repayment(100000, rates, np.array([10, 10, 30]), 0, frequencies)
+
+    assert repayments.shape == (2, 3)
+    assert repayments[0].tolist() == pytest.approx([100000 / 520, 100000 / 120, 100000 / 30])
+    assert repayments[1, 1] == calculate_minimum_repayment(100000, 5.0, 10, 0, "monthly")
+
+
+def test_invalid_frequency():
+    with pytest.raises(ValueError, match="Invalid repayment frequency: daily"):
+        payments_per_year_array(["monthly", "daily"])
+    with pytest.raises(ValueError, match="Invalid repayment frequency"):
+        calculate_minimum_repayment(100000, 5.0, 10, 0, "daily")
+
+
+def test_duplicate_frequencies():
+    for output in ("pandas", "numpy"):
+        with pytest.raises(ValueError, match="Duplicate repayment frequency: monthly"):
+            quote_grid([100000], [5.0], [360], frequencies=("monthly", "weekly", "monthly"), output=output)
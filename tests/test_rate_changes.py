@@ -0,0 +1,100 @@
+import pytest
+import pandas as pd
+from datetime import datetime
+from loan_analysis_toolkit.schedule import (create_amortization_schedule, calculate_minimum_repayment,
+                                            prepare_loan_summary, RateChange)
+from loan_analysis_toolkit.cache import ResultCache
+from loan_analysis_toolkit.event_calendar import get_event_calendar
+
+
+@pytest.fixture
+def schedule_args():
+    return {
+        "start_date": "2023-01-15",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "regular_amount_offset_contribution": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+    }
+
+
+RATE_CHANGES = [("2025-01-15", 6.5), RateChange(datetime(2027, 6, 3), 4.0), ("2030-02-01", 4.0, 2000.0)]
+
+
+def test_daily_and_event_engines_apply_the_same_timeline(schedule_args):
+    daily = create_amortization_schedule(**schedule_args, engine="daily", rate_changes=RATE_CHANGES,
+                                         capture_interest_accrual=True)
+    event = create_amortization_schedule(**schedule_args, engine="event", rate_changes=RATE_CHANGES,
+                                         capture_interest_accrual=True)
+    pd.testing.assert_frame_equal(daily, event)
+
+    exact = create_amortization_schedule(**schedule_args, engine="exact", rate_changes=RATE_CHANGES)
+    repayments = exact[exact["Transaction Type"] == "Repayment"]
+    assert (repayments.loc[repayments["Date"] >= "2030-02-01", "Transaction Amount"].iloc[:-1] == 2000.0).all()
+
+
+def test_change_takes_effect_from_its_date(schedule_args):
+    df = create_amortization_schedule(**schedule_args, engine="event", rate_changes=RATE_CHANGES[:1],
+                                      capture_interest_accrual=True)
+    fixed = create_amortization_schedule(**schedule_args, engine="event", capture_interest_accrual=True)
+    before = df[df["Date"] < "2025-01-15"]
+    pd.testing.assert_frame_equal(before, fixed.iloc[:len(before)])
+
+    # interest accrues at the new rate from the change date
+    day = df[(df["Date"] == "2025-01-15") & (df["Transaction Type"] == "Daily Interest Acrrued")].iloc[0]
+    assert day["Transaction Amount"] == pytest.approx((day["Loan Balance"] - day["Offset Balance"]) * 0.065 / 365)
+
+    # the repayment is recalculated from the balance and the repayments left in the term
+    repayments = df[df["Transaction Type"] == "Repayment"]
+    balance = df.loc[df["Date"] < "2025-01-15", "Loan Balance"].iloc[-1]
+    new_repayment = repayments.loc[repayments["Date"] >= "2025-01-15", "Transaction Amount"].iloc[0]
+    repayment_dates = get_event_calendar(datetime(2023, 1, 15), 30, 0, "fortnightly").dates()
+    repayments_left = sum(date >= datetime(2025, 1, 15) for date in repayment_dates)
+    assert new_repayment == pytest.approx(calculate_minimum_repayment(balance, 6.5, 0, repayments_left * 12 / 26, "fortnightly"))
+    fixed_repayments = fixed[fixed["Transaction Type"] == "Repayment"]
+    assert new_repayment > fixed_repayments["Transaction Amount"].iloc[0]
+
+
+def test_unchanged_rate_and_repayment_change_nothing(schedule_args):
+    fixed = create_amortization_schedule(**schedule_args, engine="event")
+    repayment = fixed.loc[fixed["Transaction Type"] == "Repayment", "Transaction Amount"].iloc[0]
+    changes = [("2024-03-01", 5.0, repayment), ("2031-07-15", 5.0, repayment), ("2070-01-01", 9.0)]
+    for engine in ("daily", "event"):
+        pd.testing.assert_frame_equal(create_amortization_schedule(**schedule_args, engine=engine, rate_changes=changes), fixed)
+
+
+def test_prepare_loan_summary_caches_timelines_separately(schedule_args, tmp_path):
+    loan_params = {key: value for key, value in schedule_args.items() if key != "regular_amount_offset_contribution"}
+    loan_params["offset_contribution_regular_amount"] = schedule_args["regular_amount_offset_contribution"]
+    loan_params["capture_interest_accrual"] = False
+    cache = ResultCache(tmp_path)
+    fixed = prepare_loan_summary(loan_params, engine="event", cache=cache)
+    changed = prepare_loan_summary(loan_params, engine="event", cache=cache, rate_changes=RATE_CHANGES)
+
+    assert changed["total_interest_charged"] != fixed["total_interest_charged"]
+    assert cache.stats().entries == 2
+    assert prepare_loan_summary(loan_params, engine="event", cache=cache,
+                                rate_changes=RATE_CHANGES)["total_interest_charged"] == changed["total_interest_charged"]
+
+    # equivalent timelines share an entry, and changes after the term are no timeline at all
+    for rate_changes in ([("2025-01-15", 6.5)], [("2025-01-15", 6.5, None)], [(datetime(2025, 1, 15), 6.5)]):
+        prepare_loan_summary(loan_params, engine="event", cache=cache, rate_changes=rate_changes)
+    prepare_loan_summary(loan_params, engine="event", cache=cache, rate_changes=[("2070-01-01", 9.0)])
+    assert cache.stats().entries == 3
+
+
+@pytest.mark.parametrize("rate_changes, message", [
+    ([("2025-01-15", 6.5), ("2024-01-15", 6.0)], "sorted"),
+    ([("2025-01-15", 6.5), ("2025-01-15", 6.0)], "sorted"),
+    ([("2023-01-15", 6.5)], "after the start date"),
+    ([("2025-01-15", -1.0)], "negative"),
+])
+def test_invalid_timelines(schedule_args, rate_changes, message):
+    with pytest.raises(ValueError, match=message):
+        create_amortization_schedule(**schedule_args, engine="event", rate_changes=rate_changes)
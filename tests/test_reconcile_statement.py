@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+import pandas as pd
+from loan_analysis_toolkit import reconcile
+from loan_analysis_toolkit.exact import generate_exact_transactions
+from loan_analysis_toolkit.reconcile import reconcile_statement
+
+
+@pytest.fixture
+def transactions():
+    return generate_exact_transactions({
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.34,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False
+    })
+
+
+def test_statement_reconciles(transactions, tmp_path):
+    path = tmp_path / "statement.csv"
+    # bank statements are often newest first, with extra columns
+    transactions.iloc[::-1].assign(Description="loan account").to_csv(path, index=False)
+    report = reconcile_statement(path, transactions, compare_balances=True)
+
+    assert report.empty
+    assert list(report.columns) == ["Date", "Transaction Type", "Statement Amount", "Expected Amount", "Difference", "Issue"]
+
+
+def test_differences_are_reported(transactions):
+    statement = transactions.copy()
+    statement.loc[5, "Transaction Amount"] += 0.01
+    statement.loc[7, "Loan Balance"] += 1
+    statement = statement.drop(index=10)
+    statement = pd.concat([statement, pd.DataFrame([{"Date": pd.Timestamp("2023-02-14"), "Transaction Type": "Fee",
+                                                     "Transaction Amount": 10.0}])], ignore_index=True)
+
+    report = reconcile_statement(statement, transactions, type_names={"Fee": "Repayment"}, compare_balances=True)
+    assert report["Issue"].tolist() == ["not expected", "amount mismatch", "balance mismatch", "missing from statement"]
+    assert report["Difference"].tolist() == [10.0, 0.01, 1.0, -transactions.loc[10, "Transaction Amount"]]
+    assert report["Date"].iloc[3] == transactions.loc[10, "Date"]
+
+    assert reconcile_statement(statement.drop(index=[len(statement) - 1]), transactions, tolerance_cents=1)["Issue"].tolist() == ["missing from statement"]
+
+
+def test_unknown_transaction_types(transactions):
+    statement = transactions.astype({"Transaction Type": str}).replace({"Repayment": "Payment"})
+    with pytest.raises(ValueError, match="Unknown transaction types: Payment"):
+        reconcile_statement(statement, transactions)
+    assert reconcile_statement(statement, transactions, type_names={"Payment": "Repayment"}).empty
+
+
+def test_invalid_statements(transactions, monkeypatch):
+    statement = transactions.copy()
+    statement.loc[5, "Transaction Amount"] = np.nan
+    with pytest.raises(ValueError, match="1 missing or infinite amount\\(s\\) in the statement's 'Transaction Amount'"):
+        reconcile_statement(statement, transactions)
+
+    # occurrences of the same date and type must fit in the merge key
+    monkeypatch.setattr(reconcile, "_OCCURRENCE_BITS", 1)
+    repeated = pd.concat([transactions.iloc[[1]]] * 3, ignore_index=True)
+    with pytest.raises(ValueError, match="Too many transactions of the same date and type"):
+        reconcile_statement(repeated, transactions)
+    assert reconcile_statement(repeated.iloc[:2], repeated.iloc[:2]).empty
@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import pytest
+import pandas as pd
+from loan_analysis_toolkit.cache import ResultCache
+from loan_analysis_toolkit.schedule import prepare_loan_summary
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 10,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": True
+    }
+
+
+def test_cache_hit_matches_computed_results(valid_loan_params, tmp_path):
+    cache = ResultCache(tmp_path)
+    computed = prepare_loan_summary(valid_loan_params, engine="event", cache=cache)
+    # equal parameters written differently share the validated cache key
+    cached = prepare_loan_summary({**valid_loan_params, "loan_amount": 500000.0}, engine="event", cache=cache)
+
+    pd.testing.assert_frame_equal(cached["all_transactions"], computed["all_transactions"])
+    pd.testing.assert_frame_equal(cached["monthly_summary"], computed["monthly_summary"])
+    assert cached["total_interest_charged"] == computed["total_interest_charged"]
+    assert cached["total_repayments"] == computed["total_repayments"]
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+    # cached results can be changed without changing the cache
+    cached["all_transactions"].loc[0, "Loan Balance"] = 0
+    again = prepare_loan_summary(valid_loan_params, engine="event", cache=cache)
+    assert again["all_transactions"].loc[0, "Loan Balance"] == 500000
+
+
+def test_cache_key_depends_on_options(valid_loan_params, tmp_path):
+    cache = ResultCache(tmp_path)
+    prepare_loan_summary(valid_loan_params, engine="event", cache=cache)
+    prepare_loan_summary(valid_loan_params, engine="daily", cache=cache)
+    prepare_loan_summary({**valid_loan_params, "annual_rate": 5.1}, engine="event", cache=cache)
+
+    assert cache.stats().hits == 0
+    assert cache.stats().entries == 3
+
+
+def test_lru_eviction(valid_loan_params, tmp_path):
+    cache = ResultCache(tmp_path)
+    rates = [4.0, 4.5, 5.0]
+    for rate in rates:
+        prepare_loan_summary({**valid_loan_params, "annual_rate": rate}, engine="event", cache=cache)
+    entry_size = cache.stats().size_bytes // 3
+
+    # use the first entry, so the second one is the least recently used
+    bounded = ResultCache(tmp_path, max_bytes=3 * entry_size + entry_size // 2)
+    prepare_loan_summary({**valid_loan_params, "annual_rate": 4.0}, engine="event", cache=bounded)
+    prepare_loan_summary({**valid_loan_params, "annual_rate": 5.5}, engine="event", cache=bounded)
+
+    assert bounded.stats().evictions == 1
+    assert bounded.stats().entries == 3
+    prepare_loan_summary({**valid_loan_params, "annual_rate": 4.5}, engine="event", cache=bounded)
+    assert bounded.stats().misses == 2
+
+
+def test_entries_in_use_are_skipped(valid_loan_params, tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path)
+    prepare_loan_summary(valid_loan_params, engine="event", cache=cache)
+    [locked] = tmp_path.glob("*.latc")
+    entry_size = cache.stats().size_bytes
+    remove = os.remove
+
+    def remove_unless_locked(path):
+        if os.fspath(path) == os.fspath(locked):
+            raise PermissionError(13, "The process cannot access the file", os.fspath(path))
+        remove(path)
+
+    # removing a file memory-mapped by another process fails on Windows
+    monkeypatch.setattr(os, "remove", remove_unless_locked)
+    bounded = ResultCache(tmp_path, max_bytes=entry_size + entry_size // 2)
+    prepare_loan_summary({**valid_loan_params, "annual_rate": 4.5}, engine="event", cache=bounded)
+
+    assert bounded.stats().evictions == 0
+    assert locked.exists()
+    # a corrupt entry that can't be removed is still a miss
+    locked.write_bytes(locked.read_bytes()[:100])
+    assert bounded.get(locked.stem) is None
+    assert locked.exists()
+
+
+def test_corrupt_entry_is_a_miss(valid_loan_params, tmp_path):
+    cache = ResultCache(tmp_path)
+    prepare_loan_summary(valid_loan_params, cache=cache)
+    [entry] = tmp_path.glob("*.latc")
+    entry.write_bytes(entry.read_bytes()[:100])
+
+    results = prepare_loan_summary(valid_loan_params, cache=cache)
+    assert len(results["all_transactions"]) > 0
+    assert cache.stats().misses == 2
+
+
+def _run_cached(directory, rate):
+    base = {"start_date": "2023-01-31", "loan_amount": 500000, "annual_rate": rate, "loan_duration_years": 10,
+            "loan_duration_months": 0, "repayment_frequency": "monthly", "initial_offset_amount": 0,
+            "offset_contribution_frequency": "monthly", "offset_contribution_regular_amount": 0,
+            "extra_repayments_frequency": "monthly", "extra_repayments_regular_amount": 0,
+            "capture_interest_accrual": False}
+    return prepare_loan_summary(base, engine="event", cache=ResultCache(directory))["total_interest_charged"]
+
+
+def test_shared_by_worker_processes(tmp_path):
+    rates = [4.0, 4.5] * 4
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        totals = pool.starmap(_run_cached, [(str(tmp_path), rate) for rate in rates])
+
+    assert totals[0::2] == [totals[0]] * 4
+    assert totals[1::2] == [totals[1]] * 4
+    assert ResultCache(tmp_path).stats().entries == 2
+    assert not list(tmp_path.glob(".*.tmp"))
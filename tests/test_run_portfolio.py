@@ -0,0 +1,99 @@
+import pytest
+import pandas as pd
+from loan_analysis_toolkit.runner import run_portfolio, main
+from loan_analysis_toolkit.schedule import prepare_loan_summary
+from loan_analysis_toolkit.validation import LoanParameterError
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def loan_book():
+    base = {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 10,
+        "loan_duration_months": 0,
+        "repayment_frequency": "monthly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False
+    }
+    return [{**base, "loan_id": f"L{i}", "annual_rate": 4.0 + i / 2, "repayment_frequency": frequency}
+            for i, frequency in enumerate(["monthly", "fortnightly", "weekly", "quarterly", "monthly"])]
+
+
+def test_run_portfolio_matches_prepare_loan_summary(loan_book, tmp_path):
+    input_path = tmp_path / "loans.csv"
+    pd.DataFrame(loan_book).to_csv(input_path, index=False)
+    loan_totals = run_portfolio(input_path, tmp_path / "out", workers=2, chunk_size=2)
+
+    transactions = pd.read_parquet(tmp_path / "out" / "transactions")
+    monthly_summary = pd.read_parquet(tmp_path / "out" / "monthly_summary")
+    assert len(list((tmp_path / "out" / "transactions").iterdir())) == 3
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "out" / "loan_totals.parquet"), loan_totals)
+    assert loan_totals["loan_id"].tolist() == ["L0", "L1", "L2", "L3", "L4"]
+
+    for loan in loan_book:
+        loan_params = {key: value for key, value in loan.items() if key != "loan_id"}
+        expected = prepare_loan_summary(loan_params, engine="event")
+        totals = loan_totals.set_index("loan_id").loc[loan["loan_id"]]
+        assert totals["total_interest_charged"] == pytest.approx(expected["total_interest_charged"])
+        assert totals["n_transactions"] == len(expected["all_transactions"])
+        written = transactions[transactions["loan_id"] == loan["loan_id"]]
+        assert written["Loan Balance"].tolist() == expected["all_transactions"]["Loan Balance"].tolist()
+        summary = monthly_summary[monthly_summary["loan_id"] == loan["loan_id"]]
+        assert summary["Total Repayment"].tolist() == pytest.approx(expected["monthly_summary"]["Total Repayment"].tolist())
+
+
+def test_run_portfolio_in_process_from_parquet(loan_book, tmp_path):
+    input_path = tmp_path / "loans.parquet"
+    pd.DataFrame(loan_book).drop(columns="loan_id").to_parquet(input_path)
+    loan_totals = run_portfolio(input_path, tmp_path / "out", workers=1)
+
+    assert loan_totals["loan_id"].tolist() == [0, 1, 2, 3, 4]
+    assert len(list((tmp_path / "out" / "transactions").iterdir())) == 1
+
+    # loans are numbered across chunks read from the file, and totals keep input order
+    loan_totals = run_portfolio(input_path, tmp_path / "out", workers=2, chunk_size=2, overwrite=True)
+    assert loan_totals["loan_id"].tolist() == [0, 1, 2, 3, 4]
+    assert len(list((tmp_path / "out" / "transactions").iterdir())) == 3
+
+
+def test_run_portfolio_existing_results(loan_book, tmp_path):
+    input_path = tmp_path / "loans.csv"
+    pd.DataFrame(loan_book).to_csv(input_path, index=False)
+    run_portfolio(input_path, tmp_path / "out", workers=1, chunk_size=1)
+
+    with pytest.raises(FileExistsError):
+        run_portfolio(input_path, tmp_path / "out", workers=1)
+    assert main([str(input_path), str(tmp_path / "out"), "--workers", "1", "--overwrite"]) == 0
+    # part files of the previous run are removed
+    assert len(list((tmp_path / "out" / "transactions").iterdir())) == 1
+
+
+def test_run_portfolio_validates_before_running(loan_book, tmp_path):
+    input_path = tmp_path / "loans.csv"
+    pd.DataFrame([*loan_book, {**loan_book[0], "loan_id": "bad", "annual_rate": -1}]).to_csv(input_path, index=False)
+
+    with pytest.raises(LoanParameterError):
+        run_portfolio(input_path, tmp_path / "out", workers=1, chunk_size=2)
+    assert not (tmp_path / "out").exists()
+
+    # duplicate ids in different chunks
+    pd.DataFrame([*loan_book, loan_book[0]]).to_csv(input_path, index=False)
+    with pytest.raises(ValueError, match="Duplicate loan ids"):
+        run_portfolio(input_path, tmp_path / "out", workers=1, chunk_size=2)
+    assert not (tmp_path / "out").exists()
+
+
+def test_prepare_loan_summary_output_dir(loan_book, tmp_path):
+    loan_params = {key: value for key, value in loan_book[0].items() if key != "loan_id"}
+    prepare_loan_summary(loan_params, store_results=True, output_dir=tmp_path)
+
+    assert (tmp_path / "loan_transactions.csv").exists()
+    assert (tmp_path / "loan_schedule_summary.csv").exists()
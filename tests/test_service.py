@@ -0,0 +1,98 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from loan_analysis_toolkit.schedule import prepare_loan_summary
+from loan_analysis_toolkit.service import ScheduleService, ServiceBusy, prepare_loan_summary_async, start_server
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 10,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False
+    }
+
+
+def test_prepare_loan_summary_async(valid_loan_params):
+    results = asyncio.run(prepare_loan_summary_async(valid_loan_params, engine="event"))
+    expected = prepare_loan_summary(valid_loan_params, engine="event")
+
+    assert results["total_interest_charged"] == expected["total_interest_charged"]
+    assert len(results["all_transactions"]) == len(expected["all_transactions"])
+
+
+def test_identical_requests_are_coalesced(valid_loan_params):
+    async def run():
+        with ThreadPoolExecutor(2) as executor:
+            service = ScheduleService(executor)
+            results = await asyncio.gather(*(service.prepare_loan_summary(valid_loan_params) for _ in range(5)),
+                                           service.prepare_loan_summary({**valid_loan_params, "annual_rate": 6.0}))
+        return service, results
+
+    service, results = asyncio.run(run())
+    assert all(result is results[0] for result in results[:5])
+    assert results[5]["total_interest_charged"] > results[0]["total_interest_charged"]
+    assert service.stats() == {"requests": 6, "computations": 2, "coalesced": 4, "rejected": 0, "pending": 0}
+
+
+def test_pending_limit(valid_loan_params):
+    async def run():
+        service = ScheduleService(max_pending=1)
+        return await asyncio.gather(service.prepare_loan_summary(valid_loan_params),
+                                    service.prepare_loan_summary(valid_loan_params),
+                                    service.prepare_loan_summary({**valid_loan_params, "annual_rate": 6.0}),
+                                    return_exceptions=True)
+
+    first, coalesced, rejected = asyncio.run(run())
+    assert coalesced is first
+    assert isinstance(rejected, ServiceBusy)
+
+
+def test_invalid_params_are_rejected_before_running(valid_loan_params):
+    service = ScheduleService()
+    with pytest.raises(ValueError):
+        asyncio.run(service.prepare_loan_summary({**valid_loan_params, "loan_amount": "lots"}))
+    assert service.stats()["computations"] == 0
+
+
+async def _request(port, method, path, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + body)
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_http_server(valid_loan_params):
+    async def run():
+        server = await start_server(port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return (await _request(port, "POST", "/summary", json.dumps(valid_loan_params).encode()),
+                    await _request(port, "POST", "/summary?engine=daily", b'{"loan_amount": 1}'),
+                    await _request(port, "GET", "/summary"),
+                    await _request(port, "GET", "/stats"))
+
+    (status, summary), (bad_status, error), (method_status, _), (stats_status, stats) = asyncio.run(run())
+    expected = prepare_loan_summary(valid_loan_params, engine="event")
+
+    assert status == 200
+    assert summary["total_interest_charged"] == pytest.approx(expected["total_interest_charged"])
+    assert len(summary["monthly_summary"]) == len(expected["monthly_summary"])
+    assert summary["monthly_summary"][0]["MONTH"] == "2023-01"
+    assert bad_status == 400 and "validation error" in error["error"]
+    assert method_status == 405
+    assert stats_status == 200 and stats["computations"] == 1
@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+import pandas as pd
+from loan_analysis_toolkit.schedule import prepare_loan_summary
+from loan_analysis_toolkit.portfolio import simulate_portfolio
+
+
+def loan(**overrides):
+    params = {
+        "start_date": "2023-01-01",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "monthly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False
+    }
+    params.update(overrides)
+    return params
+
+
+@pytest.fixture
+def loan_book():
+    return [
+        loan(),
+        loan(start_date="2024-01-31", repayment_frequency="fortnightly", extra_repayments_frequency="weekly",
+             extra_repayments_regular_amount=150),
+        loan(start_date="2022-08-29", loan_amount=250000, annual_rate=6.2, loan_duration_years=4,
+             loan_duration_months=5, repayment_frequency="weekly", capture_interest_accrual=True),
+        loan(loan_amount=150000, initial_offset_amount=200000, repayment_frequency="quarterly"),
+        loan(annual_rate=0, loan_duration_years=10),
+        loan(loan_amount=0),
+    ]
+
+
+def test_simulate_portfolio_matches_scalar_schedule(loan_book):
+    result = simulate_portfolio(loan_book, return_transactions=True)
+    transactions = result["all_transactions"]
+
+    for loan_id, loan_params in enumerate(loan_book):
+        expected = prepare_loan_summary(loan_params)
+        actual = transactions[transactions["Loan"] == loan_id].reset_index(drop=True)
+        expected_transactions = expected["all_transactions"]
+
+        assert len(actual) == len(expected_transactions)
+        assert (actual["Date"] == expected_transactions["Date"]).all()
+        assert (actual["Transaction Type"].astype(str) == expected_transactions["Transaction Type"]).all()
+        for column in ["Transaction Amount", "Loan Balance", "Offset Balance"]:
+            assert actual[column].to_numpy() == pytest.approx(expected_transactions[column].to_numpy(), abs=0.005)
+
+        totals = result["loan_totals"].loc[loan_id]
+        assert totals["total_interest_charged"] == pytest.approx(expected["total_interest_charged"], abs=0.01)
+        assert totals["total_repayments"] == pytest.approx(expected["total_repayments"], abs=0.01)
+
+
+def test_simulate_portfolio_totals_only(loan_book):
+    table = pd.DataFrame(loan_book, index=[f"L{i}" for i in range(len(loan_book))])
+    result = simulate_portfolio(table)
+
+    assert result["all_transactions"] is None
+    assert list(result["loan_totals"].index) == list(table.index)
+    # the zero rate loan is paid off by its minimum repayments on the last repayment date
+    assert result["loan_totals"].loc["L4", "payoff_date"] <= pd.Timestamp("2033-01-01")
+    assert result["loan_totals"].loc["L4", "total_interest_charged"] == 0
+    assert result["loan_totals"].loc["L5", "payoff_date"] == pd.Timestamp("2023-01-02")
+    assert np.isfinite(result["loan_totals"]["total_repayments"]).all()
+
+
+def test_simulate_portfolio_invalid_frequency(loan_book):
+    loan_book[1]["repayment_frequency"] = "invalid_frequency"
+    with pytest.raises(ValueError, match="Invalid repayment frequency"):
+        simulate_portfolio(loan_book)
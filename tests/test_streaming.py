@@ -0,0 +1,86 @@
+import io
+import json
+import pytest
+import pandas as pd
+from loan_analysis_toolkit.schedule import iter_loan_transactions, prepare_loan_summary
+from loan_analysis_toolkit.sinks import CsvSink, JsonLinesSink, ParquetSink, write_transactions
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-31",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 40,
+        "loan_duration_months": 0,
+        "repayment_frequency": "fortnightly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": True
+    }
+
+
+def test_iter_loan_transactions_matches_prepare_loan_summary(valid_loan_params):
+    chunks = list(iter_loan_transactions(valid_loan_params, chunk_size=1000))
+    expected = prepare_loan_summary(valid_loan_params, engine="event")["all_transactions"]
+
+    assert len(chunks) > 1
+    # chunks only go over the chunk size by the transactions of one day
+    assert all(len(chunk) < 1000 + 10 for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+
+def test_iter_loan_transactions_is_lazy(valid_loan_params):
+    chunks = iter_loan_transactions(valid_loan_params, chunk_size=100)
+    first = next(chunks)
+
+    assert first["Transaction Type"].iloc[0] == "Settlement"
+    assert len(first) < 110
+
+
+def test_iter_loan_transactions_invalid_args(valid_loan_params):
+    with pytest.raises(ValueError, match="Invalid output"):
+        iter_loan_transactions(valid_loan_params, output="csv")
+    with pytest.raises(ValueError, match="chunk_size"):
+        iter_loan_transactions(valid_loan_params, chunk_size=0)
+
+
+def test_csv_sink(valid_loan_params, tmp_path):
+    path = tmp_path / "transactions.csv"
+    rows = write_transactions(iter_loan_transactions(valid_loan_params, chunk_size=1000), CsvSink(path))
+    expected = prepare_loan_summary(valid_loan_params, engine="event")["all_transactions"]
+    written = pd.read_csv(path, parse_dates=["Date"])
+
+    assert rows == len(expected)
+    assert list(written.columns) == list(expected.columns)
+    pd.testing.assert_series_equal(written["Loan Balance"], expected["Loan Balance"])
+    assert list(written["Date"]) == list(expected["Date"])
+
+
+def test_json_lines_sink_to_file_object(valid_loan_params):
+    buffer = io.StringIO()
+    with JsonLinesSink(buffer) as sink:
+        for batch in iter_loan_transactions(valid_loan_params, chunk_size=500):
+            sink.write(batch)
+    lines = buffer.getvalue().splitlines()
+
+    # the caller's file object is left open
+    assert not buffer.closed
+    assert len(lines) == sink.rows_written
+    assert json.loads(lines[0])["Transaction Type"] == "Settlement"
+
+
+def test_parquet_sink(valid_loan_params, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "transactions.parquet"
+    write_transactions(iter_loan_transactions(valid_loan_params, chunk_size=1000), ParquetSink(path))
+    table = pq.read_table(path)
+    expected = prepare_loan_summary(valid_loan_params, engine="event")["all_transactions"]
+
+    assert pq.ParquetFile(path).num_row_groups > 1
+    assert table.num_rows == len(expected)
+    assert table.column("Loan Balance").to_pylist() == list(expected["Loan Balance"])
@@ -0,0 +1,104 @@
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from loan_analysis_toolkit.schedule import create_amortization_schedule
+from loan_analysis_toolkit.transactions import TransactionBuffer, day_number, SETTLEMENT, REPAYMENT
+
+
+@pytest.fixture
+def schedule_args():
+    return {
+        "start_date": "2023-01-01",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "monthly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "regular_amount_offset_contribution": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": True,
+    }
+
+
+def test_transaction_buffer_to_frame():
+    buffer = TransactionBuffer()
+    buffer.append(day_number(datetime(2023, 1, 1)), SETTLEMENT, 1000.0, 1000.0, 0.0)
+    buffer.append(day_number(datetime(2023, 2, 1)), REPAYMENT, 100.0, 900.0, 0.0)
+    df = buffer.to_frame()
+
+    assert len(buffer) == 2
+    assert list(df.columns) == ['Date', 'Transaction Type', 'Transaction Amount', 'Loan Balance', 'Offset Balance']
+    assert list(df["Date"]) == [pd.Timestamp("2023-01-01"), pd.Timestamp("2023-02-01")]
+    assert list(df["Transaction Type"]) == ["Settlement", "Repayment"]
+    assert isinstance(df["Transaction Type"].dtype, pd.CategoricalDtype)
+    # amounts and balances are not copied into the dataframe
+    assert np.shares_memory(df["Loan Balance"].to_numpy(), buffer.columns()[3])
+
+
+def test_schedule_outputs(schedule_args):
+    df = create_amortization_schedule(**schedule_args)
+    buffer = create_amortization_schedule(**schedule_args, output="buffer")
+
+    assert isinstance(buffer, TransactionBuffer)
+    assert len(buffer) == len(df)
+    assert df["Date"].dtype == "datetime64[ns]"
+    assert df["Transaction Amount"].dtype == np.float64
+    assert (df["Transaction Type"] == "Daily Interest Acrrued").sum() > 7000
+
+
+def test_schedule_arrow_output(schedule_args):
+    pytest.importorskip("pyarrow")
+    table = create_amortization_schedule(**schedule_args, engine="event", output="arrow")
+    df = create_amortization_schedule(**schedule_args, engine="event")
+
+    assert table.num_rows == len(df)
+    assert table.column("Transaction Type").to_pylist() == list(df["Transaction Type"])
+    assert table.column("Loan Balance").to_pylist() == list(df["Loan Balance"])
+
+
+def test_invalid_output(schedule_args):
+    with pytest.raises(ValueError, match="Invalid output"):
+        create_amortization_schedule(**schedule_args, output="csv")
+
+
+@pytest.mark.parametrize("engine", ["daily", "event", "exact"])
+def test_accruals_are_kept_in_a_ledger(schedule_args, engine):
+    buffer = create_amortization_schedule(**schedule_args, engine=engine, output="buffer")
+    df = buffer.to_frame()
+
+    # accruals take one float per day, and their rows are only built on conversion
+    assert len(buffer.types) == len(df) - 2 * len(buffer.accruals)
+    assert len(buffer.accruals.daily) == (df["Transaction Type"] == "Daily Interest Acrrued").sum()
+    accruals = buffer.accrual_frame()
+    daily = df[df["Transaction Type"] == "Daily Interest Acrrued"]
+    monthly = df[df["Transaction Type"] == "Monthly Interest Acrrued"]
+    assert accruals["Date"].tolist() == daily["Date"].tolist()
+    assert accruals["Daily Interest Accrued"].tolist() == daily["Transaction Amount"].tolist()
+    assert accruals["Monthly Interest Accrued"].tolist() == monthly["Transaction Amount"].tolist()
+    assert accruals["Loan Balance"].tolist() == monthly["Loan Balance"].tolist()
+    # the running total restarts after each interest charge
+    charges = df[df["Transaction Type"] == "Interest Charged"]
+    charged_on = monthly.set_index("Date")["Transaction Amount"].loc[charges["Date"]]
+    # the exact engine rounds the accrued interest to cents when it is charged
+    assert charged_on.tolist() == pytest.approx(charges["Transaction Amount"].tolist(), abs=0.005 if engine == "exact" else 0)
+    assert accruals["Monthly Interest Accrued"].iloc[0] == accruals["Daily Interest Accrued"].iloc[0]
+
+
+def test_head_and_extend_keep_accruals(schedule_args):
+    buffer = create_amortization_schedule(**schedule_args, engine="event", output="buffer")
+    df = buffer.to_frame()
+
+    # the two accrual rows of a day are kept or dropped together
+    n = int(np.flatnonzero(df["Transaction Type"] == "Daily Interest Acrrued")[500])
+    head = buffer.head(n + 1)
+    assert len(head) == n
+    pd.testing.assert_frame_equal(head.to_frame(), df.head(n))
+    rest = TransactionBuffer()
+    rest.extend(head)
+    rest.extend(buffer.head(0))
+    assert len(rest) == n
+    pd.testing.assert_frame_equal(rest.to_frame(), df.head(n))
@@ -0,0 +1,77 @@
+import pytest
+import pandas as pd
+from loan_analysis_toolkit.validation import validate_loan_table, LoanParameterError
+from loan_analysis_toolkit.portfolio import simulate_portfolio
+
+
+@pytest.fixture
+def valid_loan_params():
+    return {
+        "start_date": "2023-01-01",
+        "loan_amount": 500000,
+        "annual_rate": 5.0,
+        "loan_duration_years": 30,
+        "loan_duration_months": 0,
+        "repayment_frequency": "monthly",
+        "initial_offset_amount": 10000,
+        "offset_contribution_frequency": "monthly",
+        "offset_contribution_regular_amount": 500,
+        "extra_repayments_frequency": "annually",
+        "extra_repayments_regular_amount": 5000,
+        "capture_interest_accrual": False
+    }
+
+
+def test_valid_table(valid_loan_params):
+    table = pd.DataFrame([valid_loan_params] * 3)
+    errors = validate_loan_table(table)
+
+    assert errors.empty
+    assert list(errors.columns) == ["row", "parameter", "value", "message"]
+
+
+def test_every_invalid_row_is_reported(valid_loan_params):
+    table = pd.DataFrame([valid_loan_params,
+                          {**valid_loan_params, "start_date": "2023-02-30", "loan_amount": -1},
+                          valid_loan_params,
+                          {**valid_loan_params, "repayment_frequency": "annually", "loan_duration_years": 2.5},
+                          {**valid_loan_params, "annual_rate": "5", "capture_interest_accrual": "yes"},
+                          {**valid_loan_params, "loan_duration_years": 0, "offset_contribution_frequency": None}],
+                         index=["a", "b", "c", "d", "e", "f"])
+    errors = validate_loan_table(table, raise_errors=False)
+
+    assert list(errors.itertuples(index=False, name=None)) == [
+        ("b", "start_date", "2023-02-30", "must be a date string in YYYY-MM-DD format"),
+        ("b", "loan_amount", -1, "must not be negative"),
+        ("d", "loan_duration_years", 2.5, "must be a whole number"),
+        ("d", "repayment_frequency", "annually", "Invalid repayment frequency. Choose 'weekly', 'fortnightly', 'monthly', 'quarterly'."),
+        ("e", "annual_rate", "5", "must be a finite number"),
+        ("e", "capture_interest_accrual", "yes", "must be True or False"),
+        ("f", "loan_duration_months", 0, "Invalid loan term. Loan must run for at least one month."),
+        ("f", "offset_contribution_frequency", None, "Invalid offset contribution frequency. Choose 'daily', 'weekly', 'fortnightly', 'monthly', 'quarterly', 'annually'."),
+    ]
+
+    with pytest.raises(LoanParameterError, match="8 invalid loan parameter.* in 4 row") as error:
+        validate_loan_table(table)
+    assert error.value.errors.equals(errors)
+
+
+def test_missing_parameters(valid_loan_params):
+    del valid_loan_params["annual_rate"]
+    with pytest.raises(ValueError, match="Missing loan parameters: annual_rate"):
+        validate_loan_table([valid_loan_params])
+
+
+def test_arrow_table(valid_loan_params):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.Table.from_pylist([valid_loan_params, {**valid_loan_params, "extra_repayments_frequency": "yearly"}])
+    errors = validate_loan_table(table, raise_errors=False)
+
+    assert errors[["row", "parameter"]].values.tolist() == [[1, "extra_repayments_frequency"]]
+
+
+def test_simulate_portfolio_validates_before_simulating(valid_loan_params):
+    loan_book = [valid_loan_params, {**valid_loan_params, "loan_amount": "lots"}, {**valid_loan_params, "annual_rate": -1}]
+    with pytest.raises(LoanParameterError) as error:
+        simulate_portfolio(loan_book)
+    assert error.value.errors["row"].tolist() == [1, 2]